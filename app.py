@@ -2,22 +2,56 @@
 单词记忆工具 Flask 应用
 """
 import os
-from datetime import datetime, timedelta
+import logging
+import functools
+import hashlib
+from datetime import timedelta
 import requests
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, Response
 from flask_jwt_extended import (
-    JWTManager, create_access_token, jwt_required, get_jwt_identity
+    create_access_token, jwt_required, get_jwt_identity
 )
 from flask_cors import CORS
 from dotenv import load_dotenv
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 
 from models import db, User, Word, Syllable, WordSyllable, UserWordQuery, UserSyllableQuery
 from deepseek_service import DeepseekService
+from logging_config import setup_logging, get_logger
+from profiler import request_profiler, SORT_KEYS
+from db_engine import configure_engine
+from http_cache import (
+    conditional_json, conditional_response, make_etag, word_version, public_cache_control
+)
+from compression import compressor
+from auth_cache import CachingJWTManager, get_user_dict
+from password_hashing import PasswordHashBusy
+from json_fast import jsonify, word_fragment, word_fragments
+from dict_bundle import dictionary_bundle
+from delta_sync import collect_changes, maybe_prune
+from word_gate import word_gate, INVALID, FAILED
+from lemmatizer import find_word, add_alias
+from related_words import related_index
+from reverse_lookup import reverse_index, hanzi_runs
+from phonetic_keys import phonetic_keys, KEY_COLUMNS, RHYME
+from startup import ensure_schema
+from trending import trending_tracker, TOP_K as TRENDING_TOP_K, WINDOW as TRENDING_WINDOW
+from query_rollup import (
+    window_word_stats, window_syllable_stats, window_overview, activity,
+    HOUR, DAY, HOURLY_DAYS, DAILY_DAYS
+)
+from query_recorder import (
+    query_event_recorder, record_word_query, get_query_count, MAX_EVENT_COUNT
+)
 
 # 加载环境变量
 load_dotenv()
 
+# 初始化日志（队列异步写出，不阻塞请求线程）
+setup_logging()
+logger = get_logger('app')
+
 # 创建Flask应用
 app = Flask(__name__)
 
@@ -26,11 +60,20 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///wor
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-this')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
+# 响应使用紧凑 JSON：不缩进、不排序键（json_fast 始终如此，这里对 flask.jsonify 生效）
+app.config['JSONIFY_PRETTYPRINT_REGULAR'] = False
+app.config['JSON_SORT_KEYS'] = False
+
+# 数据库引擎调优（连接池、SQLite PRAGMA 等，由 DB_ENGINE_PROFILE 选择）
+configure_engine(app)
 
 # 初始化扩展
 db.init_app(app)
-jwt = JWTManager(app)
+jwt = CachingJWTManager(app)  # 已验证的令牌短期缓存，避免每个请求重复验签
 CORS(app)
+request_profiler.init_app(app)
+query_event_recorder.init_app(app)
+compressor.init_app(app)
 
 # 初始化 Deepseek 服务
 deepseek_service = DeepseekService()
@@ -38,6 +81,14 @@ deepseek_service = DeepseekService()
 
 # ==================== 用户认证相关 API ====================
 
+def password_busy_response(error):
+    """密码哈希任务排队超时：返回 503，提示客户端稍后重试"""
+    response = jsonify({'error': str(error)})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
 @app.route('/api/auth/register', methods=['POST'])
 def register():
     """用户注册"""
@@ -76,6 +127,9 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except PasswordHashBusy as e:
+        db.session.rollback()
+        return password_busy_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'注册失败: {str(e)}'}), 500
@@ -99,6 +153,17 @@ def login():
         if not user or not user.check_password(password):
             return jsonify({'error': '用户名或密码错误'}), 401
         
+        # 哈希参数已调整：用新参数重新计算，旧哈希透明升级
+        if user.password_needs_rehash():
+            try:
+                user.set_password(password)
+                db.session.commit()
+                logger.info("密码哈希已升级", extra={'user_id': user.id})
+            except Exception as e:
+                # 升级失败不影响本次登录，下次登录再试
+                db.session.rollback()
+                logger.warning("密码哈希升级失败: %s", e, extra={'user_id': user.id})
+        
         # 生成访问令牌（identity 必须是字符串）
         access_token = create_access_token(identity=str(user.id))
         
@@ -108,22 +173,25 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except PasswordHashBusy as e:
+        return password_busy_response(e)
     except Exception as e:
         return jsonify({'error': f'登录失败: {str(e)}'}), 500
 
 
 @app.route('/api/auth/me', methods=['GET'])
 @jwt_required()
+@db.replica_reads
 def get_current_user():
     """获取当前用户信息"""
     try:
         user_id = int(get_jwt_identity())  # 从字符串转回整数
-        user = User.query.get(user_id)
+        user = get_user_dict(user_id)  # 短期缓存，修改密码时失效
         
         if not user:
             return jsonify({'error': '用户不存在'}), 404
         
-        return jsonify({'user': user.to_dict()}), 200
+        return jsonify({'user': user}), 200
         
     except Exception as e:
         return jsonify({'error': f'获取用户信息失败: {str(e)}'}), 500
@@ -131,6 +199,100 @@ def get_current_user():
 
 # ==================== 单词管理相关 API ====================
 
+def fetch_word_info(word_text):
+    """
+    经过非单词过滤后调用 AI 获取单词信息
+    
+    Returns:
+        tuple: (单词信息, None)；被过滤或 AI 判定不是单词时为 (None, Rejection)；
+               AI 获取失败时为 (None, None)
+    """
+    rejection = word_gate.check(word_text)
+    if rejection:
+        logger.info("非单词已拒绝", extra={'word': word_text, 'reason': rejection.reason})
+        return None, rejection
+    
+    word_info = deepseek_service.get_word_info(word_text)
+    if word_info is False:
+        return None, word_gate.record(word_text, INVALID)
+    if not word_info and deepseek_service.api_key:
+        word_gate.record(word_text, FAILED)
+    return word_info or None, None
+
+
+def attach_syllables(word, syllables_list):
+    """创建或获取音节，并按顺序关联到单词，同时写入单词的有序音节列（不提交事务）"""
+    attached = []
+    for position, syllable_text in enumerate(syllables_list):
+        syllable_text = syllable_text.strip().lower()
+        if not syllable_text:
+            continue
+        
+        # 查找或创建音节
+        syllable = Syllable.query.filter_by(syllable=syllable_text).first()
+        if not syllable:
+            syllable = Syllable(syllable=syllable_text)
+            db.session.add(syllable)
+            db.session.flush()
+        
+        # 创建单词-音节关联
+        db.session.add(WordSyllable(
+            word_id=word.id,
+            syllable_id=syllable.id,
+            position=position
+        ))
+        attached.append(syllable_text)
+    
+    word.set_syllables(attached)
+
+
+def save_ai_word(word_text, word_info):
+    """
+    保存 AI 获取的单词（不提交事务）
+    
+    AI 返回的原形与输入不同时保存原形，输入记为原形的变形；原形已存在时只添加变形
+    
+    Returns:
+        tuple: (Word, 是否新建了单词)
+    """
+    lemma = word_info.get('lemma') or word_text
+    if lemma != word_text:
+        word = Word.query.filter_by(word=lemma).first()
+        if word:
+            add_alias(word_text, word)
+            return word, False
+    
+    word = Word(
+        word=lemma,
+        translation=word_info['translation'],
+        phonetic=word_info['phonetic'],
+        phonetic_analysis=word_info.get('phonetic_analysis', ''),
+        root_affix=word_info.get('root_affix', '')
+    )
+    db.session.add(word)
+    db.session.flush()
+    attach_syllables(word, word_info['syllables'])
+    
+    if lemma != word_text:
+        add_alias(word_text, word)
+    return word, True
+
+
+def rejected_word_response(rejection):
+    """非单词：返回 422；近期 AI 获取失败：返回 503 和 Retry-After"""
+    response = jsonify({
+        'error': rejection.message,
+        'action': 'rejected',
+        'reason': rejection.reason
+    })
+    if rejection.retry_after:
+        response.status_code = 503
+        response.headers['Retry-After'] = str(rejection.retry_after)
+    else:
+        response.status_code = 422
+    return response
+
+
 @app.route('/api/words', methods=['POST'])
 @jwt_required()
 def add_word():
@@ -157,17 +319,22 @@ def add_word():
         if not word_text:
             return jsonify({'error': '单词是必填项'}), 400
         
-        # 检查单词是否已存在
-        existing_word = Word.query.filter_by(word=word_text).first()
+        # 判断是手动模式还是AI自动模式
+        syllables_input = data.get('syllables')
+        
+        # 检查单词是否已存在（AI 模式下变形也归并到原形，-ed/-ing 形式由 AI 确认）
+        if syllables_input is not None:
+            existing_word = Word.query.filter_by(word=word_text).first()
+        else:
+            existing_word, alias = find_word(word_text, create_alias=True)
+            if alias:
+                db.session.commit()
         if existing_word:
             return jsonify({
                 'message': '单词已存在',
                 'word': existing_word.to_dict()
             }), 200
         
-        # 判断是手动模式还是AI自动模式
-        syllables_input = data.get('syllables')
-        
         # 模式1：手动添加（传入了 syllables）
         if syllables_input is not None:
             translation = data.get('translation', '').strip()
@@ -198,60 +365,42 @@ def add_word():
             )
             db.session.add(word)
             db.session.flush()
+            attach_syllables(word, syllables_list)
             
-            print(f"手动添加单词: {word_text}")
-            print(f"  音标: {phonetic}")
-            print(f"  翻译: {translation}")
-            print(f"  音节: {' '.join(syllables_list)}")
-            print(f"  自然拼读: {phonetic_analysis}")
-            print(f"  词根词缀: {root_affix}")
+            logger.info("手动添加单词", extra={'word': word_text})
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("手动添加单词详情", extra={
+                    'word': word_text,
+                    'phonetic': phonetic,
+                    'translation': translation,
+                    'syllables': syllables_list,
+                    'phonetic_analysis': phonetic_analysis,
+                    'root_affix': root_affix
+                })
         
         # 模式2：AI自动获取
         else:
-            print(f"AI自动获取单词信息: {word_text}")
+            logger.info("AI自动获取单词信息", extra={'word': word_text})
             
-            # 调用 Deepseek API 获取完整信息
-            word_info = deepseek_service.get_word_info(word_text)
+            # 调用 Deepseek API 获取完整信息（先过滤非单词）
+            word_info, rejection = fetch_word_info(word_text)
             
+            if rejection:
+                return rejected_word_response(rejection)
             if not word_info:
                 return jsonify({
                     'error': 'AI自动获取单词信息失败',
                     'message': '请检查 DEEPSEEK_API_KEY 配置或使用手动添加模式'
                 }), 500
             
-            # 创建单词
-            word = Word(
-                word=word_text,
-                translation=word_info['translation'],
-                phonetic=word_info['phonetic'],
-                phonetic_analysis=word_info.get('phonetic_analysis', ''),
-                root_affix=word_info.get('root_affix', '')
-            )
-            db.session.add(word)
-            db.session.flush()
-            
-            syllables_list = word_info['syllables']
-        
-        # 创建或获取音节，并关联到单词
-        for position, syllable_text in enumerate(syllables_list):
-            syllable_text = syllable_text.strip().lower()
-            if not syllable_text:
-                continue
-            
-            # 查找或创建音节
-            syllable = Syllable.query.filter_by(syllable=syllable_text).first()
-            if not syllable:
-                syllable = Syllable(syllable=syllable_text)
-                db.session.add(syllable)
-                db.session.flush()
-            
-            # 创建单词-音节关联
-            word_syllable = WordSyllable(
-                word_id=word.id,
-                syllable_id=syllable.id,
-                position=position
-            )
-            db.session.add(word_syllable)
+            # 创建单词（输入是变形时保存原形）
+            word, created = save_ai_word(word_text, word_info)
+            if not created:
+                db.session.commit()
+                return jsonify({
+                    'message': '单词已存在',
+                    'word': word.to_dict()
+                }), 200
         
         db.session.commit()
         
@@ -267,10 +416,37 @@ def add_word():
         return jsonify({'error': f'添加单词失败: {str(e)}'}), 500
 
 
+def wants_record():
+    """兼容旧客户端：?record=1 时读接口同步记录查询次数"""
+    return request.args.get('record', '').lower() in ('1', 'true', 'yes')
+
+
+def word_detail_response(word, user_id):
+    """
+    返回单词详情和当前用户的查询次数
+    
+    默认只读（不记录查询次数），响应带 ETag，可走只读副本并被客户端缓存；
+    查看次数由客户端通过 POST /api/events/query 异步上报。
+    """
+    if wants_record():
+        query_count = record_word_query(user_id, word.id)
+        db.session.commit()
+    else:
+        query_count = get_query_count(user_id, word.id)
+    
+    # ETag 包含查询次数，客户端缓存命中时返回 304
+    etag = make_etag(word_version(word), user_id, query_count)
+    
+    return conditional_json(
+        etag, lambda: {'word': word_fragment(word, query_count=query_count)}
+    )
+
+
 @app.route('/api/words/<int:word_id>', methods=['GET'])
 @jwt_required()
+@db.replica_reads
 def get_word(word_id):
-    """查询单词详情（会记录查询次数）"""
+    """查询单词详情（只读，?record=1 时记录查询次数）"""
     try:
         user_id = int(get_jwt_identity())  # 从字符串转回整数
         
@@ -279,60 +455,93 @@ def get_word(word_id):
         if not word:
             return jsonify({'error': '单词不存在'}), 404
         
-        # 记录用户查询单词次数
-        user_word_query = UserWordQuery.query.filter_by(
-            user_id=user_id,
-            word_id=word_id
-        ).first()
-        
-        if user_word_query:
-            user_word_query.query_count += 1
-            user_word_query.last_queried_at = datetime.utcnow()
-        else:
-            user_word_query = UserWordQuery(
-                user_id=user_id,
-                word_id=word_id,
-                query_count=1
-            )
-            db.session.add(user_word_query)
-        
-        # 记录用户查询音节次数
-        for word_syllable in word.word_syllables.all():
-            syllable_id = word_syllable.syllable_id
-            
-            user_syllable_query = UserSyllableQuery.query.filter_by(
-                user_id=user_id,
-                syllable_id=syllable_id
-            ).first()
-            
-            if user_syllable_query:
-                user_syllable_query.query_count += 1
-                user_syllable_query.last_queried_at = datetime.utcnow()
-            else:
-                user_syllable_query = UserSyllableQuery(
-                    user_id=user_id,
-                    syllable_id=syllable_id,
-                    query_count=1
-                )
-                db.session.add(user_syllable_query)
-        
-        db.session.commit()
-        
-        # 返回单词信息和查询次数
-        word_dict = word.to_dict()
-        word_dict['query_count'] = user_word_query.query_count
-        
-        return jsonify({'word': word_dict}), 200
+        return word_detail_response(word, user_id)
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'查询单词失败: {str(e)}'}), 500
 
 
+@app.route('/api/words/<int:word_id>/related', methods=['GET'])
+@jwt_required()
+@db.replica_reads
+def get_related_words(word_id):
+    """共享音节的相关单词（按 IDF 和位置加权的相似度排序）"""
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+        word = Word.query.get(word_id)
+        if not word:
+            return jsonify({'error': '单词不存在'}), 404
+
+        related = related_index.related(word_id, limit=limit)
+        words = {w.id: w for w in Word.query.filter(Word.id.in_([r[0] for r in related])).all()}
+        # 索引可能包含刚被删除的单词
+        related = [r for r in related if r[0] in words]
+
+        syllable_ids = {syllable_id for _, _, shared in related for syllable_id in shared}
+        syllable_text = dict(
+            db.session.query(Syllable.id, Syllable.syllable).filter(Syllable.id.in_(syllable_ids))
+        ) if syllable_ids else {}
+
+        fragments = word_fragments([words[r[0]] for r in related])
+        return jsonify({
+            'word_id': word_id,
+            'related': [
+                fragment.extend(score=score, shared=[syllable_text[s] for s in shared if s in syllable_text])
+                for fragment, (_, score, shared) in zip(fragments, related)
+            ]
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'查询相关单词失败: {str(e)}'}), 500
+
+
+@app.route('/api/words/reverse-lookup', methods=['GET'])
+@jwt_required()
+@db.replica_reads
+def reverse_lookup_words():
+    """
+    中文反查：按中文释义查找单词（字符二元组倒排索引，按匹配质量排序）
+    
+    查询参数：
+        q: 中文释义，如“谈话”
+        limit: 返回数量（默认 20，最多 100）
+    """
+    try:
+        text = request.args.get('q', '').strip()
+        if not text:
+            return jsonify({'error': '请提供要查找的中文释义 q'}), 400
+        if not hanzi_runs(text):
+            return jsonify({'error': 'q 需要包含中文'}), 400
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+        matches = reverse_index.lookup(text, limit=limit)
+        words = {w.id: w for w in Word.query.filter(Word.id.in_([m[0] for m in matches])).all()}
+        # 索引可能包含刚被删除的单词
+        matches = [m for m in matches if m[0] in words]
+
+        fragments = word_fragments([words[m[0]] for m in matches])
+        return jsonify({
+            'query': text,
+            'words': [
+                fragment.extend(score=score, match=kind)
+                for fragment, (_, score, kind) in zip(fragments, matches)
+            ],
+            'total': len(matches)
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'中文反查失败: {str(e)}'}), 500
+
+
 @app.route('/api/words/search', methods=['GET'])
 @jwt_required()
+@db.replica_reads
 def search_word():
-    """按单词文本搜索（会记录查询次数）"""
+    """按单词文本搜索（只读，?record=1 时记录查询次数）"""
     try:
         user_id = int(get_jwt_identity())  # 从字符串转回整数
         word_text = request.args.get('word', '').strip().lower()
@@ -340,67 +549,53 @@ def search_word():
         if not word_text:
             return jsonify({'error': '请提供要搜索的单词'}), 400
         
-        # 查找单词
-        word = Word.query.filter_by(word=word_text).first()
+        # 查找单词（变形返回原形）
+        word, _ = find_word(word_text)
         if not word:
             return jsonify({'error': '单词不存在'}), 404
         
-        # 记录用户查询单词次数
-        user_word_query = UserWordQuery.query.filter_by(
-            user_id=user_id,
-            word_id=word.id
-        ).first()
-        
-        if user_word_query:
-            user_word_query.query_count += 1
-            user_word_query.last_queried_at = datetime.utcnow()
-        else:
-            user_word_query = UserWordQuery(
-                user_id=user_id,
-                word_id=word.id,
-                query_count=1
-            )
-            db.session.add(user_word_query)
-        
-        # 记录用户查询音节次数
-        for word_syllable in word.word_syllables.all():
-            syllable_id = word_syllable.syllable_id
-            
-            user_syllable_query = UserSyllableQuery.query.filter_by(
-                user_id=user_id,
-                syllable_id=syllable_id
-            ).first()
-            
-            if user_syllable_query:
-                user_syllable_query.query_count += 1
-                user_syllable_query.last_queried_at = datetime.utcnow()
-            else:
-                user_syllable_query = UserSyllableQuery(
-                    user_id=user_id,
-                    syllable_id=syllable_id,
-                    query_count=1
-                )
-                db.session.add(user_syllable_query)
-        
-        db.session.commit()
-        
-        # 返回单词信息和查询次数
-        word_dict = word.to_dict()
-        word_dict['query_count'] = user_word_query.query_count
-        
-        return jsonify({'word': word_dict}), 200
+        return word_detail_response(word, user_id)
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'搜索单词失败: {str(e)}'}), 500
 
 
-@app.route('/api/words/public-lookup', methods=['POST'])
+def public_lookup_readonly(word_text):
+    """公开只读查询（GET），响应可被浏览器、插件和反向代理缓存"""
+    word_text = word_text.strip().lower()
+    if not word_text:
+        return jsonify({'error': '请提供单词'}), 400
+    
+    word, _ = find_word(word_text)
+    if not word:
+        response = jsonify({
+            'message': '单词不存在',
+            'action': 'not_found',
+            'word': None
+        })
+        response.status_code = 404
+        # 不存在的单词可能随时被添加，只短暂缓存
+        response.headers['Cache-Control'] = public_cache_control(max_age=30)
+        return response
+    
+    return conditional_json(
+        make_etag('public', word_version(word)),
+        lambda: {'message': '单词已存在', 'action': 'queried', 'word': word_fragment(word)},
+        cache_control=public_cache_control(),
+        vary_auth=False
+    )
+
+
+@app.route('/api/words/public-lookup', methods=['GET', 'POST'])
 def public_lookup_word():
     """
     公开单词查询接口（无需登录）
     
-    参数：
+    GET（只读，可缓存）：
+        /api/words/public-lookup?word=conversation
+    
+    POST 参数：
         word: 单词（必需）
         code: 验证码（可选）
             - 为空或不传：只查询，不记录次数
@@ -410,6 +605,12 @@ def public_lookup_word():
         word: 单词信息
         action: 操作类型（queried/added/not_found）
     """
+    if request.method == 'GET':
+        try:
+            return public_lookup_readonly(request.args.get('word', ''))
+        except Exception as e:
+            return jsonify({'error': f'查询失败: {str(e)}'}), 500
+    
     try:
         data = request.get_json()
         
@@ -423,64 +624,28 @@ def public_lookup_word():
         should_record = code == '19921012QWER'
         target_user_id = 4  # 固定用户ID
         
-        # 查找单词是否已存在
-        word = Word.query.filter_by(word=word_text).first()
+        # 查找单词是否已存在（变形返回原形，记录次数时保存变形）
+        word, alias = find_word(word_text, create_alias=should_record)
         
         # 情况1：单词已存在
         if word:
-            print(f"[公开查询] 单词 '{word_text}' 已存在")
+            logger.debug("[公开查询] 单词已存在 word=%s record=%s", word_text, should_record)
             
             # 如果需要记录次数
             if should_record:
-                print(f"  -> 记录查询次数到用户 {target_user_id}")
-                
-                # 记录用户查询单词次数
-                user_word_query = UserWordQuery.query.filter_by(
-                    user_id=target_user_id,
-                    word_id=word.id
-                ).first()
-                
-                if user_word_query:
-                    user_word_query.query_count += 1
-                    user_word_query.last_queried_at = datetime.utcnow()
-                else:
-                    user_word_query = UserWordQuery(
-                        user_id=target_user_id,
-                        word_id=word.id,
-                        query_count=1
-                    )
-                    db.session.add(user_word_query)
-                
-                # 记录用户查询音节次数
-                for word_syllable in word.word_syllables.all():
-                    syllable_id = word_syllable.syllable_id
-                    
-                    user_syllable_query = UserSyllableQuery.query.filter_by(
-                        user_id=target_user_id,
-                        syllable_id=syllable_id
-                    ).first()
-                    
-                    if user_syllable_query:
-                        user_syllable_query.query_count += 1
-                        user_syllable_query.last_queried_at = datetime.utcnow()
-                    else:
-                        user_syllable_query = UserSyllableQuery(
-                            user_id=target_user_id,
-                            syllable_id=syllable_id,
-                            query_count=1
-                        )
-                        db.session.add(user_syllable_query)
                 
+                # 记录用户查询单词及其音节的次数（原子累加）
+                query_count = record_word_query(target_user_id, word.id)
                 db.session.commit()
                 
-                word_dict = word.to_dict()
-                word_dict['query_count'] = user_word_query.query_count
+                word_dict = word_fragment(word, query_count=query_count)
             else:
-                word_dict = word.to_dict()
+                word_dict = word_fragment(word)
             
             return jsonify({
                 'message': '单词已存在',
                 'action': 'queried',
+                'alias': alias,
                 'word': word_dict
             }), 200
         
@@ -488,68 +653,45 @@ def public_lookup_word():
         else:
             # 如果有正确的 code，使用 AI 自动添加
             if should_record:
-                print(f"[公开查询] 单词 '{word_text}' 不存在，使用AI自动添加")
+                logger.info("[公开查询] 单词不存在，使用AI自动添加", extra={'word': word_text})
                 
-                # 调用 Deepseek API 获取完整信息
-                word_info = deepseek_service.get_word_info(word_text)
+                # 调用 Deepseek API 获取完整信息（先过滤非单词）
+                word_info, rejection = fetch_word_info(word_text)
                 
+                if rejection:
+                    return rejected_word_response(rejection)
                 if not word_info:
                     return jsonify({
                         'error': 'AI自动获取单词信息失败',
                         'action': 'error'
                     }), 500
                 
-                # 创建单词
-                word = Word(
-                    word=word_text,
-                    translation=word_info['translation'],
-                    phonetic=word_info['phonetic'],
-                    phonetic_analysis=word_info.get('phonetic_analysis', ''),
-                    root_affix=word_info.get('root_affix', '')
-                )
-                db.session.add(word)
-                db.session.flush()
-                
-                syllables_list = word_info['syllables']
-                
-                # 创建或获取音节，并关联到单词
-                for position, syllable_text in enumerate(syllables_list):
-                    syllable_text = syllable_text.strip().lower()
-                    if not syllable_text:
-                        continue
-                    
-                    syllable = Syllable.query.filter_by(syllable=syllable_text).first()
-                    if not syllable:
-                        syllable = Syllable(syllable=syllable_text)
-                        db.session.add(syllable)
-                        db.session.flush()
-                    
-                    word_syllable_obj = WordSyllable(
-                        word_id=word.id,
-                        syllable_id=syllable.id,
-                        position=position
-                    )
-                    db.session.add(word_syllable_obj)
-                
-                # 记录查询次数
-                user_word_query = UserWordQuery(
-                    user_id=target_user_id,
-                    word_id=word.id,
-                    query_count=1
-                )
-                db.session.add(user_word_query)
+                # 创建单词（输入是变形时保存原形）
+                word, created = save_ai_word(word_text, word_info)
+                if not created:
+                    query_count = record_word_query(target_user_id, word.id)
+                    db.session.commit()
+                    return jsonify({
+                        'message': '单词已存在',
+                        'action': 'queried',
+                        'alias': word_text,
+                        'word': word_fragment(word, query_count=query_count)
+                    }), 200
                 
+                # 记录查询次数（与已有单词相同，同时写入音节次数、查询事件和热门单词）
+                query_count = record_word_query(target_user_id, word.id)
                 db.session.commit()
                 
-                print(f"  -> 单词添加成功并记录到用户 {target_user_id}")
-                
-                word_dict = word.to_dict()
-                word_dict['query_count'] = 1
+                logger.info(
+                    "[公开查询] 单词添加成功",
+                    extra={'word': word_text, 'user_id': target_user_id}
+                )
                 
                 return jsonify({
                     'message': '单词不存在，已自动添加（AI模式）',
                     'action': 'added',
-                    'word': word_dict
+                    'alias': word_text if word.word != word_text else None,
+                    'word': word_fragment(word, query_count=query_count)
                 }), 201
             
             # 没有正确的 code，只返回未找到
@@ -578,121 +720,62 @@ def lookup_word():
         if not word_text:
             return jsonify({'error': '请提供单词'}), 400
         
-        # 查找单词是否已存在
-        word = Word.query.filter_by(word=word_text).first()
+        # 查找单词是否已存在（变形返回原形）
+        word, alias = find_word(word_text, create_alias=True)
         
         # 情况1：单词已存在 - 查询并记录次数
         if word:
-            print(f"单词 '{word_text}' 已存在，返回详情并记录查询次数")
-            
-            # 记录用户查询单词次数
-            user_word_query = UserWordQuery.query.filter_by(
-                user_id=user_id,
-                word_id=word.id
-            ).first()
-            
-            if user_word_query:
-                user_word_query.query_count += 1
-                user_word_query.last_queried_at = datetime.utcnow()
-            else:
-                user_word_query = UserWordQuery(
-                    user_id=user_id,
-                    word_id=word.id,
-                    query_count=1
-                )
-                db.session.add(user_word_query)
-            
-            # 记录用户查询音节次数
-            for word_syllable in word.word_syllables.all():
-                syllable_id = word_syllable.syllable_id
-                
-                user_syllable_query = UserSyllableQuery.query.filter_by(
-                    user_id=user_id,
-                    syllable_id=syllable_id
-                ).first()
-                
-                if user_syllable_query:
-                    user_syllable_query.query_count += 1
-                    user_syllable_query.last_queried_at = datetime.utcnow()
-                else:
-                    user_syllable_query = UserSyllableQuery(
-                        user_id=user_id,
-                        syllable_id=syllable_id,
-                        query_count=1
-                    )
-                    db.session.add(user_syllable_query)
+            logger.debug("单词已存在，返回详情并记录查询次数 word=%s user_id=%s", word_text, user_id)
             
+            # 记录用户查询单词及其音节的次数（原子累加）
+            query_count = record_word_query(user_id, word.id)
             db.session.commit()
             
             # 返回单词信息
-            word_dict = word.to_dict()
-            word_dict['query_count'] = user_word_query.query_count
+            word_dict = word_fragment(word, query_count=query_count)
             
             return jsonify({
                 'message': '单词已存在',
                 'action': 'queried',
+                'alias': alias,
                 'word': word_dict
             }), 200
         
         # 情况2：单词不存在 - 使用AI自动添加
         else:
-            print(f"单词 '{word_text}' 不存在，使用AI自动添加")
+            logger.info("单词不存在，使用AI自动添加", extra={'word': word_text, 'user_id': user_id})
             
-            # 调用 Deepseek API 获取完整信息
-            word_info = deepseek_service.get_word_info(word_text)
+            # 调用 Deepseek API 获取完整信息（先过滤非单词）
+            word_info, rejection = fetch_word_info(word_text)
             
+            if rejection:
+                return rejected_word_response(rejection)
             if not word_info:
                 return jsonify({
                     'error': 'AI自动获取单词信息失败',
                     'message': '请检查 DEEPSEEK_API_KEY 配置或使用手动添加模式'
                 }), 500
             
-            # 创建单词
-            word = Word(
-                word=word_text,
-                translation=word_info['translation'],
-                phonetic=word_info['phonetic'],
-                phonetic_analysis=word_info.get('phonetic_analysis', ''),
-                root_affix=word_info.get('root_affix', '')
-            )
-            db.session.add(word)
-            db.session.flush()
-            
-            syllables_list = word_info['syllables']
-            
-            # 创建或获取音节，并关联到单词
-            for position, syllable_text in enumerate(syllables_list):
-                syllable_text = syllable_text.strip().lower()
-                if not syllable_text:
-                    continue
-                
-                # 查找或创建音节
-                syllable = Syllable.query.filter_by(syllable=syllable_text).first()
-                if not syllable:
-                    syllable = Syllable(syllable=syllable_text)
-                    db.session.add(syllable)
-                    db.session.flush()
-                
-                # 创建单词-音节关联
-                word_syllable = WordSyllable(
-                    word_id=word.id,
-                    syllable_id=syllable.id,
-                    position=position
-                )
-                db.session.add(word_syllable)
+            # 创建单词（输入是变形时保存原形）
+            word, created = save_ai_word(word_text, word_info)
+            if not created:
+                query_count = record_word_query(user_id, word.id)
+                db.session.commit()
+                return jsonify({
+                    'message': '单词已存在',
+                    'action': 'queried',
+                    'alias': word_text,
+                    'word': word_fragment(word, query_count=query_count)
+                }), 200
             
             db.session.commit()
             
-            print(f"单词添加成功: {word.word}")
-            print(f"  音标: {word.phonetic}")
-            print(f"  翻译: {word.translation}")
-            print(f"  音节: {' '.join(syllables_list)}")
-            print(f"  自然拼读: {word.phonetic_analysis}")
-            print(f"  词根词缀: {word.root_affix}")
+            logger.info("单词添加成功", extra={'word': word.word, 'word_id': word.id})
             
             return jsonify({
                 'message': '单词不存在，已自动添加（AI自动获取）',
                 'action': 'added',
+                'alias': word_text if word.word != word_text else None,
                 'word': word.to_dict()
             }), 201
         
@@ -703,6 +786,7 @@ def lookup_word():
 
 @app.route('/api/words', methods=['GET'])
 @jwt_required()
+@db.replica_reads
 def list_words():
     """获取单词列表"""
     try:
@@ -714,7 +798,8 @@ def list_words():
             page=page, per_page=per_page, error_out=False
         )
         
-        words = [word.to_dict() for word in pagination.items]
+        # 单词内容使用缓存的 JSON 片段，音节批量加载
+        words = word_fragments(pagination.items)
         
         return jsonify({
             'words': words,
@@ -730,6 +815,7 @@ def list_words():
 
 @app.route('/api/syllables/words', methods=['GET'])
 @jwt_required()
+@db.replica_reads
 def get_words_by_syllable():
     """
     根据音节查询包含该音节的所有单词
@@ -782,40 +868,305 @@ def get_words_by_syllable():
             .distinct()\
             .subquery()
         
-        # 分页查询单词
-        pagination = Word.query\
-            .filter(Word.id.in_(word_ids_subquery))\
-            .order_by(Word.created_at.desc())\
-            .paginate(page=page, per_page=per_page, error_out=False)
+        # 列表版本：单词数量、最大 id 和最新修改时间，任何一项变化都会使 ETag 失效
+        total, max_id, last_updated = db.session.query(
+            func.count(Word.id), func.max(Word.id), func.max(Word.updated_at)
+        ).filter(Word.id.in_(word_ids_subquery)).one()
+        etag = make_etag('syllable', syllable.id, total, max_id, last_updated, page, per_page)
+        
+        def build_payload():
+            # 分页查询单词
+            pagination = Word.query\
+                .filter(Word.id.in_(word_ids_subquery))\
+                .order_by(Word.created_at.desc())\
+                .paginate(page=page, per_page=per_page, error_out=False)
+            
+            # 获取单词的完整信息（缓存的 JSON 片段，音节批量加载）
+            return {
+                'syllable': syllable_text,
+                'words': word_fragments(pagination.items),
+                'total': pagination.total,
+                'page': page,
+                'per_page': per_page,
+                'pages': pagination.pages
+            }
+        
+        return conditional_json(etag, build_payload)
+
+    except Exception as e:
+        return jsonify({'error': f'查询失败: {str(e)}'}), 500
+
+
+@app.route('/api/words/phonetic-search', methods=['GET'])
+@jwt_required()
+@db.replica_reads
+def phonetic_search():
+    """
+    按音标检索键查询单词（押韵、相同首音、相同重音模式）
+
+    参数：
+        word: 单词（与 phonetic 二选一）
+        phonetic: IPA 音标，如 /ˈneɪʃn/
+        by: rhyme（默认）/ onset / stress
+        page: 页码（可选，默认1）
+        per_page: 每页数量（可选，默认50，最多200）
+
+    返回：
+        key: 使用的检索键
+        words: 单词列表（不含查询的单词本身）
+        total / page / per_page / pages: 分页信息
+    """
+    try:
+        by = request.args.get('by', RHYME)
+        if by not in KEY_COLUMNS:
+            return jsonify({'error': f"by 只能是 {' / '.join(KEY_COLUMNS)}"}), 400
+        column = getattr(Word, KEY_COLUMNS[by])
+
+        word_text = request.args.get('word', '').strip().lower()
+        phonetic = request.args.get('phonetic', '').strip()
+        word = None
+        if word_text:
+            word, _ = find_word(word_text)
+            if not word:
+                return jsonify({'error': '单词不存在'}), 404
+            key = getattr(word, KEY_COLUMNS[by])
+        elif phonetic:
+            key = phonetic_keys(phonetic)[KEY_COLUMNS[by]]
+        else:
+            return jsonify({'error': '请提供单词或音标'}), 400
+        if key is None:
+            return jsonify({'error': '没有可用的音标'}), 422
+
+        page = request.args.get('page', 1, type=int)
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), 200)
+
+        # 检索键列有索引，按键相等查询不需要扫描音标
+        query = Word.query.filter(column == key)
+        if word:
+            query = query.filter(Word.id != word.id)
+
+        total, max_id, last_updated = query.with_entities(
+            func.count(Word.id), func.max(Word.id), func.max(Word.updated_at)
+        ).one()
+        etag = make_etag('phonetic', by, key, word.id if word else None,
+                         total, max_id, last_updated, page, per_page)
+
+        def build_payload():
+            pagination = query.order_by(Word.word).paginate(
+                page=page, per_page=per_page, error_out=False
+            )
+            return {
+                'by': by,
+                'key': key,
+                'word': word.word if word else None,
+                'words': word_fragments(pagination.items),
+                'total': pagination.total,
+                'page': page,
+                'per_page': per_page,
+                'pages': pagination.pages
+            }
+
+        return conditional_json(etag, build_payload)
+
+    except Exception as e:
+        return jsonify({'error': f'音标检索失败: {str(e)}'}), 500
+
+
+# ==================== 查询事件 ====================
+
+@app.route('/api/events/query', methods=['POST'])
+@jwt_required(locations=['headers', 'json'])
+def record_query_events():
+    """
+    批量上报单词查看事件（异步写入，立即返回 202）
+    
+    请求体：
+        {
+            "events": [
+                {"word_id": 12},
+                {"word": "conversation", "count": 2}
+            ]
+        }
+    
+    使用 navigator.sendBeacon 等无法设置请求头的方式时，
+    可以在请求体中携带 "access_token"。
+    
+    返回：
+        accepted: 接受的事件数
+        ignored: 格式错误或单词不存在而被忽略的事件数
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True) or {}
+        events = data.get('events')
+        
+        if not isinstance(events, list) or not events:
+            return jsonify({'error': '请提供 events 列表'}), 400
         
-        # 获取单词的完整信息
-        words = [word.to_dict() for word in pagination.items]
+        if len(events) > query_event_recorder.max_batch:
+            return jsonify({
+                'error': f'单次最多上报 {query_event_recorder.max_batch} 个事件'
+            }), 400
+        
+        # 解析事件：[(单词ID或单词文本, 次数)]
+        parsed = []
+        for event in events:
+            if not isinstance(event, dict):
+                continue
+            
+            count = event.get('count', 1)
+            if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+                continue
+            count = min(count, MAX_EVENT_COUNT)
+            
+            word_id = event.get('word_id')
+            word_text = event.get('word')
+            if isinstance(word_id, int) and not isinstance(word_id, bool):
+                parsed.append((word_id, count))
+            elif isinstance(word_text, str) and word_text.strip():
+                parsed.append((word_text.strip().lower(), count))
+        
+        # 一次查询把单词文本转换为ID，并过滤不存在的单词
+        ids = [key for key, _ in parsed if isinstance(key, int)]
+        texts = [key for key, _ in parsed if isinstance(key, str)]
+        id_map = {}
+        if ids:
+            id_map.update((word_id, word_id) for (word_id,) in
+                          db.session.query(Word.id).filter(Word.id.in_(ids)))
+        if texts:
+            id_map.update((word_text, word_id) for word_id, word_text in
+                          db.session.query(Word.id, Word.word).filter(Word.word.in_(texts)))
+        
+        word_counts = {}
+        accepted = 0
+        for key, count in parsed:
+            word_id = id_map.get(key)
+            if word_id is not None:
+                word_counts[word_id] = word_counts.get(word_id, 0) + count
+                accepted += 1
+        
+        if word_counts and not query_event_recorder.submit(user_id, word_counts):
+            return jsonify({'error': '服务器繁忙，请稍后重试'}), 503
         
         return jsonify({
-            'syllable': syllable_text,
-            'words': words,
-            'total': pagination.total,
-            'page': page,
-            'per_page': per_page,
-            'pages': pagination.pages
-        }), 200
+            'accepted': accepted,
+            'ignored': len(events) - accepted
+        }), 202
         
     except Exception as e:
-        return jsonify({'error': f'查询失败: {str(e)}'}), 500
+        return jsonify({'error': f'上报查询事件失败: {str(e)}'}), 500
+
+
+# ==================== 离线词库 ====================
+
+@app.route('/api/dictionary/bundle', methods=['GET'])
+@jwt_required()
+def get_dictionary_bundle():
+    """
+    下载离线词库包（热门单词，供浏览器插件在本地查词）
+    
+    查询参数：
+        since: 本地已有的版本号（可选）。提供时只返回增量：
+               upserts（新增或内容有变化的单词）和 removes（需要删除的单词ID）；
+               该版本已过期时返回完整词库包（full 为 true）
+    
+    返回：
+        version: 当前版本号
+        full: 是否为完整词库包
+        words: 单词列表（完整词库包），字段与单词详情相同
+    """
+    try:
+        since = request.args.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return jsonify({'error': 'since 必须是整数版本号'}), 400
+        
+        snapshot = dictionary_bundle.current()
+        etag = make_etag('dictionary-bundle', snapshot.version, since)
+        return conditional_json(etag, lambda: dictionary_bundle.payload(snapshot, since))
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'获取离线词库失败: {str(e)}'}), 500
+
+
+# ==================== 增量同步 ====================
+
+@app.route('/api/sync', methods=['GET'])
+@jwt_required()
+def sync_changes():
+    """
+    增量同步：返回游标之后变化过的单词（含有序音节）和当前用户的查询次数
+    
+    查询参数：
+        since: 上次同步返回的 cursor（首次同步不传）
+    
+    返回：
+        cursor: 下次同步使用的游标
+        reset: 为 true 时客户端应清空本地数据（此时返回用户全部的查询次数，单词按需重新获取）
+        has_more: 为 true 时立即用新游标继续同步
+        words / deleted_words: 变化的单词（字段与单词详情相同）/ 已删除的单词ID
+        word_queries / deleted_word_queries: 单词查询次数（字段与单词统计相同）
+        syllable_queries / deleted_syllable_queries: 音节查询次数
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        since = request.args.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return jsonify({'error': 'since 必须是整数游标'}), 400
+        
+        maybe_prune()
+        response = jsonify(collect_changes(user_id, since))
+        response.headers['Cache-Control'] = 'no-store'
+        return response, 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'同步失败: {str(e)}'}), 500
 
 
 # ==================== 统计相关 API ====================
 
+def stats_days(limit=DAILY_DAYS):
+    """
+    统计的时间窗口参数 days（最近 N 天，含今天）
+    
+    Returns:
+        int: 天数，未提供时为 None（全部时间）
+    
+    Raises:
+        ValueError: 不是 1 到 limit 之间的整数
+    """
+    days = request.args.get('days')
+    if days is None or days == '':
+        return None
+    if not days.isdigit() or not 1 <= int(days) <= limit:
+        raise ValueError(f'days 必须是 1 到 {limit} 之间的整数')
+    return int(days)
+
+
 @app.route('/api/stats/words', methods=['GET'])
 @jwt_required()
+@db.replica_reads
 def get_word_stats():
     """获取用户的单词查询统计"""
     try:
         user_id = int(get_jwt_identity())  # 从字符串转回整数
         limit = request.args.get('limit', 50, type=int)
+        days = stats_days()
+        
+        # 最近 N 天：从天桶汇总
+        if days:
+            return jsonify({'stats': window_word_stats(user_id, days, limit), 'days': days}), 200
         
         # 查询用户查询次数最多的单词
         queries = UserWordQuery.query.filter_by(user_id=user_id)\
+            .options(joinedload(UserWordQuery.word))\
             .order_by(UserWordQuery.query_count.desc())\
             .limit(limit)\
             .all()
@@ -824,20 +1175,28 @@ def get_word_stats():
         
         return jsonify({'stats': stats}), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'获取统计失败: {str(e)}'}), 500
 
 
 @app.route('/api/stats/syllables', methods=['GET'])
 @jwt_required()
+@db.replica_reads
 def get_syllable_stats():
     """获取用户的音节查询统计"""
     try:
         user_id = int(get_jwt_identity())  # 从字符串转回整数
         limit = request.args.get('limit', 50, type=int)
+        days = stats_days()
+        
+        if days:
+            return jsonify({'stats': window_syllable_stats(user_id, days, limit), 'days': days}), 200
         
         # 查询用户查询次数最多的音节
         queries = UserSyllableQuery.query.filter_by(user_id=user_id)\
+            .options(joinedload(UserSyllableQuery.syllable))\
             .order_by(UserSyllableQuery.query_count.desc())\
             .limit(limit)\
             .all()
@@ -846,16 +1205,35 @@ def get_syllable_stats():
         
         return jsonify({'stats': stats}), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'获取统计失败: {str(e)}'}), 500
 
 
 @app.route('/api/stats/overview', methods=['GET'])
 @jwt_required()
+@db.replica_reads
 def get_stats_overview():
     """获取用户的统计概览"""
     try:
         user_id = int(get_jwt_identity())  # 从字符串转回整数
+        days = stats_days()
+        
+        # 系统中总单词数、总音节数
+        total_words_in_system = Word.query.count()
+        total_syllables_in_system = Syllable.query.count()
+        
+        # 最近 N 天：从天桶汇总
+        if days:
+            return jsonify({
+                'overview': {
+                    **window_overview(user_id, days),
+                    'total_words_in_system': total_words_in_system,
+                    'total_syllables_in_system': total_syllables_in_system
+                },
+                'days': days
+            }), 200
         
         # 总查询单词数
         total_word_queries = db.session.query(func.sum(UserWordQuery.query_count))\
@@ -871,12 +1249,6 @@ def get_stats_overview():
         # 查询过的不同音节数
         unique_syllables_queried = UserSyllableQuery.query.filter_by(user_id=user_id).count()
         
-        # 系统中总单词数
-        total_words_in_system = Word.query.count()
-        
-        # 系统中总音节数
-        total_syllables_in_system = Syllable.query.count()
-        
         return jsonify({
             'overview': {
                 'total_word_queries': total_word_queries,
@@ -888,13 +1260,93 @@ def get_stats_overview():
             }
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'获取统计概览失败: {str(e)}'}), 500
 
 
+@app.route('/api/stats/trending', methods=['GET'])
+@jwt_required()
+@db.replica_reads
+def get_trending_words():
+    """
+    全站热门单词（最近 TRENDING_WINDOW 秒查询次数最多，流式估计，结果缓存几秒）
+    
+    参数：
+        limit: 返回数量（默认 20，最多 TRENDING_TOP_K）
+    """
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), TRENDING_TOP_K)
+        
+        top = trending_tracker.top(limit)
+        words = {w.id: w for w in Word.query.filter(Word.id.in_([t[0] for t in top])).all()}
+        top = [t for t in top if t[0] in words]  # 已删除的单词
+        fragments = word_fragments([words[word_id] for word_id, _, _ in top])
+        
+        return jsonify({
+            'window': int(TRENDING_WINDOW),
+            'trending': [
+                fragment.extend(score=score, users=users)
+                for fragment, (_, score, users) in zip(fragments, top)
+            ]
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'获取热门单词失败: {str(e)}'}), 500
+
+
+@app.route('/api/stats/activity', methods=['GET'])
+@jwt_required()
+@db.replica_reads
+def get_stats_activity():
+    """
+    查询活跃度曲线（每天或每小时的查询次数，从时间桶汇总）
+    
+    参数：
+        days: 最近 N 天（默认 30）
+        period: day（默认）/ hour（最多 QUERY_ROLLUP_HOURLY_DAYS 天）
+    """
+    try:
+        user_id = int(get_jwt_identity())  # 从字符串转回整数
+        period = request.args.get('period', DAY)
+        if period not in (DAY, HOUR):
+            return jsonify({'error': 'period 只能是 day 或 hour'}), 400
+        days = stats_days(HOURLY_DAYS if period == HOUR else DAILY_DAYS) or 30
+        
+        return jsonify({
+            'period': period,
+            'days': days,
+            'series': activity(user_id, days, period)
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'获取活跃度失败: {str(e)}'}), 500
+
+
 # ==================== NCE 资源代理 ====================
 
 NCE_BASE_URL = 'https://nce.ichochy.com'
+NCE_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+NCE_CACHE_CONTROL = 'public, max-age=86400'  # 缓存24小时
+
+
+@functools.lru_cache(maxsize=int(os.getenv('NCE_LRC_CACHE_SIZE', '256')))
+def fetch_nce_lrc(external_url):
+    """
+    下载 LRC 歌词文件
+    
+    歌词文件小且不会变化，结果按 URL 缓存在进程内；请求失败时抛出异常，不会被缓存。
+    """
+    response = requests.get(external_url, headers=NCE_REQUEST_HEADERS, timeout=30)
+    response.raise_for_status()
+    return response.content
+
 
 # https://nce.ichochy.com/NCE2/01%EF%BC%8DA%20Private%20Conversation.mp3
 @app.route('/api/nce/proxy', methods=['GET'])
@@ -928,47 +1380,121 @@ def nce_proxy():
         
         # 构建外部 URL
         external_url = f"{NCE_BASE_URL}/NCE{book}/{filename}.{file_type}"
-        print(f"[NCE代理] 请求: {external_url}")
+        logger.debug("[NCE代理] 请求: %s", external_url)
         
-        # 请求外部资源
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+        # LRC：进程内缓存内容，ETag 由内容计算，压缩结果按 ETag 缓存
+        if file_type == 'lrc':
+            content = fetch_nce_lrc(external_url)
+            return conditional_response(
+                hashlib.sha1(content).hexdigest(),
+                lambda: Response(content, mimetype='text/plain',
+                                 headers={'Access-Control-Allow-Origin': '*'}),
+                'text/plain',
+                cache_control=NCE_CACHE_CONTROL,
+                vary_auth=False
+            )
         
-        response = requests.get(external_url, headers=headers, timeout=30, stream=True)
+        # 请求外部资源
+        response = requests.get(external_url, headers=NCE_REQUEST_HEADERS, timeout=30, stream=True)
         
         if response.status_code != 200:
-            print(f"[NCE代理] 外部请求失败: {response.status_code}")
+            logger.warning(
+                "[NCE代理] 外部请求失败",
+                extra={'url': external_url, 'status': response.status_code}
+            )
             return jsonify({'error': f'资源加载失败: {response.status_code}'}), response.status_code
         
-        # 设置响应 Content-Type
-        if file_type == 'lrc':
-            content_type = 'text/plain; charset=utf-8'
-        else:
-            content_type = 'audio/mpeg'
-        
-        # 返回代理响应
+        # 返回代理响应（音频已是压缩格式，不再压缩）
         return Response(
             response.content,
             status=200,
             headers={
-                'Content-Type': content_type,
-                'Cache-Control': 'public, max-age=86400',  # 缓存24小时
+                'Content-Type': 'audio/mpeg',
+                'Cache-Control': NCE_CACHE_CONTROL,
                 'Access-Control-Allow-Origin': '*'
             }
         )
         
+    except requests.HTTPError as e:
+        status = e.response.status_code
+        logger.warning("[NCE代理] 外部请求失败", extra={'url': request.full_path, 'status': status})
+        return jsonify({'error': f'资源加载失败: {status}'}), status
+        
     except requests.Timeout:
-        print("[NCE代理] 请求超时")
+        logger.warning("[NCE代理] 请求超时", extra={'url': request.full_path})
         return jsonify({'error': '请求超时'}), 504
     except requests.RequestException as e:
-        print(f"[NCE代理] 请求异常: {e}")
+        logger.warning("[NCE代理] 请求异常: %s", e, extra={'url': request.full_path})
         return jsonify({'error': f'请求失败: {str(e)}'}), 500
     except Exception as e:
-        print(f"[NCE代理] 错误: {e}")
+        logger.exception("[NCE代理] 错误: %s", e)
         return jsonify({'error': f'代理失败: {str(e)}'}), 500
 
 
+# ==================== 性能剖析 ====================
+
+def _profile_access_denied():
+    """校验剖析接口的访问令牌，返回错误响应或 None"""
+    if not request_profiler.enabled:
+        return jsonify({'error': '未开启请求剖析'}), 404
+    if not request_profiler.check_token(request.headers.get('X-Profile-Token')):
+        return jsonify({'error': '无权访问'}), 403
+    return None
+
+
+@app.route('/api/debug/profiles', methods=['GET'])
+def list_profiles():
+    """
+    查看当前 worker 保留的最慢请求剖析列表
+    
+    请求头：
+        X-Profile-Token: 与 PROFILE_TOKEN 一致
+    """
+    denied = _profile_access_denied()
+    if denied:
+        return denied
+    
+    return jsonify({
+        'pid': os.getpid(),
+        'profiles': [record.to_dict() for record in request_profiler.list_records()]
+    }), 200
+
+
+@app.route('/api/debug/profiles/<int:profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    """
+    下载单个请求的剖析结果
+    
+    请求头：
+        X-Profile-Token: 与 PROFILE_TOKEN 一致
+    
+    参数：
+        format: pstats（默认，可用 python -m pstats 或 snakeviz 打开）或 text
+        sort: text 格式的排序字段（默认 cumulative，可选 time/calls/pcalls/name 等 pstats.SortKey 的值）
+    """
+    denied = _profile_access_denied()
+    if denied:
+        return denied
+    
+    record = request_profiler.get_record(profile_id)
+    if not record:
+        return jsonify({'error': '剖析结果不存在（可能已被淘汰或在其他 worker 中）'}), 404
+    
+    if request.args.get('format', 'pstats') == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in SORT_KEYS:
+            return jsonify({'error': f'sort 必须是 {", ".join(sorted(SORT_KEYS))} 之一'}), 400
+        return Response(record.summary_text(sort=sort), mimetype='text/plain; charset=utf-8')
+    
+    return Response(
+        record.pstats_bytes(),
+        mimetype='application/octet-stream',
+        headers={
+            'Content-Disposition': f'attachment; filename=profile-{os.getpid()}-{record.id}.pstats'
+        }
+    )
+
+
 # ==================== 健康检查 ====================
 
 @app.route('/api/health', methods=['GET'])
@@ -980,13 +1506,24 @@ def health_check():
     }), 200
 
 
+@app.route('/api/health/deepseek', methods=['GET'])
+def deepseek_metrics():
+    """
+    DeepSeek 调用的限流状态（当前 worker 进程）
+    
+    返回令牌桶速率、AIMD 并发上限、进行中/排队的请求数、Retry-After 剩余暂停时间
+    以及成功、限流、错误、重试、排队超时的累计次数
+    """
+    return jsonify(deepseek_service.metrics()), 200
+
+
 # ==================== 初始化数据库 ====================
 
 def init_db():
-    """初始化数据库"""
+    """初始化数据库（结构版本与当前模型一致时跳过建表检查，见 startup.py）"""
     with app.app_context():
-        db.create_all()
-        print("数据库初始化完成！")
+        if ensure_schema():
+            logger.info("数据库初始化完成！")
 
 
 if __name__ == '__main__':
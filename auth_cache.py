@@ -0,0 +1,145 @@
+"""
+认证缓存 - 已验证的 JWT 和用户信息的短期缓存
+
+- CachingJWTManager: 同一个令牌在 AUTH_TOKEN_CACHE_TTL 秒内只解码、验签一次，
+  之后直接返回缓存的声明（不会超过令牌本身的过期时间）
+- get_user_dict(): 用户信息（User.to_dict()）缓存 AUTH_USER_CACHE_TTL 秒
+- 修改密码（User.password_hash 变化）时清除该用户的令牌缓存和用户缓存
+
+缓存按 worker 进程保存。其他进程中的缓存最迟在 TTL 到期后失效，
+因此 TTL 应保持较短。
+
+环境变量：
+    AUTH_TOKEN_CACHE_TTL: 令牌缓存时间，秒（默认 60，0 表示关闭）
+    AUTH_USER_CACHE_TTL: 用户信息缓存时间，秒（默认 60，0 表示关闭）
+    AUTH_CACHE_SIZE: 每种缓存的最大条数（默认 10000）
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask_jwt_extended import JWTManager
+from sqlalchemy import event
+
+from models import User
+
+
+class TTLCache:
+    """带过期时间的线程安全 LRU 缓存"""
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, expires_at=None):
+        """expires_at 为绝对时间（time.time()），默认当前时间 + ttl，取两者较小值"""
+        if not self.enabled:
+            return
+        deadline = time.time() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        with self._lock:
+            self._data[key] = (deadline, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate):
+        """删除值满足 predicate 的所有条目"""
+        with self._lock:
+            for key in [key for key, (_, value) in self._data.items() if predicate(value)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_cache_size = int(os.getenv('AUTH_CACHE_SIZE', '10000'))
+token_cache = TTLCache(float(os.getenv('AUTH_TOKEN_CACHE_TTL', '60')), _cache_size)
+user_cache = TTLCache(float(os.getenv('AUTH_USER_CACHE_TTL', '60')), _cache_size)
+
+
+class CachingJWTManager(JWTManager):
+    """缓存验签结果的 JWTManager"""
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        # allow_expired（刷新、调试场景）不走缓存
+        if allow_expired or not token_cache.enabled:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        key = (encoded_token, csrf_value)
+        claims = token_cache.get(key)
+        if claims is None:
+            # 验签失败、过期等异常直接抛出，不缓存
+            claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+            token_cache.put(key, claims, expires_at=claims.get('exp'))
+        # 调用方可能修改声明，返回副本
+        return dict(claims)
+
+
+def get_user_dict(user_id):
+    """
+    返回用户信息字典（User.to_dict()），用户不存在时返回 None
+
+    不存在的用户不缓存。
+    """
+    user_dict = user_cache.get(user_id)
+    if user_dict is None:
+        user = User.query.get(user_id)
+        if user is None:
+            return None
+        user_dict = user.to_dict()
+        user_cache.put(user_id, user_dict)
+    return dict(user_dict)
+
+
+def invalidate_user(user_id):
+    """清除用户的令牌缓存和用户信息缓存"""
+    identity = str(user_id)
+    claim = current_app.config.get('JWT_IDENTITY_CLAIM', 'sub') if current_app else 'sub'
+    user_cache.pop(user_id)
+    token_cache.discard_where(lambda claims: str(claims.get(claim)) == identity)
+
+
+@event.listens_for(User.password_hash, 'set')
+def _password_changed(target, value, oldvalue, initiator):
+    # 新建用户（id 为空）没有可清除的缓存
+    if target.id is not None:
+        invalidate_user(target.id)
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    # flush 时再清除一次，防止修改期间其他请求重新缓存了旧数据
+    invalidate_user(target.id)
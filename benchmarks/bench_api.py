@@ -0,0 +1,385 @@
+"""
+API 基准测试 - 通过 Flask test client 驱动核心接口
+
+对每个场景输出：吞吐量（req/s）、p50/p99 延迟（毫秒）、平均每请求 SQL 语句数、错误数。
+DeepSeek 调用使用本地假实现替代，结果只反映应用自身的开销。
+
+用法：
+    python -m benchmarks.bench_api                              # 默认规模（5万单词）
+    python -m benchmarks.bench_api --words 5000 --users 100     # 小规模快速运行
+    python -m benchmarks.bench_api --save benchmarks/baseline.json
+    python -m benchmarks.bench_api --compare benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# 允许以脚本方式直接运行（python benchmarks/bench_api.py）
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+CODE_CONSONANTS = 'bdfgklmnprstvz'
+CODE_VOWELS = 'aeiou'
+
+
+def letter_code(number):
+    """
+    把序号编码成只含字母的辅音+元音串（0 -> ba，1 -> be，70 -> beba）
+
+    合成的未收录单词不能含数字，否则会被非单词过滤（word_gate.py）的形状检查拒绝
+    """
+    base = len(CODE_CONSONANTS) * len(CODE_VOWELS)
+    pairs = []
+    while True:
+        number, digit = divmod(number, base)
+        consonant, vowel = divmod(digit, len(CODE_VOWELS))
+        pairs.append(CODE_CONSONANTS[consonant] + CODE_VOWELS[vowel])
+        if not number:
+            return ''.join(reversed(pairs))
+
+
+class FakeDeepseek:
+    """DeepSeek 假实现：按固定规则生成单词信息，可选模拟网络延迟"""
+
+    def __init__(self, latency_ms=0):
+        self.latency = latency_ms / 1000.0
+        self.calls = 0
+
+    def get_word_info(self, word):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        syllables = [word[i:i + 3] for i in range(0, len(word), 3)] or [word]
+        return {
+            'word': word,
+            'phonetic': f'/{word}/',
+            'translation': '基准测试',
+            'syllables': syllables,
+            'phonetic_analysis': '-'.join(syllables),
+            'root_affix': '',
+        }
+
+    def syllabify_word(self, word):
+        return self.get_word_info(word)['syllables']
+
+
+class QueryCounter:
+    """统计每个请求执行的 SQL 语句数"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+class BenchContext:
+    """场景运行时共享的状态"""
+
+    def __init__(self, client, seed_info, headers, rng, miss_rate):
+        self.client = client
+        self.seed_info = seed_info
+        self.headers = headers
+        self.rng = rng
+        self.miss_rate = miss_rate
+        self.miss_seq = 0
+        self.word_cum = None
+        self.syllable_cum = None
+
+    def pick_user(self):
+        return self.rng.choice(self.headers)
+
+    def pick_word(self):
+        if self.miss_rate and self.rng.random() < self.miss_rate:
+            self.miss_seq += 1
+            return f'benchmiss{letter_code(self.miss_seq)}'
+        words = self.seed_info['words']
+        return self.rng.choices(words, cum_weights=self.word_cum)[0]
+
+    def pick_syllable(self):
+        syllables = self.seed_info['syllables']
+        return self.rng.choices(syllables, cum_weights=self.syllable_cum)[0]
+
+
+# ==================== 场景定义 ====================
+# 每个场景返回 (method, url, kwargs)，kwargs 直接传给 client.open()
+
+def scenario_lookup_word(ctx):
+    return 'POST', '/api/words/lookup', {
+        'json': {'word': ctx.pick_word()}, 'headers': ctx.pick_user()
+    }
+
+
+def scenario_search_word(ctx):
+    word = ctx.rng.choices(ctx.seed_info['words'], cum_weights=ctx.word_cum)[0]
+    return 'GET', '/api/words/search', {
+        'query_string': {'word': word}, 'headers': ctx.pick_user()
+    }
+
+
+def scenario_query_events(ctx):
+    words = ctx.rng.choices(ctx.seed_info['words'], cum_weights=ctx.word_cum, k=5)
+    return 'POST', '/api/events/query', {
+        'json': {'events': [{'word': word} for word in words]}, 'headers': ctx.pick_user()
+    }
+
+
+def scenario_get_words_by_syllable(ctx):
+    return 'GET', '/api/syllables/words', {
+        'query_string': {'syllable': ctx.pick_syllable()}, 'headers': ctx.pick_user()
+    }
+
+
+def scenario_get_current_user(ctx):
+    return 'GET', '/api/auth/me', {'headers': ctx.pick_user()}
+
+
+def scenario_get_stats_overview(ctx):
+    return 'GET', '/api/stats/overview', {'headers': ctx.pick_user()}
+
+
+def scenario_get_word_stats(ctx):
+    return 'GET', '/api/stats/words', {
+        'query_string': {'limit': 50}, 'headers': ctx.pick_user()
+    }
+
+
+def scenario_list_words(ctx):
+    return 'GET', '/api/words', {
+        'query_string': {'page': ctx.rng.randint(1, 50), 'per_page': 20},
+        'headers': ctx.pick_user()
+    }
+
+
+SCENARIOS = {
+    'lookup_word': scenario_lookup_word,
+    'search_word': scenario_search_word,
+    'query_events': scenario_query_events,
+    'get_words_by_syllable': scenario_get_words_by_syllable,
+    'get_current_user': scenario_get_current_user,
+    'get_stats_overview': scenario_get_stats_overview,
+    'get_word_stats': scenario_get_word_stats,
+    'list_words': scenario_list_words,
+}
+
+
+# ==================== 运行与统计 ====================
+
+def percentile(sorted_values, pct):
+    """最近秩法计算分位数"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(ctx, counter, scenario, requests_count, warmup):
+    """运行单个场景，返回统计结果"""
+    for _ in range(warmup):
+        method, url, kwargs = scenario(ctx)
+        ctx.client.open(url, method=method, **kwargs)
+
+    latencies = []
+    query_counts = []
+    response_bytes = 0
+    errors = 0
+    for _ in range(requests_count):
+        method, url, kwargs = scenario(ctx)
+        counter.count = 0
+        start = time.perf_counter()
+        response = ctx.client.open(url, method=method, **kwargs)
+        latencies.append(time.perf_counter() - start)
+        query_counts.append(counter.count)
+        response_bytes += len(response.get_data())
+        if response.status_code >= 500:
+            errors += 1
+
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        'requests': requests_count,
+        'throughput_rps': round(requests_count / total, 2) if total else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(total / requests_count * 1000, 3) if requests_count else 0.0,
+        'queries_per_request': round(sum(query_counts) / requests_count, 2) if requests_count else 0.0,
+        'bytes_per_request': round(response_bytes / requests_count) if requests_count else 0,
+        'errors': errors,
+    }
+
+
+def load_app(db_path):
+    """
+    在导入 app 之前设置数据库地址，然后导入应用
+
+    Returns:
+        module: app 模块
+    """
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-secret-key-with-enough-length')
+    import app as app_module
+    return app_module
+
+
+def prepare(args):
+    """创建临时数据库、写入合成数据并返回运行上下文"""
+    from sqlalchemy import event
+    from flask_jwt_extended import create_access_token
+
+    db_dir = tempfile.mkdtemp(prefix='word_bench_')
+    db_path = os.path.join(db_dir, 'bench.db')
+    app_module = load_app(db_path)
+
+    from benchmarks.seed import seed_database, zipf_cum_weights
+
+    app_module.deepseek_service = FakeDeepseek(args.deepseek_latency_ms)
+
+    app_module.app.app_context().push()
+    app_module.db.create_all()
+
+    seed_start = time.perf_counter()
+    seed_info = seed_database(
+        word_count=args.words,
+        syllable_count=args.syllables,
+        user_count=args.users,
+        history_per_user=args.history,
+        seed=args.seed,
+    )
+    seed_seconds = time.perf_counter() - seed_start
+
+    counter = QueryCounter()
+    event.listen(app_module.db.engine, 'before_cursor_execute', counter)
+
+    headers = [
+        {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+        for user_id in seed_info['user_ids']
+    ]
+    client = app_module.app.test_client()
+    if args.accept_encoding:
+        client.environ_base['HTTP_ACCEPT_ENCODING'] = args.accept_encoding
+    ctx = BenchContext(
+        client, seed_info, headers,
+        random.Random(args.seed), args.miss_rate
+    )
+    ctx.word_cum = zipf_cum_weights(len(seed_info['words']))
+    ctx.syllable_cum = zipf_cum_weights(len(seed_info['syllables']))
+    return ctx, counter, seed_seconds, db_path
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(baseline, current):
+    """打印与基线的差异"""
+    print()
+    base_args = baseline.get('meta', {}).get('args', {})
+    cur_args = current['meta']['args']
+    changed = [
+        key for key in ('words', 'syllables', 'users', 'history', 'miss_rate', 'seed')
+        if key in base_args and base_args[key] != cur_args.get(key)
+    ]
+    if changed:
+        print(f"警告: 数据规模参数与基线不同（{', '.join(changed)}），结果不可直接比较")
+    print(f"{'场景':<24}{'指标':<22}{'基线':>12}{'当前':>12}{'变化':>10}")
+    print('-' * 80)
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            print(f'{name:<24}(基线中没有该场景)')
+            continue
+        for metric in ('throughput_rps', 'p50_ms', 'p99_ms', 'queries_per_request',
+                       'bytes_per_request'):
+            old, new = base.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            delta = f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+            print(f'{name:<24}{metric:<22}{old:>12}{new:>12}{delta:>10}')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='单词记忆工具 API 基准测试')
+    parser.add_argument('--words', type=int, default=50000, help='合成单词数量')
+    parser.add_argument('--syllables', type=int, default=10000, help='合成音节数量')
+    parser.add_argument('--users', type=int, default=1000, help='合成用户数量')
+    parser.add_argument('--history', type=int, default=200, help='每个用户的平均查询次数')
+    parser.add_argument('--requests', type=int, default=500, help='每个场景的请求数')
+    parser.add_argument('--warmup', type=int, default=20, help='每个场景的预热请求数')
+    parser.add_argument('--miss-rate', type=float, default=0.02,
+                        help='lookup_word 场景中查询新单词（走 AI 添加路径）的比例')
+    parser.add_argument('--deepseek-latency-ms', type=float, default=0,
+                        help='模拟 DeepSeek 调用延迟（毫秒）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--accept-encoding', default='',
+                        help='请求携带的 Accept-Encoding（如 gzip），默认不接受压缩')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help='要运行的场景，逗号分隔')
+    parser.add_argument('--save', help='把结果保存为 JSON 基线文件')
+    parser.add_argument('--compare', help='与指定的 JSON 基线文件对比')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"未知场景: {', '.join(unknown)}")
+        return 1
+
+    print(f'正在生成合成数据: {args.words} 单词 / {args.syllables} 音节 / {args.users} 用户 ...')
+    ctx, counter, seed_seconds, db_path = prepare(args)
+    print(f'数据生成完成，用时 {seed_seconds:.1f}s（{db_path}）')
+    print()
+    print(f"{'场景':<24}{'req/s':>10}{'p50(ms)':>10}{'p99(ms)':>10}{'SQL/req':>10}"
+          f"{'字节/req':>10}{'错误':>6}")
+    print('-' * 80)
+
+    results = {}
+    for name in names:
+        result = run_scenario(ctx, counter, SCENARIOS[name], args.requests, args.warmup)
+        results[name] = result
+        print(f"{name:<24}{result['throughput_rps']:>10}{result['p50_ms']:>10}"
+              f"{result['p99_ms']:>10}{result['queries_per_request']:>10}"
+              f"{result['bytes_per_request']:>10}{result['errors']:>6}")
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed_seconds': round(seed_seconds, 2),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'\n结果已保存到 {args.save}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
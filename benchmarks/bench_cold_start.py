@@ -0,0 +1,239 @@
+"""
+冷启动基准 - 测量部署后到请求变快的时间（time-to-first-fast-request）
+
+每种启动方式都在同一个合成数据库上启动一次 gunicorn（默认 4 个 worker），从启动进程开始计时：
+    - ready: /api/health 第一次返回 200
+    - first_fast: 之后连续 --window 个请求都不超过 --fast-ms 的窗口中第一个请求完成的时间
+客户端用 --concurrency 个线程循环请求依赖进程内缓存的接口（离线词库包、相关单词、单词详情），
+请求分散到所有 worker，冷 worker 的首批请求都会计入。同时统计慢请求数、最慢请求，
+以及 worker 的私有内存（Linux 上读取 /proc/<pid>/smaps_rollup，预加载时共享的页不计入）。
+
+启动方式：
+    cold     每个 worker 各自导入应用，不预热（原来的 gunicorn app:app）
+    warm     每个 worker 各自执行 startup:create_app()，分别预热
+    preload  master 执行一次 create_app() 后 fork，worker 共享预热好的缓存
+
+用法：
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start --words 50000 --modes cold,preload --save cold_start.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.bench_api import percentile  # noqa: E402
+from benchmarks.load_test import free_port  # noqa: E402
+
+JWT_SECRET = 'cold-start-secret-key-with-enough-length'
+
+MODES = {
+    'cold': {'target': 'app:app', 'env': {'GUNICORN_PRELOAD': 'false'}},
+    'warm': {'target': 'startup:create_app()',
+             'env': {'GUNICORN_PRELOAD': 'false', 'STARTUP_WARM': 'true'}},
+    'preload': {'target': 'startup:create_app()',
+                'env': {'GUNICORN_PRELOAD': 'true', 'STARTUP_WARM': 'true'}},
+}
+
+
+def prepare_database(args, db_path):
+    """写入合成数据，返回单词ID列表和一个用户的 token"""
+    os.environ['JWT_SECRET_KEY'] = JWT_SECRET
+    from benchmarks.bench_api import load_app
+    from benchmarks.seed import seed_database
+
+    app_module = load_app(db_path)
+    from flask_jwt_extended import create_access_token
+
+    with app_module.app.app_context():
+        app_module.db.create_all()
+        seed_info = seed_database(
+            word_count=args.words, syllable_count=args.syllables,
+            user_count=args.users, history_per_user=50, seed=args.seed
+        )
+        word_ids = [word_id for (word_id,) in app_module.db.session.query(app_module.Word.id)]
+        token = create_access_token(identity=str(seed_info['user_ids'][0]))
+        app_module.db.engine.dispose()
+    return word_ids, token
+
+
+def worker_memory(master_pid):
+    """worker 进程的私有内存和 PSS（KB），不支持时返回 None"""
+    try:
+        with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+            children = [int(pid) for pid in f.read().split()]
+        private = pss = 0
+        for pid in children:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for line in f:
+                    name, _, value = line.partition(':')
+                    if name in ('Private_Clean', 'Private_Dirty'):
+                        private += int(value.split()[0])
+                    elif name == 'Pss':
+                        pss += int(value.split()[0])
+        return {'workers': len(children), 'private_kb': private, 'pss_kb': pss}
+    except (OSError, ValueError):
+        return None
+
+
+def first_fast(samples, fast_ms, window):
+    """连续 window 个请求都不超过 fast_ms 时，窗口第一个请求的完成时间（秒），没有时为 None"""
+    run = 0
+    for index, (finished, latency_ms, ok) in enumerate(samples):
+        run = run + 1 if ok and latency_ms <= fast_ms else 0
+        if run == window:
+            return samples[index - window + 1][0]
+    return None
+
+
+def run_mode(mode, args, db_path, word_ids, token):
+    port = free_port()
+    env = dict(os.environ)
+    env.update(MODES[mode]['env'])
+    env.update({
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        'JWT_SECRET_KEY': JWT_SECRET,
+        'LOG_LEVEL': 'WARNING',
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'GUNICORN_WORKERS': str(args.workers),
+        'GUNICORN_THREADS': str(args.threads),
+        'DICT_BUNDLE_SIZE': str(args.bundle_size),
+        # 避免后台汇总干扰测量
+        'QUERY_ROLLUP_INTERVAL': '0',
+    })
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', MODES[mode]['target']]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=PROJECT_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        ready = None
+        while time.perf_counter() - start < args.timeout:
+            if process.poll() is not None:
+                raise RuntimeError('gunicorn 启动失败:\n' + process.stderr.read().decode(errors='replace'))
+            try:
+                if requests.get(f'{base_url}/api/health', timeout=1).ok:
+                    ready = time.perf_counter() - start
+                    break
+            except requests.RequestException:
+                time.sleep(0.05)
+        if ready is None:
+            raise RuntimeError('gunicorn 启动超时')
+
+        samples = []
+        lock = threading.Lock()
+        headers = {'Authorization': f'Bearer {token}'}
+
+        def client(index):
+            rng = random.Random(args.seed + index)
+            session = requests.Session()
+            for _ in range(args.requests):
+                word_id = rng.choice(word_ids)
+                path = rng.choice((
+                    '/api/dictionary/bundle',
+                    f'/api/words/{word_id}/related',
+                    f'/api/words/{word_id}',
+                ))
+                sent = time.perf_counter()
+                try:
+                    ok = session.get(base_url + path, headers=headers, timeout=60).ok
+                except requests.RequestException:
+                    ok = False
+                finished = time.perf_counter()
+                with lock:
+                    samples.append((finished - start, (finished - sent) * 1000, ok))
+
+        threads = [threading.Thread(target=client, args=(index,)) for index in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        memory = worker_memory(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    samples.sort()
+    latencies = sorted(latency for _, latency, _ in samples)
+    fast = first_fast(samples, args.fast_ms, args.window)
+    return {
+        'mode': mode,
+        'ready_s': round(ready, 3),
+        'first_fast_s': round(fast, 3) if fast is not None else None,
+        'requests': len(samples),
+        'errors': sum(not ok for _, _, ok in samples),
+        'slow_requests': sum(latency > args.fast_ms for latency in latencies),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else None,
+        'memory': memory,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='冷启动基准（部署后到请求变快的时间）')
+    parser.add_argument('--modes', default='cold,warm,preload', help='逗号分隔：cold / warm / preload')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker 数')
+    parser.add_argument('--threads', type=int, default=4, help='每个 worker 的线程数')
+    parser.add_argument('--concurrency', type=int, default=4, help='客户端线程数')
+    parser.add_argument('--requests', type=int, default=100, help='每个客户端线程的请求数')
+    parser.add_argument('--fast-ms', type=float, default=100, help='“快”请求的延迟上限（毫秒）')
+    parser.add_argument('--window', type=int, default=20, help='连续多少个快请求算作已变快')
+    parser.add_argument('--bundle-size', type=int, default=1000, help='离线词库包单词数')
+    parser.add_argument('--timeout', type=float, default=120, help='等待启动的最长时间（秒）')
+    parser.add_argument('--words', type=int, default=20000)
+    parser.add_argument('--syllables', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', help='把结果保存为 JSON 文件')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        print(f'未知的启动方式: {", ".join(unknown)}', file=sys.stderr)
+        return 2
+
+    db_dir = tempfile.mkdtemp(prefix='word_cold_')
+    db_path = os.path.join(db_dir, 'cold.db')
+    print(f'正在生成合成数据（{db_path}）...')
+    word_ids, token = prepare_database(args, db_path)
+
+    results = []
+    for mode in modes:
+        print(f'启动方式 {mode} ...')
+        results.append(run_mode(mode, args, db_path, word_ids, token))
+
+    print()
+    print(f"{'方式':<10}{'就绪(s)':>10}{'变快(s)':>10}{'慢请求':>8}{'p50(ms)':>10}"
+          f"{'p99(ms)':>10}{'最慢(ms)':>10}{'私有内存(MB)':>14}")
+    for result in results:
+        memory = result['memory']
+        private = f"{memory['private_kb'] / 1024:.1f}" if memory else '-'
+        fast = result['first_fast_s'] if result['first_fast_s'] is not None else '-'
+        print(f"{result['mode']:<10}{result['ready_s']:>10}{fast:>10}{result['slow_requests']:>8}"
+              f"{result['p50_ms']:>10}{result['p99_ms']:>10}{result['max_ms']:>10}{private:>14}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f'\n结果已保存到 {args.save}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+数据库引擎配置写入基准 - 对比 default 与 tuned 配置下的计数器写入吞吐量
+
+模拟 gunicorn 多 worker：每个配置启动 N 个进程，各自建立引擎，
+并发执行“读取单词 → 更新单词计数 → 更新音节计数 → 提交”的事务，
+统计每秒提交数和锁冲突错误数。
+
+用法：
+    python -m benchmarks.bench_engine
+    python -m benchmarks.bench_engine --processes 4 --commits 500
+    python -m benchmarks.bench_engine --profiles default,tuned --save engine.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+WORDS = 200
+USERS = 50
+SYLLABLES_PER_WORD = 3
+
+
+def create_engine_for(db_path, profile):
+    """按与应用相同的方式创建引擎（default 配置下模拟 Flask-SQLAlchemy 的 NullPool）"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import NullPool
+    from db_engine import build_engine_options, activate_sqlite_pragmas
+
+    activate_sqlite_pragmas(profile)
+    options = build_engine_options(f'sqlite:///{db_path}', profile)
+    if 'poolclass' not in options:
+        options['poolclass'] = NullPool
+    return create_engine(f'sqlite:///{db_path}', **options)
+
+
+def prepare_database(db_path, profile):
+    """建表并写入少量单词、音节和计数器行"""
+    from sqlalchemy import text
+    from models import db
+
+    engine = create_engine_for(db_path, profile)
+    db.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(text(
+            'INSERT INTO users (id, username, email, password_hash, created_at, updated_at) '
+            'VALUES (:id, :name, :email, :pw, :now, :now)'
+        ), [{'id': u, 'name': f'u{u}', 'email': f'u{u}@x', 'pw': 'x', 'now': now}
+            for u in range(1, USERS + 1)])
+        conn.execute(text(
+            'INSERT INTO syllables (id, syllable, created_at) VALUES (:id, :s, :now)'
+        ), [{'id': s, 's': f's{s}', 'now': now} for s in range(1, WORDS * SYLLABLES_PER_WORD + 1)])
+        conn.execute(text(
+            'INSERT INTO words (id, word, translation, created_at, updated_at) '
+            'VALUES (:id, :w, :t, :now, :now)'
+        ), [{'id': w, 'w': f'w{w}', 't': '测试', 'now': now} for w in range(1, WORDS + 1)])
+        conn.execute(text(
+            'INSERT INTO word_syllables (word_id, syllable_id, position, created_at) '
+            'VALUES (:w, :s, :p, :now)'
+        ), [{'w': w, 's': (w - 1) * SYLLABLES_PER_WORD + p + 1, 'p': p, 'now': now}
+            for w in range(1, WORDS + 1) for p in range(SYLLABLES_PER_WORD)])
+        conn.execute(text(
+            'INSERT INTO user_word_queries (user_id, word_id, query_count, last_queried_at, created_at) '
+            'VALUES (:u, :w, 0, :now, :now)'
+        ), [{'u': u, 'w': w, 'now': now} for u in range(1, USERS + 1) for w in range(1, WORDS + 1)])
+        conn.execute(text(
+            'INSERT INTO user_syllable_queries (user_id, syllable_id, query_count, last_queried_at, created_at) '
+            'VALUES (:u, :s, 0, :now, :now)'
+        ), [{'u': u, 's': s, 'now': now}
+            for u in range(1, USERS + 1) for s in range(1, WORDS * SYLLABLES_PER_WORD + 1)])
+    engine.dispose()
+
+
+def worker(db_path, profile, commits, seed, barrier, results):
+    """单个“worker 进程”：执行 commits 次计数器写事务"""
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    engine = create_engine_for(db_path, profile)
+    rng = random.Random(seed)
+    errors = 0
+    barrier.wait()
+    start = time.perf_counter()
+    for _ in range(commits):
+        user_id = rng.randint(1, USERS)
+        word_id = rng.randint(1, WORDS)
+        now = datetime.utcnow()
+        try:
+            with engine.begin() as conn:
+                conn.execute(text('SELECT id, word FROM words WHERE id = :w'), {'w': word_id}).fetchone()
+                conn.execute(text(
+                    'UPDATE user_word_queries SET query_count = query_count + 1, last_queried_at = :now '
+                    'WHERE user_id = :u AND word_id = :w'
+                ), {'u': user_id, 'w': word_id, 'now': now})
+                syllable_ids = [row[0] for row in conn.execute(text(
+                    'SELECT syllable_id FROM word_syllables WHERE word_id = :w'
+                ), {'w': word_id})]
+                for syllable_id in syllable_ids:
+                    conn.execute(text(
+                        'UPDATE user_syllable_queries SET query_count = query_count + 1, '
+                        'last_queried_at = :now WHERE user_id = :u AND syllable_id = :s'
+                    ), {'u': user_id, 's': syllable_id, 'now': now})
+        except OperationalError:
+            errors += 1
+    results.put((time.perf_counter() - start, commits - errors, errors))
+    engine.dispose()
+
+
+def run_profile(profile, processes, commits, seed):
+    db_dir = tempfile.mkdtemp(prefix=f'word_engine_{profile}_')
+    db_path = os.path.join(db_dir, 'engine.db')
+    prepare_database(db_path, profile)
+
+    ctx = multiprocessing.get_context('fork')
+    barrier = ctx.Barrier(processes)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(db_path, profile, commits, seed + i, barrier, results))
+        for i in range(processes)
+    ]
+    wall_start = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    outcomes = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    wall = time.perf_counter() - wall_start
+
+    committed = sum(o[1] for o in outcomes)
+    errors = sum(o[2] for o in outcomes)
+    slowest = max(o[0] for o in outcomes)
+    return {
+        'processes': processes,
+        'commits': committed,
+        'errors': errors,
+        'elapsed_s': round(slowest, 3),
+        'wall_s': round(wall, 3),
+        'commits_per_s': round(committed / slowest, 1) if slowest else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='数据库引擎配置写入基准')
+    parser.add_argument('--profiles', default='default,tuned')
+    parser.add_argument('--processes', type=int, default=4, help='并发进程数（模拟 gunicorn worker）')
+    parser.add_argument('--commits', type=int, default=300, help='每个进程的事务数')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', help='把结果保存为 JSON 文件')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    results = {}
+    print(f"{'配置':<10}{'进程':>6}{'提交数':>10}{'错误':>8}{'用时(s)':>10}{'提交/s':>10}")
+    print('-' * 54)
+    for profile in [p.strip() for p in args.profiles.split(',') if p.strip()]:
+        result = run_profile(profile, args.processes, args.commits, args.seed)
+        results[profile] = result
+        print(f"{profile:<10}{result['processes']:>6}{result['commits']:>10}{result['errors']:>8}"
+              f"{result['elapsed_s']:>10}{result['commits_per_s']:>10}")
+
+    if 'default' in results and 'tuned' in results and results['default']['commits_per_s']:
+        gain = results['tuned']['commits_per_s'] / results['default']['commits_per_s']
+        print(f'\ntuned / default 写入吞吐量: {gain:.2f}x')
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.save}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+批量补全基准 - 服务端有容量限制时 DeepSeek 调用的吞吐量和失败率
+
+启动本地 DeepSeek 模拟服务并限制其容量（每秒请求数 + 同时处理的请求数，超出返回 429），
+多个线程用 DeepseekService.get_word_info 批量获取单词信息，对比三种限流配置：
+    fixed       不限速，并发固定为客户端线程数（只有 429 后的退避重试）
+    aimd        不限速，AIMD 自动调整并发上限（不知道服务端限额时的默认情况）
+    aimd_bucket AIMD + 令牌桶速率设为服务端限额
+
+用法：
+    python -m benchmarks.bench_enrichment
+    python -m benchmarks.bench_enrichment --words 600 --threads 32 --capacity-rps 20
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.bench_api import percentile  # noqa: E402
+from benchmarks.deepseek_stub import start_stub  # noqa: E402
+from deepseek_service import DeepseekService  # noqa: E402
+from logging_config import setup_logging  # noqa: E402
+from rate_limiter import AdaptiveRateLimiter  # noqa: E402
+
+
+def make_limiter(name, args):
+    if name == 'fixed':
+        return AdaptiveRateLimiter(rate=0, initial_concurrency=args.threads,
+                                   min_concurrency=args.threads, max_concurrency=args.threads)
+    if name == 'aimd':
+        return AdaptiveRateLimiter(rate=0, max_concurrency=args.threads)
+    return AdaptiveRateLimiter(rate=args.capacity_rps, max_concurrency=args.threads)
+
+
+def run_case(name, args):
+    stub, stats = start_stub(
+        latency_ms=args.latency_ms,
+        capacity_rps=args.capacity_rps,
+        capacity_concurrency=args.capacity_concurrency
+    )
+    os.environ.update({
+        'DEEPSEEK_API_KEY': 'stub',
+        'DEEPSEEK_API_URL': f'http://127.0.0.1:{stub.server_address[1]}/v1/chat/completions',
+        'DEEPSEEK_DEADLINE': str(args.deadline),
+    })
+    service = DeepseekService()
+    service.limiter = make_limiter(name, args)
+
+    words = [f'word{i:05d}' for i in range(args.words)]
+    lock = threading.Lock()
+    latencies, failed = [], [0]
+
+    def worker(index):
+        for word in words[index::args.threads]:
+            start = time.perf_counter()
+            info = service.get_word_info(word)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if info:
+                    latencies.append(elapsed)
+                else:
+                    failed[0] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+    stub.shutdown()
+
+    latencies.sort()
+    metrics = service.metrics()
+    return {
+        'ok': len(latencies),
+        'failed': failed[0],
+        'words_per_s': len(latencies) / duration,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'requests': stats.snapshot()['requests'],
+        'throttled': stats.snapshot()['throttled'],
+        'final_limit': metrics['concurrency_limit'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量补全时的 DeepSeek 限流')
+    parser.add_argument('--words', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=32, help='客户端线程数')
+    parser.add_argument('--latency-ms', type=float, default=100, help='模拟服务的响应延迟')
+    parser.add_argument('--capacity-rps', type=float, default=20, help='模拟服务每秒接受的请求数')
+    parser.add_argument('--capacity-concurrency', type=int, default=8,
+                        help='模拟服务同时处理的请求上限')
+    parser.add_argument('--deadline', type=float, default=20, help='单次调用的截止时间（秒）')
+    args = parser.parse_args(argv)
+    os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+    setup_logging()
+
+    print(f'{args.words} 个单词，{args.threads} 个线程；模拟服务容量 '
+          f'{args.capacity_rps:g} req/s、并发 {args.capacity_concurrency}，延迟 {args.latency_ms:g}ms')
+    print()
+    print(f"{'配置':<13}{'成功':>6}{'失败':>6}{'单词/s':>9}{'p50(ms)':>10}{'p99(ms)':>10}"
+          f"{'API 请求':>10}{'429':>7}{'最终并发':>10}")
+    print('-' * 81)
+    for name in ('fixed', 'aimd', 'aimd_bucket'):
+        r = run_case(name, args)
+        print(f"{name:<13}{r['ok']:>6}{r['failed']:>6}{r['words_per_s']:>9.1f}"
+              f"{r['p50_ms']:>10.0f}{r['p99_ms']:>10.0f}{r['requests']:>10}{r['throttled']:>7}"
+              f"{r['final_limit']:>10}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
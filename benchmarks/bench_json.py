@@ -0,0 +1,113 @@
+"""
+JSON 序列化基准 - 对比 flask.jsonify 与 json_fast 的响应构建开销
+
+使用与 bench_api 相同的合成词库，取若干 50 单词的列表页，分别测量：
+    flask_to_dict     flask.jsonify + 逐个 Word.to_dict()（每个单词查询一次音节）
+    fast_to_dict      json_fast.jsonify + 逐个 Word.to_dict()（只替换序列化后端）
+    fast_fragments    json_fast.jsonify + word_fragments()（缓存的单词片段）
+    flask_dicts       flask.jsonify 序列化预先构建好的字典（只测序列化）
+    fast_dicts        json_fast.jsonify 序列化预先构建好的字典（只测序列化）
+
+用法：
+    python -m benchmarks.bench_json
+    python -m benchmarks.bench_json --words 20000 --pages 50 --rounds 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.bench_api import load_app, percentile  # noqa: E402
+
+
+def measure(build, pages, rounds):
+    """对每一页调用 build(words)，返回每页耗时（秒）列表"""
+    timings = []
+    for _ in range(rounds):
+        for words in pages:
+            start = time.perf_counter()
+            build(words)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='JSON 序列化基准')
+    parser.add_argument('--words', type=int, default=5000, help='合成单词数量')
+    parser.add_argument('--syllables', type=int, default=2000, help='合成音节数量')
+    parser.add_argument('--page-size', type=int, default=50, help='每页单词数')
+    parser.add_argument('--pages', type=int, default=20, help='测量的页数')
+    parser.add_argument('--rounds', type=int, default=5, help='每页重复次数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args(argv)
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='word_json_'), 'bench.db')
+    app_module = load_app(db_path)
+
+    from flask import jsonify as flask_jsonify
+
+    import json_fast
+    from benchmarks.seed import seed_database
+    from models import Word
+
+    app = app_module.app
+    with app.app_context():
+        app_module.db.create_all()
+        seed_database(word_count=args.words, syllable_count=args.syllables,
+                      user_count=1, history_per_user=1, seed=args.seed)
+
+    with app.test_request_context():
+        pages = []
+        for page in range(1, args.pages + 1):
+            pages.append(Word.query.order_by(Word.id)
+                         .offset((page - 1) * args.page_size)
+                         .limit(args.page_size).all())
+
+        prebuilt = {id(words): [word.to_dict() for word in words] for words in pages}
+
+        def envelope(words):
+            return {'words': words, 'total': args.words, 'page': 1,
+                    'per_page': args.page_size, 'pages': 1}
+
+        cases = {
+            'flask_to_dict': lambda words: flask_jsonify(
+                envelope([word.to_dict() for word in words])).get_data(),
+            'fast_to_dict': lambda words: json_fast.jsonify(
+                envelope([word.to_dict() for word in words])).get_data(),
+            'fast_fragments': lambda words: json_fast.jsonify(
+                envelope(json_fast.word_fragments(words))).get_data(),
+            'flask_dicts': lambda words: flask_jsonify(
+                envelope(prebuilt[id(words)])).get_data(),
+            'fast_dicts': lambda words: json_fast.jsonify(
+                envelope(prebuilt[id(words)])).get_data(),
+        }
+
+        # 预热：填充片段缓存和 SQLAlchemy 语句缓存
+        for build in cases.values():
+            build(pages[0])
+        json_fast.word_fragments([word for words in pages for word in words])
+
+        print(f'JSON 后端: {json_fast.BACKEND}，'
+              f'{args.pages} 页 × {args.page_size} 单词 × {args.rounds} 轮')
+        print()
+        print(f"{'方式':<18}{'p50(ms)':>10}{'p99(ms)':>10}{'页/s':>10}{'相对':>8}")
+        print('-' * 56)
+        baseline = None
+        for name, build in cases.items():
+            timings = measure(build, pages, args.rounds)
+            mean = sum(timings) / len(timings)
+            baseline = baseline or mean
+            print(f'{name:<18}{percentile(timings, 50) * 1000:>10.3f}'
+                  f'{percentile(timings, 99) * 1000:>10.3f}'
+                  f'{1 / mean:>10.1f}{baseline / mean:>7.1f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
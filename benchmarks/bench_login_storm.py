@@ -0,0 +1,140 @@
+"""
+登录风暴基准 - 大量并发登录时单词查询的尾延迟
+
+在本地启动 gunicorn（gthread worker），一组线程持续查询单词（GET /api/words/search），
+另一组线程同时不断登录（POST /api/auth/login，每次都要做一次 PBKDF2 校验），
+分三种情况测量查询的 p50/p99：
+    baseline      没有登录请求
+    storm_inline  登录风暴，PASSWORD_HASH_WORKERS=0（在请求线程中计算哈希）
+    storm_pool    登录风暴，哈希交给每个 worker 的进程池（默认配置）
+
+进程池模式下超出排队上限的登录直接返回 503（Retry-After），单独列出。
+
+用法：
+    python -m benchmarks.bench_login_storm
+    python -m benchmarks.bench_login_storm --duration 20 --login-threads 32 --workers 2
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.bench_api import percentile  # noqa: E402
+from benchmarks.load_test import (  # noqa: E402
+    JWT_SECRET, LoadClient, Recorder, free_port, prepare_database, start_gunicorn
+)
+from benchmarks.seed import SHARED_PASSWORD  # noqa: E402
+
+CASES = (
+    ('baseline', False, {}),
+    ('storm_inline', True, {'PASSWORD_HASH_WORKERS': '0'}),
+    ('storm_pool', True, {}),
+)
+
+
+def run_case(args, db_path, tokens, words, user_ids, storm, extra_env):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        'JWT_SECRET_KEY': JWT_SECRET,
+        'LOG_LEVEL': 'WARNING',
+    })
+    env.update(extra_env)
+    port = free_port()
+    server = start_gunicorn(port, args.workers, env, threads=args.threads)
+
+    recorder = Recorder()
+    client = LoadClient(f'http://127.0.0.1:{port}', recorder)
+    stop = threading.Event()
+
+    def lookup_loop(index):
+        rng = random.Random(args.seed + index)
+        token = tokens[user_ids[index % len(user_ids)]]
+        while not stop.is_set():
+            client.call('search_word', 'GET', '/api/words/search', token,
+                        params={'word': rng.choice(words)})
+
+    def login_loop(index):
+        rng = random.Random(args.seed * 31 + index)
+        while not stop.is_set():
+            user_id = rng.choice(user_ids)
+            client.call('login', 'POST', '/api/auth/login', None, json={
+                'username': f'bench_user_{user_id}', 'password': SHARED_PASSWORD
+            })
+
+    threads = [threading.Thread(target=lookup_loop, args=(i,), daemon=True)
+               for i in range(args.lookup_threads)]
+    if storm:
+        threads += [threading.Thread(target=login_loop, args=(i,), daemon=True)
+                    for i in range(args.login_threads)]
+    try:
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    results = {}
+    for name, samples in recorder.samples.items():
+        latencies = sorted(latency for latency, _ in samples)
+        results[name] = {
+            'requests': len(samples),
+            'ok': sum(1 for _, status in samples if status == 200),
+            'busy': sum(1 for _, status in samples if status == 503),
+            'errors': sum(1 for _, status in samples
+                          if status is None or (status >= 400 and status != 503)),
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'rps': len(samples) / args.duration,
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='登录风暴下的查询延迟')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker 数')
+    parser.add_argument('--threads', type=int, default=4, help='每个 worker 的线程数')
+    parser.add_argument('--lookup-threads', type=int, default=4, help='查询客户端线程数')
+    parser.add_argument('--login-threads', type=int, default=16, help='登录客户端线程数')
+    parser.add_argument('--duration', type=float, default=10, help='每种情况的持续时间（秒）')
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--syllables', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='word_login_'), 'bench.db')
+    print(f'正在生成合成数据（{db_path}）...')
+    seed_info, tokens = prepare_database(args, db_path)
+    words = seed_info['words'][:500]
+    user_ids = seed_info['user_ids']
+
+    print(f'gunicorn {args.workers} workers × {args.threads} threads，'
+          f'查询线程 {args.lookup_threads}，登录线程 {args.login_threads}，每种情况 {args.duration:g}s')
+    print()
+    print(f"{'情况':<14}{'查询 req/s':>12}{'p50(ms)':>10}{'p99(ms)':>10}"
+          f"{'登录成功/s':>12}{'登录 503':>10}{'错误':>6}")
+    print('-' * 74)
+    for name, storm, extra_env in CASES:
+        results = run_case(args, db_path, tokens, words, user_ids, storm, extra_env)
+        lookup = results['search_word']
+        login = results.get('login', {'ok': 0, 'busy': 0, 'errors': 0})
+        print(f"{name:<14}{lookup['rps']:>12.1f}{lookup['p50_ms']:>10.1f}{lookup['p99_ms']:>10.1f}"
+              f"{login['ok'] / args.duration:>12.1f}{login['busy']:>10}"
+              f"{lookup['errors'] + login['errors']:>6}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+本地 DeepSeek 模拟服务 - 兼容 /v1/chat/completions 接口
+
+用于压测时替代真实的 DeepSeek API，可以模拟网络延迟、限流（429）和服务端错误（5xx）。
+限流有两种：按比例随机返回 429（--throttle-rate），或模拟服务端容量
+（--capacity-rps / --capacity-concurrency，超出时返回 429 和 Retry-After）。
+
+用法：
+    python -m benchmarks.deepseek_stub --port 18080 --latency-ms 300
+    # 然后启动后端时设置：
+    # DEEPSEEK_API_KEY=stub DEEPSEEK_API_URL=http://127.0.0.1:18080/v1/chat/completions
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORD_PATTERN = re.compile(r'"([^"]+)"')
+
+
+def _fake_word_info(word):
+    syllables = [word[i:i + 3] for i in range(0, len(word), 3)] or [word]
+    return {
+        'phonetic': f'/{word}/',
+        'translation': '模拟翻译',
+        'syllables': ' '.join(syllables),
+        'phonetic_analysis': '-'.join(syllables),
+        'root_affix': '',
+    }
+
+
+class StubStats:
+    """请求计数（线程安全）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.failed = 0
+        self.active = 0
+
+    def snapshot(self):
+        with self.lock:
+            return {'requests': self.requests, 'throttled': self.throttled, 'failed': self.failed}
+
+
+class Capacity:
+    """模拟服务端容量：每秒请求数（令牌桶，突发 1 秒）和同时处理的请求数"""
+
+    def __init__(self, rps=0.0, concurrency=0):
+        self.rps = rps
+        self.concurrency = concurrency
+        self.tokens = rps
+        self.refilled_at = time.monotonic()
+
+    def admit(self, stats):
+        """在 stats.lock 中调用，返回是否接受请求"""
+        if self.concurrency and stats.active >= self.concurrency:
+            return False
+        if self.rps:
+            now = time.monotonic()
+            self.tokens = min(self.rps, self.tokens + (now - self.refilled_at) * self.rps)
+            self.refilled_at = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+        return True
+
+
+def make_handler(latency_ms, throttle_rate, error_rate, stats, capacity=None):
+    """创建请求处理类，参数通过闭包传入"""
+
+    class DeepseekStubHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+
+            with stats.lock:
+                stats.requests += 1
+                admitted = capacity is None or capacity.admit(stats)
+                if admitted:
+                    stats.active += 1
+                else:
+                    stats.throttled += 1
+            if not admitted:
+                self._send_json(429, {'error': 'rate limited'}, {'Retry-After': '1'})
+                return
+            try:
+                self._respond(payload)
+            finally:
+                with stats.lock:
+                    stats.active -= 1
+
+        def _respond(self, payload):
+            if latency_ms:
+                time.sleep(random.uniform(0.5, 1.5) * latency_ms / 1000.0)
+
+            roll = random.random()
+            if roll < throttle_rate:
+                with stats.lock:
+                    stats.throttled += 1
+                self._send_json(429, {'error': 'rate limited'}, {'Retry-After': '1'})
+                return
+            if roll < throttle_rate + error_rate:
+                with stats.lock:
+                    stats.failed += 1
+                self._send_json(503, {'error': 'service unavailable'})
+                return
+
+            prompt = payload.get('messages', [{}])[0].get('content', '')
+            match = WORD_PATTERN.search(prompt)
+            word = match.group(1) if match else 'unknown'
+
+            if 'JSON' in prompt:
+                content = json.dumps(_fake_word_info(word), ensure_ascii=False)
+            else:
+                content = _fake_word_info(word)['syllables']
+
+            self._send_json(200, {
+                'choices': [{'message': {'role': 'assistant', 'content': content}}]
+            })
+
+    return DeepseekStubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    # 默认的 listen 队列只有 5，大量并发连接时会被重置
+    request_queue_size = 128
+
+
+def start_stub(port=0, latency_ms=0, throttle_rate=0.0, error_rate=0.0,
+               capacity_rps=0.0, capacity_concurrency=0):
+    """
+    在后台线程中启动模拟服务
+
+    capacity_rps / capacity_concurrency 不为 0 时模拟服务端容量，超出时返回 429
+
+    Returns:
+        tuple: (server, stats)，server.server_address[1] 为实际端口
+    """
+    stats = StubStats()
+    capacity = None
+    if capacity_rps or capacity_concurrency:
+        capacity = Capacity(capacity_rps, capacity_concurrency)
+    handler = make_handler(latency_ms, throttle_rate, error_rate, stats, capacity)
+    server = StubServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地 DeepSeek 模拟服务')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='返回 429 的比例')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 503 的比例')
+    parser.add_argument('--capacity-rps', type=float, default=0, help='每秒最多接受的请求数')
+    parser.add_argument('--capacity-concurrency', type=int, default=0, help='同时处理的请求上限')
+    args = parser.parse_args()
+
+    server, stats = start_stub(args.port, args.latency_ms, args.throttle_rate, args.error_rate,
+                               args.capacity_rps, args.capacity_concurrency)
+    print(f'DeepSeek 模拟服务已启动: http://127.0.0.1:{server.server_address[1]}/v1/chat/completions')
+    try:
+        while True:
+            time.sleep(10)
+            print(stats.snapshot())
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,409 @@
+"""
+并发压测 - 在本地启动 gunicorn 多进程服务，回放 NCE 阅读会话并检查计数器正确性
+
+流程：
+    1. 创建临时 SQLite 数据库并写入合成词库（benchmarks/seed.py）
+    2. 启动本地 DeepSeek 模拟服务（benchmarks/deepseek_stub.py）
+    3. 启动 gunicorn（默认 4 个 worker），指向临时数据库和模拟服务
+    4. 多线程并发回放阅读会话：打开统计 → 逐句阅读并查词 → 偶尔浏览音节 → 查看统计
+    5. 争用测试：同一用户并发查询同一单词 N 次，对比预期与实际存储的 query_count
+
+用法：
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --workers 4 --concurrency 32 --sessions 200
+    python -m benchmarks.load_test --contention 100 --save load.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.bench_api import letter_code, percentile  # noqa: E402
+from benchmarks.deepseek_stub import start_stub  # noqa: E402
+
+NCE_DATA_PATH = os.path.join(PROJECT_DIR, 'word-next', 'public', 'nec_data.json')
+JWT_SECRET = 'load-test-secret-key-with-enough-length'
+
+
+def load_nce_vocabulary():
+    """从 NCE 课程标题中提取单词，作为“阅读时查词”的真实词汇来源"""
+    try:
+        with open(NCE_DATA_PATH, encoding='utf-8') as f:
+            books = json.load(f)
+    except (OSError, ValueError):
+        return []
+    words = set()
+    for lessons in books.values():
+        for lesson in lessons:
+            for token in re.findall(r"[A-Za-z]+", lesson.get('title', '')):
+                if len(token) > 2:
+                    words.add(token.lower())
+    return sorted(words)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Recorder:
+    """线程安全地记录每个请求的延迟和状态码"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, name, latency, status):
+        with self.lock:
+            self.samples.setdefault(name, []).append((latency, status))
+
+    def summary(self, elapsed):
+        endpoints = {}
+        total = errors = 0
+        for name, samples in sorted(self.samples.items()):
+            latencies = sorted(s[0] for s in samples)
+            failed = sum(1 for s in samples if s[1] is None or s[1] >= 500)
+            total += len(samples)
+            errors += failed
+            endpoints[name] = {
+                'requests': len(samples),
+                'errors': failed,
+                'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            }
+        return {
+            'requests': total,
+            'errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0.0,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+            'elapsed_s': round(elapsed, 2),
+            'endpoints': endpoints,
+        }
+
+
+class LoadClient:
+    """每个线程持有一个 requests.Session，复用 keep-alive 连接"""
+
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.local = threading.local()
+
+    def _session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def call(self, name, method, path, token, **kwargs):
+        headers = {'Authorization': f'Bearer {token}'}
+        start = time.perf_counter()
+        try:
+            response = self._session().request(
+                method, self.base_url + path, headers=headers, timeout=60, **kwargs
+            )
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, None
+        self.recorder.add(name, time.perf_counter() - start, status)
+        return response
+
+
+def reading_session(client, rng, token, dictionary_words, nce_words, sentences):
+    """
+    回放一次 NCE 阅读会话
+
+    打开统计页 → 逐句阅读，每句查 0~2 个词（NCE 课文词汇和词库常用词混合）
+    → 偶尔点开音节浏览或搜索 → 结束时查看单词/音节统计
+    """
+    client.call('stats_overview', 'GET', '/api/stats/overview', token)
+    for _ in range(sentences):
+        for _ in range(rng.choice((0, 1, 1, 2))):
+            pool = nce_words if nce_words and rng.random() < 0.3 else dictionary_words
+            word = rng.choice(pool[:2000])
+            response = client.call('lookup_word', 'POST', '/api/words/lookup', token,
+                                   json={'word': word})
+            if response is None or response.status_code >= 400:
+                continue
+            syllables = (response.json().get('word') or {}).get('syllables') or []
+            if syllables and rng.random() < 0.15:
+                client.call('words_by_syllable', 'GET', '/api/syllables/words', token,
+                            params={'syllable': rng.choice(syllables)})
+            elif rng.random() < 0.1:
+                client.call('search_word', 'GET', '/api/words/search', token,
+                            params={'word': word})
+                # 与前端一致：搜索是只读的，查看次数通过事件接口异步上报
+                client.call('query_events', 'POST', '/api/events/query', token,
+                            json={'events': [{'word': word}]})
+    client.call('stats_words', 'GET', '/api/stats/words', token, params={'limit': 10})
+    client.call('stats_syllables', 'GET', '/api/stats/syllables', token, params={'limit': 10})
+
+
+def read_counters(db_path, user_id, word):
+    """直接读取 SQLite 文件中的计数器"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        row = conn.execute(
+            'SELECT w.id, uwq.query_count FROM words w '
+            'LEFT JOIN user_word_queries uwq ON uwq.word_id = w.id AND uwq.user_id = ? '
+            'WHERE w.word = ?', (user_id, word)
+        ).fetchone()
+        if not row:
+            return None, 0, {}
+        word_id, word_count = row
+        syllable_rows = conn.execute(
+            'SELECT ws.syllable_id, COALESCE(usq.query_count, 0) FROM word_syllables ws '
+            'LEFT JOIN user_syllable_queries usq '
+            'ON usq.syllable_id = ws.syllable_id AND usq.user_id = ? '
+            'WHERE ws.word_id = ?', (user_id, word_id)
+        ).fetchall()
+        occurrences = {}
+        syllable_counts = {}
+        for syllable_id, count in syllable_rows:
+            occurrences[syllable_id] = occurrences.get(syllable_id, 0) + 1
+            syllable_counts[syllable_id] = count
+        return word_id, word_count or 0, {
+            sid: (syllable_counts[sid], occurrences[sid]) for sid in syllable_counts
+        }
+    finally:
+        conn.close()
+
+
+def contention_test(client, db_path, token, user_id, word, lookups):
+    """
+    同一用户并发查询同一单词 lookups 次，检查计数器是否丢失更新
+
+    Returns:
+        dict: 预期值、实际值以及是否通过（correct；失败原因在 problems 中）
+    """
+    _, word_before, syllables_before = read_counters(db_path, user_id, word)
+    barrier = threading.Barrier(lookups)
+
+    def fire(_):
+        barrier.wait()
+        response = client.call('contention_lookup', 'POST', '/api/words/lookup', token,
+                               json={'word': word})
+        return response is not None and response.status_code < 400
+
+    with ThreadPoolExecutor(max_workers=lookups) as pool:
+        succeeded = sum(pool.map(fire, range(lookups)))
+
+    word_id, word_after, syllables_after = read_counters(db_path, user_id, word)
+    # 新单词的第一次成功查询走 AI 添加路径，不记录查询次数
+    created = not syllables_before and word_id is not None
+    recorded = succeeded - 1 if created and succeeded else succeeded
+    expected_word = word_before + recorded
+    syllable_mismatches = {}
+    for sid, (count, occurrences) in syllables_after.items():
+        before = syllables_before.get(sid, (0, occurrences))[0]
+        expected = before + recorded * occurrences
+        if count != expected:
+            syllable_mismatches[sid] = {'expected': expected, 'stored': count}
+
+    # 全部失败时计数不变，计数一致不能说明正确
+    problems = []
+    if not succeeded:
+        problems.append('所有查询都失败')
+    elif succeeded < lookups:
+        problems.append(f'{lookups - succeeded} 次查询失败')
+    if word_after != expected_word:
+        problems.append('查询次数不一致')
+    if syllable_mismatches:
+        problems.append('音节计数不一致')
+
+    return {
+        'word': word,
+        'lookups': lookups,
+        'succeeded': succeeded,
+        'failed': lookups - succeeded,
+        'word_created': created,
+        'expected_query_count': expected_word,
+        'stored_query_count': word_after,
+        'word_count_correct': word_after == expected_word,
+        'syllable_mismatches': syllable_mismatches,
+        'correct': not problems,
+        'problems': problems,
+    }
+
+
+def start_gunicorn(port, workers, env, threads=1):
+    command = [
+        sys.executable, '-m', 'gunicorn', '-w', str(workers), '--threads', str(threads),
+        '-b', f'127.0.0.1:{port}', '--timeout', '120', 'app:app'
+    ]
+    process = subprocess.Popen(
+        command, cwd=PROJECT_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn 启动失败:\n' + process.stderr.read().decode(errors='replace'))
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/api/health', timeout=1).ok:
+                return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn 启动超时')
+
+
+def prepare_database(args, db_path):
+    """写入合成数据，并为会话用户签发 token"""
+    os.environ['JWT_SECRET_KEY'] = JWT_SECRET
+    from benchmarks.bench_api import load_app
+    from benchmarks.seed import seed_database
+
+    app_module = load_app(db_path)
+    from flask_jwt_extended import create_access_token
+
+    with app_module.app.app_context():
+        app_module.db.create_all()
+        seed_info = seed_database(
+            word_count=args.words, syllable_count=args.syllables,
+            user_count=args.users, history_per_user=50, seed=args.seed
+        )
+        tokens = {
+            user_id: create_access_token(identity=str(user_id))
+            for user_id in seed_info['user_ids']
+        }
+        app_module.db.engine.dispose()
+    return seed_info, tokens
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='单词记忆工具并发压测')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker 数')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发会话数（客户端线程数）')
+    parser.add_argument('--sessions', type=int, default=100, help='阅读会话总数')
+    parser.add_argument('--sentences', type=int, default=20, help='每个会话阅读的句子数')
+    parser.add_argument('--contention', type=int, default=50,
+                        help='争用测试中并发查询同一单词的次数（0 表示跳过）')
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--syllables', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--deepseek-latency-ms', type=float, default=200)
+    parser.add_argument('--deepseek-throttle-rate', type=float, default=0.0)
+    parser.add_argument('--deepseek-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', help='把结果保存为 JSON 文件')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+
+    db_dir = tempfile.mkdtemp(prefix='word_load_')
+    db_path = os.path.join(db_dir, 'load.db')
+    print(f'正在生成合成数据（{db_path}）...')
+    seed_info, tokens = prepare_database(args, db_path)
+
+    stub, stub_stats = start_stub(
+        latency_ms=args.deepseek_latency_ms,
+        throttle_rate=args.deepseek_throttle_rate,
+        error_rate=args.deepseek_error_rate,
+    )
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        'JWT_SECRET_KEY': JWT_SECRET,
+        'DEEPSEEK_API_KEY': 'stub',
+        'DEEPSEEK_API_URL': f'http://127.0.0.1:{stub.server_address[1]}/v1/chat/completions',
+        'LOG_LEVEL': 'WARNING',
+    })
+    print(f'正在启动 gunicorn（{args.workers} workers, 端口 {port}）...')
+    server = start_gunicorn(port, args.workers, env)
+
+    recorder = Recorder()
+    client = LoadClient(f'http://127.0.0.1:{port}', recorder)
+    nce_words = load_nce_vocabulary()
+    user_ids = seed_info['user_ids']
+
+    try:
+        print(f'回放 {args.sessions} 个阅读会话，并发 {args.concurrency} ...')
+        session_rngs = [random.Random(rng.random()) for _ in range(args.sessions)]
+
+        def run(index):
+            session_rng = session_rngs[index]
+            user_id = session_rng.choice(user_ids)
+            reading_session(client, session_rng, tokens[user_id], seed_info['words'],
+                            nce_words, args.sentences)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(run, range(args.sessions)))
+        load_summary = recorder.summary(time.perf_counter() - start)
+
+        contention = []
+        if args.contention:
+            print(f'争用测试：同一用户并发查询同一单词 {args.contention} 次 ...')
+            user_id = user_ids[-1]
+            # 已存在的单词：检验计数器递增是否丢失
+            contention.append(contention_test(
+                client, db_path, tokens[user_id], user_id,
+                seed_info['words'][0], args.contention
+            ))
+            # 新单词：检验并发 AI 添加时的唯一约束冲突
+            contention.append(contention_test(
+                client, db_path, tokens[user_id], user_id,
+                f'contentionword{letter_code(rng.randint(0, 10 ** 6))}', args.contention
+            ))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        stub.shutdown()
+
+    print()
+    print(f"总请求 {load_summary['requests']}，吞吐量 {load_summary['throughput_rps']} req/s，"
+          f"错误率 {load_summary['error_rate'] * 100:.2f}%")
+    print(f"{'接口':<20}{'请求数':>8}{'错误':>8}{'p50(ms)':>10}{'p99(ms)':>10}")
+    for name, stats in load_summary['endpoints'].items():
+        print(f"{name:<20}{stats['requests']:>8}{stats['errors']:>8}"
+              f"{stats['p50_ms']:>10}{stats['p99_ms']:>10}")
+    print(f'DeepSeek 模拟服务: {stub_stats.snapshot()}')
+
+    all_correct = True
+    for result in contention:
+        ok = result['correct']
+        all_correct = all_correct and ok
+        print()
+        print(f"争用测试 [{result['word']}] "
+              f"{'✓ 计数正确' if ok else '✗ ' + '，'.join(result['problems'])}")
+        print(f"  成功 {result['succeeded']} / 失败 {result['failed']}，"
+              f"预期 query_count={result['expected_query_count']}，"
+              f"实际 {result['stored_query_count']}")
+        if result['syllable_mismatches']:
+            print(f"  音节计数不一致: {result['syllable_mismatches']}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                'args': vars(args),
+                'load': load_summary,
+                'deepseek_stub': stub_stats.snapshot(),
+                'contention': contention,
+            }, f, ensure_ascii=False, indent=2)
+        print(f'\n结果已保存到 {args.save}')
+
+    return 0 if all_correct else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
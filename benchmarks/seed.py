@@ -0,0 +1,193 @@
+"""
+基准测试数据生成 - 向数据库批量写入可复现的合成词库
+
+生成内容：
+    - syllables: 合成音节（辅音 + 元音 + 可选尾辅音）
+    - words: 由 1~4 个音节拼接而成的合成单词，音节按 Zipf 分布选取
+    - word_syllables: 有序的单词-音节关联（同时写入 words.syllable_list）
+    - users: 合成用户（共用同一个预先计算好的密码哈希，避免逐个计算 PBKDF2）
+    - user_word_queries / user_syllable_queries: 按 Zipf 分布生成的查询历史
+
+同一个 seed 生成的数据完全一致，便于不同版本之间对比基准结果。
+"""
+import itertools
+import random
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from models import (
+    db, User, Word, Syllable, WordSyllable, UserWordQuery, UserSyllableQuery, encode_syllables
+)
+
+ONSETS = ['', 'b', 'c', 'd', 'f', 'g', 'h', 'j', 'k', 'l', 'm', 'n', 'p', 'qu', 'r', 's',
+          't', 'v', 'w', 'x', 'y', 'z', 'bl', 'br', 'ch', 'cl', 'cr', 'dr', 'fl', 'fr',
+          'gl', 'gr', 'ph', 'pl', 'pr', 'sc', 'sh', 'sk', 'sl', 'sm', 'sn', 'sp', 'st',
+          'str', 'sw', 'th', 'tr', 'tw', 'wh']
+NUCLEI = ['a', 'e', 'i', 'o', 'u', 'y', 'ai', 'ea', 'ee', 'ie', 'oa', 'oo', 'ou', 'ar',
+          'er', 'ir', 'or', 'ur']
+CODAS = ['', 'b', 'ck', 'd', 'ft', 'g', 'l', 'ld', 'm', 'mp', 'n', 'nd', 'ng', 'nk',
+         'nt', 'p', 'r', 's', 'sh', 'st', 't', 'tion', 'x']
+HANZI = ('的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工'
+         '也能下过子说产种面而方后多定行学法所民得经之进着等部度家电力里如水化高自理起小物现实'
+         '加量都体制机当使点从业本去把性好应开它合还因由其些然前外天政那社义事平形相全表间样与'
+         '关各重新线内数正心反你明看原又么利比或但质气向道命此变条只没结解问意建月公无系谈话')
+
+SHARED_PASSWORD = 'benchmark'
+BATCH_SIZE = 5000
+
+
+def zipf_cum_weights(n, s=1.07):
+    """返回长度为 n 的 Zipf 分布累计权重，供 random.choices(cum_weights=...) 使用"""
+    cum = []
+    total = 0.0
+    for rank in range(1, n + 1):
+        total += 1.0 / (rank ** s)
+        cum.append(total)
+    return cum
+
+
+def _bulk_insert(table, rows):
+    """分批执行 executemany，绕过 ORM 单行插入开销"""
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(table.insert(), rows[start:start + BATCH_SIZE])
+
+
+def _generate_syllables(rng, count):
+    candidates = [o + n + c for o, n, c in itertools.product(ONSETS, NUCLEI, CODAS)]
+    candidates = sorted(set(candidates))
+    rng.shuffle(candidates)
+    if count > len(candidates):
+        raise ValueError(f'最多只能生成 {len(candidates)} 个音节')
+    return candidates[:count]
+
+
+def _random_translation(rng):
+    return '，'.join(
+        ''.join(rng.choice(HANZI) for _ in range(rng.randint(2, 4)))
+        for _ in range(rng.randint(1, 3))
+    )
+
+
+def seed_database(word_count=50000, syllable_count=10000, user_count=1000,
+                  history_per_user=200, seed=42):
+    """
+    生成合成数据并写入当前应用上下文绑定的数据库
+
+    需要在 app.app_context() 中调用，数据库应为空库。
+
+    Args:
+        word_count: 单词数量
+        syllable_count: 音节数量
+        user_count: 用户数量
+        history_per_user: 每个用户的平均查询次数（按 Zipf 分布分配到单词上）
+        seed: 随机种子
+
+    Returns:
+        dict: {
+            'words': [单词文本，按流行度从高到低排列],
+            'word_syllables': {word_id: [syllable_id, ...]},
+            'syllables': [音节文本，按流行度从高到低排列],
+            'user_ids': [用户ID],
+        }
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    syllables = _generate_syllables(rng, syllable_count)
+    syllable_cum = zipf_cum_weights(len(syllables))
+    syllable_rows = [
+        {'id': i + 1, 'syllable': text, 'created_at': now}
+        for i, text in enumerate(syllables)
+    ]
+    _bulk_insert(Syllable.__table__, syllable_rows)
+
+    word_rows = []
+    link_rows = []
+    word_syllables = {}
+    seen = set()
+    word_id = 0
+    while word_id < word_count:
+        picked = rng.choices(range(len(syllables)), cum_weights=syllable_cum,
+                             k=rng.choice((1, 2, 2, 3, 3, 3, 4)))
+        text = ''.join(syllables[i] for i in picked)
+        if text in seen or len(text) > 100:
+            continue
+        seen.add(text)
+        word_id += 1
+        created_at = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        word_rows.append({
+            'id': word_id,
+            'word': text,
+            'translation': _random_translation(rng),
+            'phonetic': '/' + text + '/',
+            'phonetic_analysis': '-'.join(syllables[i] for i in picked),
+            'root_affix': '',
+            'syllable_list': encode_syllables(syllables[i] for i in picked),
+            'created_at': created_at,
+            'updated_at': created_at,
+        })
+        word_syllables[word_id] = []
+        for position, index in enumerate(picked):
+            link_rows.append({
+                'word_id': word_id,
+                'syllable_id': index + 1,
+                'position': position,
+                'created_at': created_at,
+            })
+            word_syllables[word_id].append(index + 1)
+    _bulk_insert(Word.__table__, word_rows)
+    _bulk_insert(WordSyllable.__table__, link_rows)
+
+    password_hash = generate_password_hash(SHARED_PASSWORD)
+    user_rows = [
+        {
+            'id': i + 1,
+            'username': f'bench_user_{i + 1}',
+            'email': f'bench_user_{i + 1}@example.com',
+            'password_hash': password_hash,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for i in range(user_count)
+    ]
+    _bulk_insert(User.__table__, user_rows)
+
+    # 单词流行度：打乱后的排名服从 Zipf 分布
+    popularity = list(range(1, word_count + 1))
+    rng.shuffle(popularity)
+    word_cum = zipf_cum_weights(word_count)
+
+    word_query_rows = []
+    syllable_query_rows = []
+    for user_id in range(1, user_count + 1):
+        history = rng.choices(popularity, cum_weights=word_cum,
+                              k=max(1, int(rng.expovariate(1.0 / history_per_user))))
+        word_counts = {}
+        for wid in history:
+            word_counts[wid] = word_counts.get(wid, 0) + 1
+        syllable_counts = {}
+        for wid, count in word_counts.items():
+            for sid in word_syllables[wid]:
+                syllable_counts[sid] = syllable_counts.get(sid, 0) + count
+            word_query_rows.append({
+                'user_id': user_id, 'word_id': wid, 'query_count': count,
+                'last_queried_at': now, 'created_at': now,
+            })
+        for sid, count in syllable_counts.items():
+            syllable_query_rows.append({
+                'user_id': user_id, 'syllable_id': sid, 'query_count': count,
+                'last_queried_at': now, 'created_at': now,
+            })
+    _bulk_insert(UserWordQuery.__table__, word_query_rows)
+    _bulk_insert(UserSyllableQuery.__table__, syllable_query_rows)
+
+    db.session.commit()
+
+    word_text_by_id = {row['id']: row['word'] for row in word_rows}
+    return {
+        'words': [word_text_by_id[wid] for wid in popularity],
+        'word_syllables': word_syllables,
+        'syllables': syllables,
+        'user_ids': list(range(1, user_count + 1)),
+    }
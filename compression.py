@@ -0,0 +1,218 @@
+"""
+响应压缩 - gzip / brotli
+
+在 after_request 中按 Accept-Encoding 压缩文本类响应（JSON、LRC 等）：
+    - 小于 COMPRESS_MIN_SIZE 的响应不压缩（压缩收益小于开销）
+    - 音频（audio/mpeg 等已压缩格式）、流式响应、已有 Content-Encoding 的响应不处理
+    - 安装了 brotli（或 brotlicffi）时优先使用 br，否则使用 gzip
+    - 可压缩类型的响应都带 Vary: Accept-Encoding，代理按编码分别缓存
+
+ETag：压缩后的响应使用带编码后缀的强 ETag（"<etag>-gzip"），
+与未压缩版本区分；http_cache 处理 If-None-Match 时会识别这些变体。
+
+预压缩缓存：带 ETag 的响应（单词详情、音节单词列表、NCE 歌词等）内容由 ETag 唯一确定，
+压缩结果按 (ETag, 编码) 缓存，同一个热门列表页或 LRC 文件不会每次请求都重新压缩；
+http_cache.conditional_json 命中缓存时连响应体的构建和序列化也一并跳过。
+
+环境变量：
+    COMPRESS_ENABLED: 是否开启（默认 true）
+    COMPRESS_MIN_SIZE: 最小压缩字节数（默认 1024）
+    COMPRESS_GZIP_LEVEL: gzip 压缩级别（默认 6）
+    COMPRESS_BR_QUALITY: brotli 压缩质量（默认 5）
+    COMPRESS_CACHE_BYTES: 预压缩缓存的最大总字节数（默认 32MB，0 表示关闭）
+"""
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+from logging_config import get_logger
+
+logger = get_logger('compression')
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 取决于部署环境
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# 压缩变体的 ETag 后缀
+ENCODING_SUFFIXES = ('br', 'gzip')
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+}
+
+
+def variant_etag(etag, encoding):
+    """压缩变体的 ETag"""
+    return f'{etag}-{encoding}'
+
+
+def is_compressible(mimetype):
+    """文本类 MIME 类型才压缩（音频、图片等已压缩格式不处理）"""
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES)
+
+
+class CompressedCache:
+    """按总字节数限制的 LRU 缓存：(etag, encoding) -> 压缩后的 bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._data[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class Compressor:
+    """
+    响应压缩扩展
+
+    用法：
+        compressor = Compressor()
+        compressor.init_app(app)
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.br_quality = 5
+        self.cache = CompressedCache(0)
+        if app is not None:
+            self.init_app(app)
+
+    @property
+    def encodings(self):
+        """服务器支持的编码，按优先级排序"""
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def init_app(self, app):
+        self.enabled = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+        self.min_size = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+        self.gzip_level = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+        self.br_quality = int(os.getenv('COMPRESS_BR_QUALITY', '5'))
+        self.cache = CompressedCache(int(os.getenv('COMPRESS_CACHE_BYTES', str(32 * 1024 * 1024))))
+
+        if not self.enabled:
+            return
+        app.after_request(self._after_request)
+        logger.info("响应压缩已开启", extra={
+            'encodings': list(self.encodings), 'min_size': self.min_size
+        })
+
+    def compress(self, data, encoding):
+        """按指定编码压缩 bytes"""
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.br_quality)
+        # mtime=0：相同内容的压缩结果完全一致
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def choose_encoding(self):
+        """按 Accept-Encoding（含 q 值）选择编码，不接受压缩时返回 None"""
+        accept = request.accept_encodings
+        if not accept:
+            return None
+        return accept.best_match(self.encodings)
+
+    def cached_response(self, etag, mimetype):
+        """
+        按 ETag 查找已压缩的响应体
+
+        Returns:
+            tuple: (Response, 变体 ETag)；未开启、客户端不接受压缩或未命中时返回 (None, None)
+        """
+        if not self.enabled or self.cache.max_bytes <= 0 or request.method == 'HEAD':
+            return None, None
+        encoding = self.choose_encoding()
+        if encoding is None:
+            return None, None
+        compressed = self.cache.get((etag, encoding))
+        if compressed is None:
+            return None, None
+
+        response = Response(compressed, mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response, variant_etag(etag, encoding)
+
+    def _after_request(self, response):
+        if not is_compressible(response.mimetype):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or 'Content-Range' in response.headers
+                or request.method == 'HEAD'):
+            return response
+
+        encoding = self.choose_encoding()
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        etag, weak = response.get_etag()
+        cache_key = (etag, encoding) if etag and not weak and self.cache.max_bytes > 0 else None
+        compressed = self.cache.get(cache_key) if cache_key else None
+        if compressed is None:
+            compressed = self.compress(data, encoding)
+            # 压缩后反而更大时发送原文
+            if len(compressed) >= len(data):
+                return response
+            if cache_key:
+                self.cache.put(cache_key, compressed)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            response.set_etag(variant_etag(etag, encoding), weak=weak)
+        return response
+
+
+compressor = Compressor()
@@ -29,12 +29,19 @@ CREATE TABLE IF NOT EXISTS words (
     word VARCHAR(100) NOT NULL UNIQUE,
     translation TEXT NOT NULL,
     phonetic VARCHAR(200),
+    rhyme_key VARCHAR(50),          -- 押韵键（phonetic_keys.py 计算）
+    onset_key VARCHAR(20),          -- 首音键
+    stress_pattern VARCHAR(20),     -- 重音模式
+    syllable_list TEXT,             -- 按位置排好序的音节（JSON 数组，与 word_syllables 同一事务写入）
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 单词表索引
 CREATE INDEX IF NOT EXISTS idx_words_word ON words(word);
+CREATE INDEX IF NOT EXISTS idx_words_rhyme_key ON words(rhyme_key);
+CREATE INDEX IF NOT EXISTS idx_words_onset_key ON words(onset_key);
+CREATE INDEX IF NOT EXISTS idx_words_stress_pattern ON words(stress_pattern);
 
 -- ============================================================
 
@@ -114,6 +121,130 @@ CREATE INDEX IF NOT EXISTS idx_user_syllable_queries_user_id ON user_syllable_qu
 CREATE INDEX IF NOT EXISTS idx_user_syllable_queries_syllable_id ON user_syllable_queries(syllable_id);
 CREATE UNIQUE INDEX IF NOT EXISTS idx_user_syllable_queries_unique ON user_syllable_queries(user_id, syllable_id);
 
+-- ============================================================
+
+-- 7. 离线词库包版本表 - dictionary_bundles
+CREATE TABLE IF NOT EXISTS dictionary_bundles (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,  -- SQLite
+    -- version INT AUTO_INCREMENT PRIMARY KEY,  -- MySQL
+    -- version SERIAL PRIMARY KEY,              -- PostgreSQL
+    content_hash VARCHAR(40) NOT NULL,
+    members TEXT NOT NULL,                      -- JSON：{单词ID: 单词内容哈希}
+    word_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================================
+
+-- 8. 变更日志表 - change_log（增量同步游标）
+CREATE TABLE IF NOT EXISTS change_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- SQLite
+    -- id INT AUTO_INCREMENT PRIMARY KEY,  -- MySQL
+    -- id SERIAL PRIMARY KEY,              -- PostgreSQL
+    entity VARCHAR(20) NOT NULL,           -- word / word_query / syllable_query / reset
+    entity_id INTEGER,
+    user_id INTEGER,                       -- 用户计数器的所属用户，全局数据为空
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 变更日志表索引
+CREATE INDEX IF NOT EXISTS idx_change_log_user_id ON change_log(user_id);
+CREATE INDEX IF NOT EXISTS idx_change_log_created_at ON change_log(created_at);
+
+-- ============================================================
+
+-- 9. 非单词负缓存表 - rejected_words
+CREATE TABLE IF NOT EXISTS rejected_words (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- SQLite
+    -- id INT AUTO_INCREMENT PRIMARY KEY,  -- MySQL
+    -- id SERIAL PRIMARY KEY,              -- PostgreSQL
+    word VARCHAR(100) NOT NULL UNIQUE,
+    reason VARCHAR(20) NOT NULL,           -- invalid（AI 判定不是单词）/ failed（获取失败）
+    failures INTEGER NOT NULL DEFAULT 1,   -- 连续失败次数
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 非单词负缓存表索引
+CREATE INDEX IF NOT EXISTS idx_rejected_words_word ON rejected_words(word);
+CREATE INDEX IF NOT EXISTS idx_rejected_words_expires_at ON rejected_words(expires_at);
+
+-- ============================================================
+
+-- 10. 单词变形表 - word_aliases（running / ran -> run）
+CREATE TABLE IF NOT EXISTS word_aliases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- SQLite
+    -- id INT AUTO_INCREMENT PRIMARY KEY,  -- MySQL
+    -- id SERIAL PRIMARY KEY,              -- PostgreSQL
+    alias VARCHAR(100) NOT NULL UNIQUE,    -- 变形
+    word_id INTEGER NOT NULL,              -- 原形单词
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (word_id) REFERENCES words(id) ON DELETE CASCADE
+);
+
+-- 单词变形表索引
+CREATE INDEX IF NOT EXISTS idx_word_aliases_alias ON word_aliases(alias);
+CREATE INDEX IF NOT EXISTS idx_word_aliases_word_id ON word_aliases(word_id);
+
+-- ============================================================
+
+-- 11. 查询事件表 - query_events（只追加，汇总后按保留期清理）
+CREATE TABLE IF NOT EXISTS query_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- SQLite
+    -- id INT AUTO_INCREMENT PRIMARY KEY,  -- MySQL
+    -- id SERIAL PRIMARY KEY,              -- PostgreSQL
+    user_id INTEGER NOT NULL,              -- 不加外键，单词删除后事件仍保留
+    word_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 查询事件表索引
+CREATE INDEX IF NOT EXISTS idx_query_events_created_at ON query_events(created_at);
+
+-- ============================================================
+
+-- 12. 查询次数时间桶表 - query_rollups（每个用户每个单词按小时 / 天汇总，UTC）
+CREATE TABLE IF NOT EXISTS query_rollups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- SQLite
+    -- id INT AUTO_INCREMENT PRIMARY KEY,  -- MySQL
+    -- id SERIAL PRIMARY KEY,              -- PostgreSQL
+    user_id INTEGER NOT NULL,
+    word_id INTEGER NOT NULL,
+    period VARCHAR(4) NOT NULL,            -- hour / day
+    bucket TIMESTAMP NOT NULL,             -- 时间桶的开始时间
+    query_count INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (user_id, period, bucket, word_id)
+);
+
+-- 时间桶表索引
+CREATE INDEX IF NOT EXISTS idx_query_rollups_period_bucket ON query_rollups(period, bucket);
+
+-- 13. 热门单词检查点表 - trending_sketches（每个 worker 进程、每个时间段一行）
+CREATE TABLE IF NOT EXISTS trending_sketches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- SQLite
+    -- id INT AUTO_INCREMENT PRIMARY KEY,  -- MySQL
+    -- id SERIAL PRIMARY KEY,              -- PostgreSQL
+    node VARCHAR(64) NOT NULL,             -- 主机名:进程号:随机后缀
+    epoch INTEGER NOT NULL,                -- 时间段编号
+    data BLOB NOT NULL,                    -- 压缩的概要结构（MySQL 用 MEDIUMBLOB，PostgreSQL 用 BYTEA）
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (node, epoch)
+);
+
+-- 热门单词检查点表索引
+CREATE INDEX IF NOT EXISTS idx_trending_sketches_epoch ON trending_sketches(epoch);
+
+-- 14. 数据库结构版本表 - schema_versions（模型定义的哈希，启动时一致则跳过建表检查）
+CREATE TABLE IF NOT EXISTS schema_versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- SQLite
+    -- id INT AUTO_INCREMENT PRIMARY KEY,  -- MySQL
+    -- id SERIAL PRIMARY KEY,              -- PostgreSQL
+    schema_hash VARCHAR(40) NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ============================================================
 -- 使用说明
 -- ============================================================
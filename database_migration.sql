@@ -29,3 +29,31 @@ DESC words;
 -- 3. 新添加的单词将包含这两个字段的值
 -- ================================================
 
+
+-- ================================================
+-- 数据库迁移脚本 - 添加音标检索键
+-- ================================================
+-- 说明: 为 words 表添加押韵、首音、重音模式检索键（带索引），
+--       用于 GET /api/words/phonetic-search
+--       执行后运行 python phonetic_keys.py backfill 为已有单词计算检索键
+-- ================================================
+
+ALTER TABLE words ADD COLUMN rhyme_key VARCHAR(50) NULL COMMENT '押韵键';
+ALTER TABLE words ADD COLUMN onset_key VARCHAR(20) NULL COMMENT '首音键';
+ALTER TABLE words ADD COLUMN stress_pattern VARCHAR(20) NULL COMMENT '重音模式';
+
+CREATE INDEX ix_words_rhyme_key ON words(rhyme_key);
+CREATE INDEX ix_words_onset_key ON words(onset_key);
+CREATE INDEX ix_words_stress_pattern ON words(stress_pattern);
+
+
+-- ================================================
+-- 数据库迁移脚本 - 添加单词有序音节列
+-- ================================================
+-- 说明: words.syllable_list 保存按位置排好序的音节（JSON 数组），
+--       读取单词音节时不再连接 word_syllables 和 syllables；
+--       执行后运行 python syllable_list.py backfill 为已有单词填充
+--       （未填充的单词仍从关联表读取）
+-- ================================================
+
+ALTER TABLE words ADD COLUMN syllable_list TEXT NULL COMMENT '按位置排好序的音节（JSON 数组）';
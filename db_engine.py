@@ -0,0 +1,159 @@
+"""
+数据库引擎调优配置
+
+通过环境变量 DB_ENGINE_PROFILE 选择引擎配置：
+    - tuned（默认）：
+        SQLite: WAL 日志、synchronous=NORMAL、busy_timeout、mmap、页缓存，
+                并使用连接池复用连接（Flask-SQLAlchemy 默认对文件数据库使用 NullPool，
+                每个请求都重新打开连接，PRAGMA 和页缓存都无法复用）
+        MySQL/PostgreSQL: 连接池大小、溢出连接数、pre-ping、连接回收
+    - default：连接池和 PRAGMA 保持 Flask-SQLAlchemy 的默认行为
+
+两种配置都会放大 SQLAlchemy 的编译语句缓存（query_cache_size），
+SQLite 还会放大 sqlite3 驱动的预编译语句缓存（cached_statements），
+相同结构的查询只编译/prepare 一次。
+
+环境变量（均为可选）：
+    DB_ENGINE_PROFILE: tuned / default
+    DB_POOL_SIZE: 连接池大小（默认 10）
+    DB_MAX_OVERFLOW: 超出连接池的最大连接数（默认 20）
+    DB_POOL_RECYCLE: 连接回收时间，秒（默认 1800）
+    DB_POOL_TIMEOUT: 获取连接的等待时间，秒（默认 30）
+    DB_STATEMENT_CACHE_SIZE: 编译语句缓存大小（默认 1000）
+    DB_SQLITE_BUSY_TIMEOUT_MS: 等待写锁的时间，毫秒（默认 5000）
+    DB_SQLITE_SYNCHRONOUS: OFF / NORMAL / FULL（默认 NORMAL）
+    DB_SQLITE_MMAP_SIZE: 内存映射大小，字节（默认 256MB）
+    DB_SQLITE_CACHE_SIZE: 页缓存大小，负数表示 KiB（默认 -65536，即 64MB）
+"""
+import os
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
+
+from logging_config import get_logger
+
+logger = get_logger('db')
+
+PROFILES = ('tuned', 'default')
+
+# 当前生效的 SQLite PRAGMA 列表，由 configure_engine() 设置
+_sqlite_pragmas = []
+
+
+def get_engine_profile():
+    """返回当前选择的引擎配置名"""
+    profile = os.getenv('DB_ENGINE_PROFILE', 'tuned').strip().lower()
+    if profile not in PROFILES:
+        logger.warning("未知的 DB_ENGINE_PROFILE，使用 tuned", extra={'profile': profile})
+        profile = 'tuned'
+    return profile
+
+
+def _is_sqlite_memory(url):
+    return url.database in (None, '', ':memory:')
+
+
+def sqlite_pragmas(profile):
+    """
+    返回 SQLite 连接建立时要执行的 PRAGMA 列表
+
+    Returns:
+        list: [(name, value), ...]
+    """
+    if profile != 'tuned':
+        return []
+    return [
+        ('journal_mode', 'WAL'),
+        ('synchronous', os.getenv('DB_SQLITE_SYNCHRONOUS', 'NORMAL').upper()),
+        ('busy_timeout', int(os.getenv('DB_SQLITE_BUSY_TIMEOUT_MS', '5000'))),
+        ('mmap_size', int(os.getenv('DB_SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))),
+        ('cache_size', int(os.getenv('DB_SQLITE_CACHE_SIZE', '-65536'))),
+        ('temp_store', 'MEMORY'),
+    ]
+
+
+def build_engine_options(database_uri, profile=None):
+    """
+    根据数据库地址和配置名生成 create_engine() 参数
+
+    Args:
+        database_uri: 数据库地址
+        profile: 配置名，默认读取 DB_ENGINE_PROFILE
+
+    Returns:
+        dict: 可直接作为 SQLALCHEMY_ENGINE_OPTIONS 使用
+    """
+    profile = profile or get_engine_profile()
+    url = make_url(database_uri)
+    options = {
+        'query_cache_size': int(os.getenv('DB_STATEMENT_CACHE_SIZE', '1000')),
+    }
+
+    if url.get_backend_name() == 'sqlite':
+        options['connect_args'] = {'cached_statements': 256}
+        if profile == 'tuned' and not _is_sqlite_memory(url):
+            options['poolclass'] = QueuePool
+            options['pool_size'] = int(os.getenv('DB_POOL_SIZE', '10'))
+            options['max_overflow'] = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+            options['pool_timeout'] = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+            options['connect_args']['check_same_thread'] = False
+            # 等锁由 busy_timeout PRAGMA 负责，这里保持一致
+            options['connect_args']['timeout'] = \
+                int(os.getenv('DB_SQLITE_BUSY_TIMEOUT_MS', '5000')) / 1000.0
+        return options
+
+    if profile == 'tuned':
+        options.update({
+            'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+            'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+            'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+            'pool_pre_ping': True,
+        })
+    return options
+
+
+@event.listens_for(Engine, 'connect')
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """新建 SQLite 连接时执行 PRAGMA（对其他数据库不做任何事）"""
+    if not _sqlite_pragmas or not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in _sqlite_pragmas:
+            try:
+                cursor.execute(f'PRAGMA {name}={value}')
+            except sqlite3.OperationalError as e:
+                # 只读连接无法切换日志模式等情况，忽略即可
+                logger.debug("PRAGMA %s 执行失败: %s", name, e)
+    finally:
+        cursor.close()
+
+
+def activate_sqlite_pragmas(profile):
+    """设置之后新建的 SQLite 连接要执行的 PRAGMA"""
+    global _sqlite_pragmas
+    _sqlite_pragmas = sqlite_pragmas(profile)
+
+
+def configure_engine(app, profile=None):
+    """
+    把引擎配置写入 Flask 配置，需在 db.init_app(app) 之前调用
+
+    Args:
+        app: Flask 应用
+        profile: 配置名，默认读取 DB_ENGINE_PROFILE
+    """
+    profile = profile or get_engine_profile()
+    database_uri = app.config['SQLALCHEMY_DATABASE_URI']
+    options = build_engine_options(database_uri, profile)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    activate_sqlite_pragmas(profile)
+
+    logger.info("数据库引擎配置", extra={
+        'profile': profile,
+        'options': {k: v for k, v in options.items() if k != 'poolclass'}
+    })
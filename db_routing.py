@@ -0,0 +1,200 @@
+"""
+读写分离 - 把只读查询路由到只读副本
+
+配置（任选其一，都不配置时所有查询走主库，行为与之前一致）：
+    DATABASE_REPLICA_URL: 只读副本地址（MySQL/PostgreSQL 从库等）
+    DB_SQLITE_READONLY_REPLICA=true: 主库为 SQLite 文件时，读查询使用同一文件上的
+        只读连接（mode=ro），配合 WAL 日志读写互不阻塞
+    DB_REPLICA_STICKY_SECONDS: 用户写入后，在该时间内其读查询仍走主库（默认 5 秒）
+
+路由规则：
+    - 只有标记了 @db.replica_reads 的视图中的查询才会走副本
+    - flush（INSERT/UPDATE/DELETE）和显式执行的 DML 语句始终走主库
+    - 读己之写：会话中一旦发生写入，本次请求剩余的查询全部走主库；
+      用户写入后的 DB_REPLICA_STICKY_SECONDS 秒内，其读查询也走主库
+      （按 worker 进程记录）
+"""
+import functools
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import quote
+
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import create_engine, event, orm
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
+
+from db_engine import build_engine_options
+from logging_config import get_logger
+
+logger = get_logger('db')
+
+USE_REPLICA = 'use_replica'
+PINNED_PRIMARY = 'pinned_primary'
+WROTE = 'wrote'
+
+
+def _current_identity():
+    """当前请求的 JWT 身份，没有时返回 None"""
+    try:
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+class RoutingSession(SignallingSession):
+    """按会话状态在主库和只读副本之间选择连接的会话"""
+
+    def __init__(self, db, **options):
+        self._routing_db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (self.info.get(USE_REPLICA)
+                and not self.info.get(PINNED_PRIMARY)
+                and not self._flushing
+                and not getattr(clause, 'is_dml', False)):
+            replica = self._routing_db.get_replica_engine(self.app)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper, clause)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _pin_primary_after_write(session, flush_context):
+    # 读己之写：本次请求后续的查询全部走主库
+    session.info[PINNED_PRIMARY] = True
+    session.info[WROTE] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _pin_primary_after_dml(orm_execute_state):
+    # session.execute() 直接执行的 INSERT/UPDATE/DELETE 不经过 flush，同样需要固定到主库
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        session = orm_execute_state.session
+        session.info[PINNED_PRIMARY] = True
+        session.info[WROTE] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_writer(session):
+    if not session.info.pop(WROTE, False):
+        return
+    db = getattr(session, '_routing_db', None)
+    identity = _current_identity()
+    if db is not None and identity is not None:
+        db.mark_recent_writer(identity)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """支持只读副本路由的 SQLAlchemy 扩展"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._replica_engines = {}
+        self._replica_lock = threading.Lock()
+        self._recent_writers = {}
+        self.sticky_seconds = float(os.getenv('DB_REPLICA_STICKY_SECONDS', '5'))
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    # ---------- 副本引擎 ----------
+
+    def _create_replica_engine(self, app):
+        replica_url = os.getenv('DATABASE_REPLICA_URL')
+        if replica_url:
+            return create_engine(replica_url, **build_engine_options(replica_url))
+
+        if os.getenv('DB_SQLITE_READONLY_REPLICA', 'false').lower() != 'true':
+            return None
+
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+            logger.warning("DB_SQLITE_READONLY_REPLICA 只支持 SQLite 文件数据库，已忽略")
+            return None
+
+        # 与 Flask-SQLAlchemy 一致：相对路径以应用根目录为基准
+        path = os.path.join(app.root_path, url.database)
+        busy_timeout = int(os.getenv('DB_SQLITE_BUSY_TIMEOUT_MS', '5000')) / 1000.0
+
+        def connect():
+            return sqlite3.connect(
+                f'file:{quote(path)}?mode=ro', uri=True,
+                check_same_thread=False, timeout=busy_timeout
+            )
+
+        options = build_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+        return create_engine(
+            'sqlite://', creator=connect, poolclass=QueuePool,
+            pool_size=options.get('pool_size', 5),
+            max_overflow=options.get('max_overflow', 10),
+            query_cache_size=options['query_cache_size'],
+        )
+
+    def get_replica_engine(self, app):
+        """
+        返回只读副本引擎，未配置时返回 None
+
+        引擎按进程缓存，fork 出的子进程会重新创建自己的连接池。
+        """
+        key = (id(app), os.getpid())
+        if key not in self._replica_engines:
+            with self._replica_lock:
+                if key not in self._replica_engines:
+                    engine = self._create_replica_engine(app)
+                    if engine is not None:
+                        logger.info("只读副本已启用", extra={'replica': str(engine.url)})
+                    self._replica_engines[key] = engine
+        return self._replica_engines[key]
+
+    def dispose_engines(self, app, close=True):
+        """
+        丢弃主库和副本引擎的连接池（gunicorn 预加载时在 fork 前后调用）
+
+        Args:
+            app: Flask 应用
+            close: 是否关闭池中的连接。fork 出的子进程传 False：
+                只丢弃继承的连接，不关闭父进程仍在使用的套接字
+        """
+        with app.app_context():
+            self.get_engine(app).dispose(close=close)
+        with self._replica_lock:
+            for (app_id, _), engine in self._replica_engines.items():
+                if engine is not None and app_id == id(app):
+                    engine.dispose(close=close)
+
+    # ---------- 读己之写 ----------
+
+    def mark_recent_writer(self, identity):
+        now = time.monotonic()
+        self._recent_writers[identity] = now
+        if len(self._recent_writers) > 10000:
+            cutoff = now - self.sticky_seconds
+            self._recent_writers = {
+                key: ts for key, ts in self._recent_writers.items() if ts > cutoff
+            }
+
+    def wrote_recently(self, identity):
+        ts = self._recent_writers.get(identity)
+        return ts is not None and time.monotonic() - ts < self.sticky_seconds
+
+    def replica_reads(self, view):
+        """
+        视图装饰器：视图中的只读查询走只读副本
+
+        需要放在 @jwt_required() 之后（更靠近视图函数），以便识别当前用户。
+        """
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            identity = _current_identity()
+            session = self.session()
+            session.info[USE_REPLICA] = identity is None or not self.wrote_recently(identity)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                session.info.pop(USE_REPLICA, None)
+        return wrapper
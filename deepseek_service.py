@@ -1,10 +1,31 @@
 """
 Deepseek API 服务 - 用于单词音节分词和信息获取
+
+所有请求经过 rate_limiter 的令牌桶 + AIMD 并发控制；429/5xx 和网络错误按带抖动的
+指数退避重试，直到单次调用的截止时间。
+
+环境变量：
+    DEEPSEEK_DEADLINE: 单次调用（含排队和重试）的截止时间，秒（默认 20）
+    DEEPSEEK_BACKOFF_BASE: 重试退避的初始上限，秒（默认 0.5，每次翻倍）
+    DEEPSEEK_BACKOFF_MAX: 重试退避的最大值，秒（默认 8）
+    限流参数见 rate_limiter.py（DEEPSEEK_RATE_LIMIT 等）
 """
 import os
+import random
+import time
 import requests
 import json
 import re
+import logging
+
+from logging_config import get_logger
+from rate_limiter import (
+    AdaptiveRateLimiter, RateLimitTimeout, OK, THROTTLED, ERROR, parse_retry_after
+)
+
+logger = get_logger('deepseek')
+
+LEMMA_PATTERN = re.compile(r"^[a-z]+(?:['-][a-z]+)*$")
 
 
 class DeepseekService:
@@ -13,6 +34,85 @@ class DeepseekService:
     def __init__(self):
         self.api_key = os.getenv('DEEPSEEK_API_KEY')
         self.api_url = os.getenv('DEEPSEEK_API_URL', 'https://api.deepseek.com/v1/chat/completions')
+        self.deadline = float(os.getenv('DEEPSEEK_DEADLINE', '20'))
+        self.backoff_base = float(os.getenv('DEEPSEEK_BACKOFF_BASE', '0.5'))
+        self.backoff_max = float(os.getenv('DEEPSEEK_BACKOFF_MAX', '8'))
+        self.limiter = AdaptiveRateLimiter()
+        
+        if not self.api_key:
+            logger.warning("DEEPSEEK_API_KEY 未设置，音节分词将使用默认方法，无法自动获取单词信息")
+    
+    def _post(self, payload, timeout, word):
+        """
+        带限流和重试的 API 请求
+        
+        Args:
+            payload: 请求体
+            timeout: 单次 HTTP 请求的超时时间（秒）
+            word: 当前单词（用于日志）
+            
+        Returns:
+            requests.Response: 最后一次响应（非 2xx 表示重试后仍失败）
+            超过截止时间或网络错误时返回 None
+        """
+        headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {self.api_key}'
+        }
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        
+        while True:
+            try:
+                started = self.limiter.acquire(deadline)
+            except RateLimitTimeout:
+                logger.warning("Deepseek API 排队超时", extra={'word': word, 'attempts': attempt})
+                return None
+            
+            response = None
+            retry_after = None
+            try:
+                response = requests.post(
+                    self.api_url,
+                    headers=headers,
+                    json=payload,
+                    timeout=min(timeout, max(0.1, deadline - time.monotonic()))
+                )
+            except requests.RequestException as e:
+                self.limiter.release(started, ERROR)
+                logger.warning("Deepseek API 请求失败: %s", e, extra={'word': word, 'attempt': attempt})
+            else:
+                status = response.status_code
+                if status in (429, 503):
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    self.limiter.release(started, THROTTLED, retry_after)
+                elif status >= 500:
+                    self.limiter.release(started, ERROR)
+                else:
+                    self.limiter.release(started, OK)
+                    return response
+            
+            # 带抖动的指数退避（full jitter），服务端给出 Retry-After 时至少等待该时间
+            attempt += 1
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+            if retry_after:
+                delay += retry_after
+            if time.monotonic() + delay >= deadline:
+                logger.warning("Deepseek API 重试超过截止时间", extra={
+                    'word': word, 'attempts': attempt,
+                    'status': response.status_code if response is not None else None
+                })
+                return response
+            self.limiter.record_retry()
+            time.sleep(delay)
+    
+    def metrics(self):
+        """限流器的当前状态（每个 worker 进程独立）"""
+        return {
+            'configured': bool(self.api_key),
+            'deadline': self.deadline,
+            **self.limiter.snapshot()
+        }
     
     def syllabify_word(self, word):
         """
@@ -26,15 +126,10 @@ class DeepseekService:
             如果失败返回 None
         """
         if not self.api_key:
-            print("警告: DEEPSEEK_API_KEY 未设置，使用默认分词")
+            logger.debug("DEEPSEEK_API_KEY 未设置，使用默认分词: %s", word)
             return self._default_syllabify(word)
         
         try:
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {self.api_key}'
-            }
-            
             prompt = f"""请将英文单词 "{word}" 按照音标音节进行分词。
 要求：
 1. 只返回分词结果，用空格分隔，不要任何解释
@@ -56,13 +151,10 @@ class DeepseekService:
                 "max_tokens": 100
             }
             
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=payload,
-                timeout=10
-            )
+            response = self._post(payload, 10, word)
             
+            if response is None:
+                return self._default_syllabify(word)
             if response.status_code == 200:
                 result = response.json()
                 content = result.get('choices', [{}])[0].get('message', {}).get('content', '').strip()
@@ -71,17 +163,20 @@ class DeepseekService:
                 syllables = [s.strip() for s in content.split() if s.strip()]
                 
                 if syllables:
-                    print(f"Deepseek API 分词结果: {word} -> {syllables}")
+                    logger.debug("Deepseek API 分词结果: %s -> %s", word, syllables)
                     return syllables
                 else:
-                    print(f"Deepseek API 返回空结果，使用默认分词")
+                    logger.warning("Deepseek API 返回空结果，使用默认分词", extra={'word': word})
                     return self._default_syllabify(word)
             else:
-                print(f"Deepseek API 错误: {response.status_code} - {response.text}")
+                logger.warning(
+                    "Deepseek API 错误，使用默认分词",
+                    extra={'word': word, 'status': response.status_code, 'body': response.text[:500]}
+                )
                 return self._default_syllabify(word)
                 
         except Exception as e:
-            print(f"调用 Deepseek API 时出错: {str(e)}")
+            logger.warning("调用 Deepseek API 时出错: %s", e, extra={'word': word})
             return self._default_syllabify(word)
     
     def _default_syllabify(self, word):
@@ -121,7 +216,7 @@ class DeepseekService:
         if not syllables:
             syllables = [word]
         
-        print(f"默认分词结果: {word} -> {syllables}")
+        logger.debug("默认分词结果: %s -> %s", word, syllables)
         return syllables
     
     def get_word_info(self, word):
@@ -135,36 +230,37 @@ class DeepseekService:
         Returns:
             dict: {
                 'word': str,
+                'lemma': str（原形，输入是变形时其余字段描述的是原形）,
                 'phonetic': str,
                 'translation': str,
                 'syllables': list,
                 'phonetic_analysis': str,
                 'root_affix': str
             }
-            如果失败返回 None
+            如果失败返回 None，判定不是英文单词时返回 False
         """
         if not self.api_key:
-            print("警告: DEEPSEEK_API_KEY 未设置，无法自动获取单词信息")
+            logger.warning("DEEPSEEK_API_KEY 未设置，无法自动获取单词信息", extra={'word': word})
             return None
         
         try:
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {self.api_key}'
-            }
-            
             prompt = f"""Provide details for the word "{word}". Return strictly in this JSON format:
 {{
   "phonetic": "/IPA/", 
   "translation": "Chinese translation",
   "syllables": "syllable separation",
   "phonetic_analysis": "natural phonics analysis in Chinese",
-  "root_affix": "word roots and affixes analysis in Chinese"
+  "root_affix": "word roots and affixes analysis in Chinese",
+  "lemma": "base form"
 }}
+If the input is an inflected form (plural, past tense, participle, -ing form, comparative), describe its base form in all fields and put the base form in "lemma"; otherwise "lemma" is the input itself.
+If the input is not a real English word (a misspelling, a personal name or random letters), return only {{"valid": false}}.
 
 Example:
 Input: conversation
-Output: {{"phonetic": "/ˌkɒnvəˈseɪʃn/", "translation": "会话，谈话", "syllables": "con ver sa tion", "phonetic_analysis": "con-辅音+元音组合/kɒn/，ver-元音er组合/və/，sa-辅音+元音/seɪ/，tion-常见后缀/ʃn/", "root_affix": "前缀con-(共同)，词根vers(转)，后缀-ation(名词后缀)"}}
+Output: {{"phonetic": "/ˌkɒnvəˈseɪʃn/", "translation": "会话，谈话", "syllables": "con ver sa tion", "phonetic_analysis": "con-辅音+元音组合/kɒn/，ver-元音er组合/və/，sa-辅音+元音/seɪ/，tion-常见后缀/ʃn/", "root_affix": "前缀con-(共同)，词根vers(转)，后缀-ation(名词后缀)", "lemma": "conversation"}}
+Input: convresation
+Output: {{"valid": false}}
 Input: {word}
 Output:"""
             
@@ -177,16 +273,13 @@ Output:"""
                     }
                 ],
                 "temperature": 0.3,
-                "max_tokens": 200
+                "max_tokens": 240
             }
             
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=payload,
-                timeout=15
-            )
+            response = self._post(payload, 15, word)
             
+            if response is None:
+                return None
             if response.status_code == 200:
                 result = response.json()
                 content = result.get('choices', [{}])[0].get('message', {}).get('content', '').strip()
@@ -198,16 +291,26 @@ Output:"""
                     if json_match:
                         word_data = json.loads(json_match.group())
                         
+                        if word_data.get('valid') is False:
+                            logger.info("Deepseek API 判定不是英文单词", extra={'word': word})
+                            return False
+                        
+                        # 原形：输入是变形时 AI 返回的信息描述的是原形
+                        lemma = str(word_data.get('lemma') or '').strip().lower()
+                        if not LEMMA_PATTERN.match(lemma):
+                            lemma = word.lower()
+                        
                         # 解析音节
                         syllables_str = word_data.get('syllables', '')
                         syllables = [s.strip() for s in syllables_str.split() if s.strip()]
                         
                         # 如果音节为空，使用分词方法
                         if not syllables:
-                            syllables = self.syllabify_word(word)
+                            syllables = self.syllabify_word(lemma)
                         
                         result = {
                             'word': word.lower(),
+                            'lemma': lemma,
                             'phonetic': word_data.get('phonetic', ''),
                             'translation': word_data.get('translation', ''),
                             'syllables': syllables,
@@ -215,27 +318,32 @@ Output:"""
                             'root_affix': word_data.get('root_affix', '')
                         }
                         
-                        print(f"Deepseek API 获取单词信息成功: {word}")
-                        print(f"  音标: {result['phonetic']}")
-                        print(f"  翻译: {result['translation']}")
-                        print(f"  音节: {' '.join(result['syllables'])}")
-                        print(f"  自然拼读: {result['phonetic_analysis']}")
-                        print(f"  词根词缀: {result['root_affix']}")
+                        logger.info("Deepseek API 获取单词信息成功", extra={'word': word})
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Deepseek API 单词详情", extra={'word_info': result})
                         
                         return result
                     else:
-                        print(f"Deepseek API 返回格式错误，无法解析JSON")
+                        logger.warning(
+                            "Deepseek API 返回格式错误，无法解析JSON",
+                            extra={'word': word, 'content': content[:500]}
+                        )
                         return None
                         
                 except json.JSONDecodeError as e:
-                    print(f"Deepseek API 返回的JSON解析失败: {e}")
-                    print(f"返回内容: {content}")
+                    logger.warning(
+                        "Deepseek API 返回的JSON解析失败: %s", e,
+                        extra={'word': word, 'content': content[:500]}
+                    )
                     return None
             else:
-                print(f"Deepseek API 错误: {response.status_code} - {response.text}")
+                logger.error(
+                    "Deepseek API 错误",
+                    extra={'word': word, 'status': response.status_code, 'body': response.text[:500]}
+                )
                 return None
                 
         except Exception as e:
-            print(f"调用 Deepseek API 获取单词信息时出错: {str(e)}")
+            logger.exception("调用 Deepseek API 获取单词信息时出错: %s", e, extra={'word': word})
             return None
 
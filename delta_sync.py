@@ -0,0 +1,270 @@
+"""
+增量同步 - 变更日志和 /api/sync 的数据收集
+
+单词、单词-音节关联、用户查询次数发生变化时，在同一事务中向 change_log 表追加一行
+（实体类型 + 实体ID + 所属用户）。change_log.id 单调递增，客户端保存上次同步到的 id
+作为游标，下次只拉取游标之后变化过的实体的当前值。
+
+写入来源：
+    - ORM flush：Word / WordSyllable / UserWordQuery / UserSyllableQuery 的增删改
+      （after_flush 中一次批量写入）
+    - query_recorder 的批量累加语句（不经过 ORM，由 record_changes() 显式写入）
+    - dict_archive 批量导入：写入一条 reset，客户端需要重新加载
+
+游标与未提交事务：
+    id 在插入时分配，并发事务的提交顺序可能与 id 顺序不同，读取时可能看到 11 而 10 还未提交。
+    返回的游标不会越过最近 SYNC_GAP_GRACE 秒内出现的空洞，未提交的变更在下次同步时仍会返回；
+    更早的空洞视为已回滚的事务。
+
+环境变量：
+    SYNC_MAX_CHANGES: 单次同步最多处理的日志行数（默认 2000，超出时 has_more 为 true）
+    SYNC_GAP_GRACE: 等待未提交事务的时间，秒（默认 10）
+    CHANGE_LOG_RETENTION_DAYS: 变更日志保留天数（默认 30，更早的游标需要重新加载）
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, select
+
+from db_routing import RoutingSession
+from json_fast import word_fragments
+from logging_config import get_logger
+from models import (
+    db, ChangeLog, Word, WordSyllable, Syllable, UserWordQuery, UserSyllableQuery
+)
+
+logger = get_logger('sync')
+
+WORD = 'word'
+WORD_QUERY = 'word_query'
+SYLLABLE_QUERY = 'syllable_query'
+RESET = 'reset'
+
+MAX_CHANGES = int(os.getenv('SYNC_MAX_CHANGES', '2000'))
+GAP_GRACE = float(os.getenv('SYNC_GAP_GRACE', '10'))
+RETENTION_DAYS = float(os.getenv('CHANGE_LOG_RETENTION_DAYS', '30'))
+PRUNE_INTERVAL = 3600
+
+
+# ==================== 写入变更日志 ====================
+
+def record_changes(executor, changes, now=None):
+    """
+    批量写入变更日志
+
+    Args:
+        executor: db.session 或当前事务的连接（与数据变更在同一事务中）
+        changes: 可迭代的 (实体类型, 实体ID, 用户ID)
+        now: 变更时间
+    """
+    now = now or datetime.utcnow()
+    rows = [
+        {'entity': entity, 'entity_id': entity_id, 'user_id': user_id, 'created_at': now}
+        for entity, entity_id, user_id in sorted(set(changes), key=str)
+    ]
+    if rows:
+        executor.execute(ChangeLog.__table__.insert(), rows)
+
+
+def _change_of(obj):
+    """ORM 对象对应的 (实体类型, 实体ID, 用户ID)，不需要记录时返回 None"""
+    if isinstance(obj, Word):
+        return WORD, obj.id, None
+    if isinstance(obj, WordSyllable):
+        # 音节关联包含在单词内容中（有序的 syllables 列表）
+        return WORD, obj.word_id, None
+    if isinstance(obj, UserWordQuery):
+        return WORD_QUERY, obj.word_id, obj.user_id
+    if isinstance(obj, UserSyllableQuery):
+        return SYLLABLE_QUERY, obj.syllable_id, obj.user_id
+    return None
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _log_flushed_changes(session, flush_context):
+    changes = []
+    for obj in list(session.new) + list(session.deleted):
+        changes.append(_change_of(obj))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            changes.append(_change_of(obj))
+    changes = [change for change in changes if change is not None and change[1] is not None]
+    if changes:
+        # flush 期间的连接始终是主库
+        record_changes(session.connection(), changes)
+
+
+# ==================== 读取变更 ====================
+
+def current_cursor():
+    """当前最新的游标"""
+    return db.session.query(func.max(ChangeLog.id)).scalar() or 0
+
+
+def _safe_rows(since, rows):
+    """截断到第一个可能属于未提交事务的空洞之前"""
+    deadline = datetime.utcnow() - timedelta(seconds=GAP_GRACE)
+    expected = since + 1
+    for index, row in enumerate(rows):
+        if row.id != expected and row.created_at > deadline:
+            return rows[:index], True
+        expected = row.id + 1
+    return rows, False
+
+
+def _word_query_dicts(user_id, word_ids):
+    if not word_ids:
+        return []
+    rows = db.session.query(UserWordQuery, Word.word)\
+        .join(Word, Word.id == UserWordQuery.word_id)\
+        .filter(UserWordQuery.user_id == user_id, UserWordQuery.word_id.in_(word_ids))
+    return [_counter_dict(query, 'word_id', query.word_id, 'word', word) for query, word in rows]
+
+
+def _syllable_query_dicts(user_id, syllable_ids=None):
+    rows = db.session.query(UserSyllableQuery, Syllable.syllable)\
+        .join(Syllable, Syllable.id == UserSyllableQuery.syllable_id)\
+        .filter(UserSyllableQuery.user_id == user_id)
+    if syllable_ids is not None:
+        if not syllable_ids:
+            return []
+        rows = rows.filter(UserSyllableQuery.syllable_id.in_(syllable_ids))
+    return [_counter_dict(query, 'syllable_id', query.syllable_id, 'syllable', syllable)
+            for query, syllable in rows]
+
+
+def _counter_dict(query, key_name, key_id, text_name, text):
+    # 字段与 /api/stats/words、/api/stats/syllables 一致
+    return {
+        'id': query.id,
+        'user_id': query.user_id,
+        key_name: key_id,
+        text_name: text,
+        'query_count': query.query_count,
+        'last_queried_at': query.last_queried_at.isoformat() if query.last_queried_at else None,
+    }
+
+
+def _reset_payload(user_id, cursor):
+    """需要重新加载：返回当前游标和用户全部的计数器，单词由客户端按需重新获取"""
+    word_ids = [word_id for (word_id,) in
+                db.session.query(UserWordQuery.word_id).filter_by(user_id=user_id)]
+    return {
+        'cursor': cursor,
+        'reset': True,
+        'has_more': False,
+        'words': [],
+        'deleted_words': [],
+        'word_queries': _word_query_dicts(user_id, word_ids),
+        'deleted_word_queries': [],
+        'syllable_queries': _syllable_query_dicts(user_id),
+        'deleted_syllable_queries': [],
+    }
+
+
+def collect_changes(user_id, since=None, limit=None):
+    """
+    收集游标之后变化过的实体的当前值
+
+    Args:
+        user_id: 当前用户（只返回该用户的计数器）
+        since: 上次同步返回的游标，None 表示首次同步
+        limit: 最多处理的日志行数
+
+    Returns:
+        dict: cursor（下次同步使用的游标）、reset（客户端需要清空本地数据重新加载）、
+              has_more、words / deleted_words、word_queries / deleted_word_queries、
+              syllable_queries / deleted_syllable_queries
+    """
+    limit = limit or MAX_CHANGES
+    if since is None or since < 0:
+        return _reset_payload(user_id, current_cursor())
+
+    # 游标之后的日志已被清理，无法计算增量
+    oldest = db.session.query(func.min(ChangeLog.id)).scalar()
+    if oldest is not None and since < oldest - 1:
+        return _reset_payload(user_id, current_cursor())
+
+    log = ChangeLog.__table__
+    rows = db.session.execute(
+        select(log.c.id, log.c.entity, log.c.entity_id, log.c.user_id, log.c.created_at)
+        .where(log.c.id > since).order_by(log.c.id).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows, blocked = _safe_rows(since, rows[:limit])
+    # 遇到未提交的事务时让客户端稍后再同步，而不是立即重试
+    has_more = has_more and not blocked
+    cursor = rows[-1].id if rows else since
+
+    word_ids, word_query_ids, syllable_query_ids = set(), set(), set()
+    for row in rows:
+        if row.entity == RESET:
+            return _reset_payload(user_id, cursor)
+        if row.entity == WORD:
+            word_ids.add(row.entity_id)
+        elif row.user_id == user_id:
+            if row.entity == WORD_QUERY:
+                word_query_ids.add(row.entity_id)
+            elif row.entity == SYLLABLE_QUERY:
+                syllable_query_ids.add(row.entity_id)
+
+    words = Word.query.filter(Word.id.in_(word_ids)).order_by(Word.id).all() if word_ids else []
+    word_queries = _word_query_dicts(user_id, word_query_ids)
+    syllable_queries = _syllable_query_dicts(user_id, syllable_query_ids)
+
+    return {
+        'cursor': cursor,
+        'reset': False,
+        'has_more': has_more,
+        'words': word_fragments(words),
+        'deleted_words': sorted(word_ids - {word.id for word in words}),
+        'word_queries': word_queries,
+        'deleted_word_queries': sorted(word_query_ids - {q['word_id'] for q in word_queries}),
+        'syllable_queries': syllable_queries,
+        'deleted_syllable_queries': sorted(
+            syllable_query_ids - {q['syllable_id'] for q in syllable_queries}
+        ),
+    }
+
+
+# ==================== 清理 ====================
+
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+
+
+def prune_change_log(retention_days=None):
+    """
+    删除过期的变更日志（不提交事务）
+
+    Returns:
+        int: 删除的行数
+    """
+    retention_days = RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    # 保留最新的一行，游标比较始终有参照
+    latest = current_cursor()
+    return ChangeLog.query.filter(
+        ChangeLog.created_at < cutoff, ChangeLog.id < latest
+    ).delete(synchronize_session=False)
+
+
+def maybe_prune():
+    """每个进程每 PRUNE_INTERVAL 秒最多清理一次"""
+    global _last_prune
+    if RETENTION_DAYS <= 0 or time.time() - _last_prune < PRUNE_INTERVAL:
+        return
+    with _prune_lock:
+        if time.time() - _last_prune < PRUNE_INTERVAL:
+            return
+        _last_prune = time.time()
+    try:
+        deleted = prune_change_log()
+        db.session.commit()
+        if deleted:
+            logger.info("已清理过期变更日志", extra={'deleted': deleted})
+    except Exception as e:
+        db.session.rollback()
+        logger.warning("清理变更日志失败: %s", e)
@@ -0,0 +1,474 @@
+"""
+词库归档 - 以紧凑的二进制格式导出 / 导入词库（单词、音节、有序的单词-音节关联）
+
+文件格式（版本 1，所有整数均为大端序）：
+
+    头部:  MAGIC(8 字节 b'WSYLDICT') + 版本(u16) + 保留(u16)
+    记录:  类型(u8) + 长度(u32) + 内容
+        1 音节: id(u32) + 音节(str)
+        2 单词: id(u32) + created_at(i64) + updated_at(i64)
+                + word / translation / phonetic / phonetic_analysis / root_affix（str）
+                + 音节数(u16) + 按位置排列的音节 id(u32 * n)
+        0 结束: 音节数(u32) + 单词数(u32) + 关联数(u32)，导入时用于校验完整性
+
+    str:      长度(u32，0xFFFFFFFF 表示 NULL) + UTF-8 字节
+    datetime: 自 1970-01-01 起的微秒数(i64，最小值表示 NULL)
+
+所有音节记录都写在单词记录之前，读取时可以边读边写入数据库。
+未知类型的记录按长度跳过，以后新增记录类型时旧版本仍能导入。
+文件名以 .gz 结尾时整体使用 gzip 压缩，导入时自动识别。
+
+导入方式：
+    - 目标库没有单词和音节时保留原 id 直接批量写入
+    - 否则按文本合并：已存在的音节和单词保留本地数据，新增的分配新 id
+    - 导入后写入一条 reset 变更日志，增量同步的客户端会重新加载
+
+用法：
+    python dict_archive.py export words.wsd.gz
+    python dict_archive.py import words.wsd.gz
+    python dict_archive.py info words.wsd.gz
+"""
+import argparse
+import gzip
+import os
+import struct
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from delta_sync import RESET, record_changes
+from logging_config import get_logger
+from models import db, Word, Syllable, WordSyllable, encode_syllables
+from phonetic_keys import phonetic_keys
+
+logger = get_logger('archive')
+
+MAGIC = b'WSYLDICT'
+FORMAT_VERSION = 1
+
+RECORD_END = 0
+RECORD_SYLLABLE = 1
+RECORD_WORD = 2
+
+BATCH_SIZE = 5000
+
+_HEADER = struct.Struct('>8sHH')
+_RECORD = struct.Struct('>BI')
+_U16 = struct.Struct('>H')
+_U32 = struct.Struct('>I')
+_WORD_HEAD = struct.Struct('>Iqq')
+_END = struct.Struct('>III')
+
+_NULL_STR = 0xFFFFFFFF
+_NULL_TIME = -(1 << 63)
+_EPOCH = datetime(1970, 1, 1)
+
+_WORD_TEXT_FIELDS = ('word', 'translation', 'phonetic', 'phonetic_analysis', 'root_affix')
+
+
+class ArchiveError(Exception):
+    """归档文件格式错误或内容不完整"""
+
+
+# ==================== 编码 ====================
+
+def _pack_str(value):
+    if value is None:
+        return _U32.pack(_NULL_STR)
+    data = value.encode('utf-8')
+    return _U32.pack(len(data)) + data
+
+
+def _pack_time(value):
+    if value is None:
+        return _NULL_TIME
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _unpack_time(value):
+    if value == _NULL_TIME:
+        return None
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class _Reader:
+    """在一条记录的内容中顺序读取字段"""
+
+    __slots__ = ('data', 'offset')
+
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, fmt):
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def string(self):
+        (length,) = self.unpack(_U32)
+        if length == _NULL_STR:
+            return None
+        start = self.offset
+        self.offset += length
+        return self.data[start:self.offset].decode('utf-8')
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, compresslevel=6)
+    if 'r' in mode:
+        # 不论扩展名，按内容识别 gzip
+        with open(path, 'rb') as f:
+            if f.read(2) == b'\x1f\x8b':
+                return gzip.open(path, mode)
+    return open(path, mode)
+
+
+class ArchiveWriter:
+    """按顺序写入音节记录和单词记录（记录先在内存中攒成块再写入，减少 gzip 调用次数）"""
+
+    BUFFER_SIZE = 256 * 1024
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.syllables = 0
+        self.words = 0
+        self.links = 0
+        self._buffer = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+
+    def _record(self, record_type, payload):
+        self._buffer += _RECORD.pack(record_type, len(payload))
+        self._buffer += payload
+        if len(self._buffer) >= self.BUFFER_SIZE:
+            self.stream.write(self._buffer)
+            self._buffer.clear()
+
+    def syllable(self, syllable_id, syllable):
+        self._record(RECORD_SYLLABLE, _U32.pack(syllable_id) + _pack_str(syllable))
+        self.syllables += 1
+
+    def word(self, row, syllable_ids):
+        parts = [_WORD_HEAD.pack(row['id'], _pack_time(row['created_at']),
+                                 _pack_time(row['updated_at']))]
+        parts.extend(_pack_str(row[field]) for field in _WORD_TEXT_FIELDS)
+        parts.append(_U16.pack(len(syllable_ids)))
+        parts.append(struct.pack(f'>{len(syllable_ids)}I', *syllable_ids))
+        self._record(RECORD_WORD, b''.join(parts))
+        self.words += 1
+        self.links += len(syllable_ids)
+
+    def close(self):
+        self._record(RECORD_END, _END.pack(self.syllables, self.words, self.links))
+        self.stream.write(self._buffer)
+        self._buffer.clear()
+
+
+def read_archive(stream):
+    """
+    逐条读取归档记录
+
+    Yields:
+        tuple: ('syllable', {'id', 'syllable'}) 或 ('word', (单词字段字典, 音节 id 列表))
+
+    Raises:
+        ArchiveError: 文件头不正确、版本不支持、记录截断或计数不一致
+    """
+    header = stream.read(_HEADER.size)
+    if len(header) != _HEADER.size:
+        raise ArchiveError('文件过短，不是词库归档')
+    magic, version, _ = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ArchiveError('文件头不正确，不是词库归档')
+    if version > FORMAT_VERSION:
+        raise ArchiveError(f'不支持的归档版本: {version}（当前最高支持 {FORMAT_VERSION}）')
+
+    syllables = words = links = 0
+    while True:
+        head = stream.read(_RECORD.size)
+        if len(head) != _RECORD.size:
+            raise ArchiveError('归档不完整：缺少结束记录')
+        record_type, length = _RECORD.unpack(head)
+        payload = stream.read(length)
+        if len(payload) != length:
+            raise ArchiveError('归档不完整：记录被截断')
+
+        if record_type == RECORD_END:
+            expected = _END.unpack(payload[:_END.size])
+            if expected != (syllables, words, links):
+                raise ArchiveError(
+                    f'记录数不一致：结束记录为 {expected}，实际读取 {(syllables, words, links)}'
+                )
+            return
+        if record_type == RECORD_SYLLABLE:
+            reader = _Reader(payload)
+            (syllable_id,) = reader.unpack(_U32)
+            syllables += 1
+            yield 'syllable', {'id': syllable_id, 'syllable': reader.string()}
+        elif record_type == RECORD_WORD:
+            reader = _Reader(payload)
+            word_id, created_at, updated_at = reader.unpack(_WORD_HEAD)
+            row = {'id': word_id, 'created_at': _unpack_time(created_at),
+                   'updated_at': _unpack_time(updated_at)}
+            for field in _WORD_TEXT_FIELDS:
+                row[field] = reader.string()
+            (count,) = reader.unpack(_U16)
+            syllable_ids = list(reader.unpack(struct.Struct(f'>{count}I')))
+            words += 1
+            links += count
+            yield 'word', (row, syllable_ids)
+        # 其他类型：新版本增加的记录，跳过
+
+
+# ==================== 导出 ====================
+
+def export_dictionary(stream):
+    """
+    把词库写入归档流
+
+    按 id 分批读取，内存占用与词库大小无关。
+
+    Args:
+        stream: 以二进制方式打开的可写文件对象
+
+    Returns:
+        dict: 导出的音节数、单词数、关联数
+    """
+    writer = ArchiveWriter(stream)
+    connection = db.session.connection()
+
+    syllables = Syllable.__table__
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(syllables.c.id, syllables.c.syllable)
+            .where(syllables.c.id > last_id).order_by(syllables.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for syllable_id, syllable in rows:
+            writer.syllable(syllable_id, syllable)
+        last_id = rows[-1][0]
+
+    words = Word.__table__
+    links = WordSyllable.__table__
+    columns = [words.c.id, words.c.created_at, words.c.updated_at] + \
+        [words.c[field] for field in _WORD_TEXT_FIELDS]
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(*columns).where(words.c.id > last_id).order_by(words.c.id).limit(BATCH_SIZE)
+        ).mappings().all()
+        if not rows:
+            break
+        first_id, last_id = rows[0]['id'], rows[-1]['id']
+        syllables_by_word = {}
+        for word_id, syllable_id in connection.execute(
+            select(links.c.word_id, links.c.syllable_id)
+            .where(links.c.word_id.between(first_id, last_id))
+            .order_by(links.c.word_id, links.c.position)
+        ):
+            syllables_by_word.setdefault(word_id, []).append(syllable_id)
+        for row in rows:
+            writer.word(row, syllables_by_word.get(row['id'], []))
+
+    writer.close()
+    return {'syllables': writer.syllables, 'words': writer.words, 'links': writer.links}
+
+
+# ==================== 导入 ====================
+
+@contextmanager
+def deferred_constraints(connection):
+    """
+    批量导入期间推迟 / 关闭约束检查
+
+    SQLite: defer_foreign_keys，外键在提交时统一检查
+    MySQL: 当前会话关闭外键和唯一性检查（导入前已按文本去重）
+    PostgreSQL: 推迟所有可推迟的约束
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        connection.execute(text('PRAGMA defer_foreign_keys = ON'))
+        yield
+    elif dialect == 'mysql':
+        connection.execute(text('SET FOREIGN_KEY_CHECKS = 0'))
+        connection.execute(text('SET UNIQUE_CHECKS = 0'))
+        try:
+            yield
+        finally:
+            connection.execute(text('SET UNIQUE_CHECKS = 1'))
+            connection.execute(text('SET FOREIGN_KEY_CHECKS = 1'))
+    elif dialect == 'postgresql':
+        connection.execute(text('SET CONSTRAINTS ALL DEFERRED'))
+        yield
+    else:
+        yield
+
+
+def _reset_sequences(connection):
+    """显式写入 id 后，把 PostgreSQL 的自增序列推进到最大 id"""
+    if connection.dialect.name != 'postgresql':
+        return
+    for table in (Syllable.__table__, Word.__table__, WordSyllable.__table__):
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+        ))
+
+
+def import_dictionary(stream):
+    """
+    从归档流批量导入词库（不提交事务，由调用方提交）
+
+    目标库为空时保留原 id；否则按文本合并，已存在的音节和单词保持不变。
+
+    Args:
+        stream: 以二进制方式打开的可读文件对象
+
+    Returns:
+        dict: 新增的音节数、单词数、关联数，跳过的（已存在的）单词数，以及导入方式
+
+    Raises:
+        ArchiveError: 归档格式错误，或单词引用了不存在的音节
+    """
+    connection = db.session.connection()
+    syllables = Syllable.__table__
+    words = Word.__table__
+    links = WordSyllable.__table__
+
+    existing_syllables = dict(connection.execute(select(syllables.c.syllable, syllables.c.id)).all())
+    syllable_texts = {syllable_id: text for text, syllable_id in existing_syllables.items()}
+    existing_words = set(connection.execute(select(words.c.word)).scalars())
+    merge = bool(existing_syllables or existing_words)
+    next_syllable_id = (connection.execute(select(func.max(syllables.c.id))).scalar() or 0) + 1
+    next_word_id = (connection.execute(select(func.max(words.c.id))).scalar() or 0) + 1
+    now = datetime.utcnow()
+
+    # 归档中的音节 id -> 本地音节 id
+    syllable_map = {}
+    syllable_rows, word_rows, link_rows = [], [], []
+    stats = {'syllables': 0, 'words': 0, 'links': 0, 'skipped_words': 0,
+             'mode': 'merge' if merge else 'empty'}
+
+    def flush(force=False):
+        # 先写音节和单词，再写关联，保证外键引用的行已存在
+        for table, rows in ((syllables, syllable_rows), (words, word_rows), (links, link_rows)):
+            if rows and (force or len(rows) >= BATCH_SIZE or table is not links):
+                connection.execute(table.insert(), rows)
+                rows.clear()
+
+    with deferred_constraints(connection):
+        for kind, record in read_archive(stream):
+            if kind == 'syllable':
+                local_id = existing_syllables.get(record['syllable'])
+                if local_id is None:
+                    local_id = record['id'] if not merge else next_syllable_id
+                    next_syllable_id = max(next_syllable_id, local_id + 1)
+                    existing_syllables[record['syllable']] = local_id
+                    syllable_texts[local_id] = record['syllable']
+                    syllable_rows.append({'id': local_id, 'syllable': record['syllable'],
+                                          'created_at': now})
+                    stats['syllables'] += 1
+                syllable_map[record['id']] = local_id
+                if len(syllable_rows) >= BATCH_SIZE:
+                    flush()
+                continue
+
+            row, syllable_ids = record
+            if row['word'] in existing_words:
+                stats['skipped_words'] += 1
+                continue
+            existing_words.add(row['word'])
+            if merge:
+                row['id'] = next_word_id
+            next_word_id = max(next_word_id, row['id'] + 1)
+            if row['created_at'] is None:
+                row['created_at'] = now
+            if row['updated_at'] is None:
+                row['updated_at'] = row['created_at']
+            # 批量插入不经过 ORM 事件，在这里计算音标检索键
+            row.update(phonetic_keys(row['phonetic']))
+            word_rows.append(row)
+            local_ids = []
+            for position, syllable_id in enumerate(syllable_ids):
+                local_id = syllable_map.get(syllable_id)
+                if local_id is None:
+                    raise ArchiveError(f"单词 {row['word']} 引用了不存在的音节 id {syllable_id}")
+                local_ids.append(local_id)
+                link_rows.append({'word_id': row['id'], 'syllable_id': local_id,
+                                  'position': position, 'created_at': now})
+            row['syllable_list'] = encode_syllables(syllable_texts[local_id] for local_id in local_ids)
+            stats['words'] += 1
+            stats['links'] += len(syllable_ids)
+            if len(word_rows) >= BATCH_SIZE or len(link_rows) >= BATCH_SIZE:
+                flush()
+
+        flush(force=True)
+        _reset_sequences(connection)
+
+    # 批量写入不经过 ORM，不逐行记录变更：通知增量同步的客户端重新加载
+    if stats['words'] or stats['syllables']:
+        record_changes(connection, [(RESET, None, None)])
+
+    return stats
+
+
+# ==================== 命令行 ====================
+
+def _summary(stats):
+    return '，'.join(f'{key}={value}' for key, value in stats.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='词库导出 / 导入')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('export', help='导出词库').add_argument('path', help='输出文件（.gz 结尾时压缩）')
+    subparsers.add_parser('import', help='导入词库').add_argument('path', help='归档文件')
+    subparsers.add_parser('info', help='校验归档并显示记录数').add_argument('path', help='归档文件')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        if args.command == 'info':
+            counts = {'syllable': 0, 'word': 0}
+            with _open(args.path, 'rb') as f:
+                for kind, _ in read_archive(f):
+                    counts[kind] += 1
+            print(f"归档有效：{counts['syllable']} 个音节，{counts['word']} 个单词")
+            return 0
+
+        from app import app
+
+        with app.app_context():
+            db.create_all()
+            if args.command == 'export':
+                with _open(args.path, 'wb') as f:
+                    stats = export_dictionary(f)
+                db.session.rollback()
+            else:
+                with _open(args.path, 'rb') as f:
+                    try:
+                        stats = import_dictionary(f)
+                        db.session.commit()
+                    except Exception:
+                        db.session.rollback()
+                        raise
+    except (ArchiveError, OSError) as e:
+        print(f'✗ {e}', file=sys.stderr)
+        return 1
+
+    elapsed = time.perf_counter() - start
+    logger.info("词库%s完成", '导出' if args.command == 'export' else '导入',
+                extra={'path': args.path, 'elapsed_s': round(elapsed, 2), **stats})
+    size = os.path.getsize(args.path)
+    print(f'✓ {_summary(stats)}（{size / 1024:.0f} KB，{elapsed:.2f}s）')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+离线词库包 - 供浏览器插件下载的热门单词包，支持按版本增量更新
+
+词库包包含全站查询次数最多的 DICT_BUNDLE_SIZE 个单词（内容与单词详情接口一致：
+音节、音标、翻译、自然拼读、词根词缀）。插件在本地保存词库包，大部分查词直接在本地完成，
+只把查看事件和本地没有的单词发给服务器。
+
+版本：
+    每次重新计算词库包时记录 {单词ID: 单词内容哈希}，内容有变化时写入新版本
+    （dictionary_bundles 表）。客户端带上已有版本号请求时，与该版本的记录对比，
+    只返回新增/修改的单词和需要删除的单词ID；版本已被清理时返回完整词库包。
+    版本记录保存在数据库中，所有 worker 进程计算出的增量一致。
+
+词库包在进程内缓存 DICT_BUNDLE_REFRESH 秒，单词内容复用 json_fast 的单词片段缓存；
+响应带 ETag，经 compression.py 压缩后按 ETag 缓存，同一版本只压缩一次。
+
+环境变量：
+    DICT_BUNDLE_SIZE: 词库包单词数（默认 5000）
+    DICT_BUNDLE_REFRESH: 重新计算词库包的间隔，秒（默认 300）
+    DICT_BUNDLE_KEEP: 保留的历史版本数，更早的版本只能下载完整词库包（默认 20）
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from sqlalchemy import func
+
+from json_fast import word_fragments
+from logging_config import get_logger
+from models import db, Word, UserWordQuery, DictionaryBundle
+
+logger = get_logger('bundle')
+
+
+class BundleSnapshot:
+    """一个版本的词库包"""
+
+    __slots__ = ('version', 'members', 'fragments', 'built_at')
+
+    def __init__(self, version, members, fragments, built_at):
+        self.version = version
+        self.members = members        # {str(单词ID): 内容哈希}
+        self.fragments = fragments    # [(单词ID, Fragment)]，按查询次数从高到低
+        self.built_at = built_at
+
+    def full_payload(self):
+        return {
+            'version': self.version,
+            'full': True,
+            'count': len(self.fragments),
+            'words': [fragment for _, fragment in self.fragments],
+        }
+
+    def delta_payload(self, since, old_members):
+        upserts = [fragment for word_id, fragment in self.fragments
+                   if old_members.get(str(word_id)) != self.members[str(word_id)]]
+        removes = [int(word_id) for word_id in old_members if word_id not in self.members]
+        return {
+            'version': self.version,
+            'full': False,
+            'since': since,
+            'count': len(self.fragments),
+            'upserts': upserts,
+            'removes': removes,
+        }
+
+
+class DictionaryBundleService:
+    """词库包的计算、缓存和增量"""
+
+    def __init__(self):
+        self.size = int(os.getenv('DICT_BUNDLE_SIZE', '5000'))
+        self.refresh_seconds = float(os.getenv('DICT_BUNDLE_REFRESH', '300'))
+        self.keep_versions = max(1, int(os.getenv('DICT_BUNDLE_KEEP', '20')))
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _top_words(self):
+        """全站查询次数最多的单词，不足时按添加顺序补齐"""
+        ranked = db.session.query(UserWordQuery.word_id)\
+            .group_by(UserWordQuery.word_id)\
+            .order_by(func.sum(UserWordQuery.query_count).desc(), UserWordQuery.word_id)\
+            .limit(self.size).all()
+        word_ids = [word_id for (word_id,) in ranked]
+        if len(word_ids) < self.size:
+            # 在 Python 中排除已排名的单词（NOT IN 会绑定上千个参数），多取 len(word_ids) 个即可补齐
+            ranked_ids = set(word_ids)
+            query = db.session.query(Word.id).order_by(Word.id).limit(self.size + len(word_ids))
+            fill = [word_id for (word_id,) in query if word_id not in ranked_ids]
+            word_ids += fill[:self.size - len(word_ids)]
+
+        words_by_id = {}
+        for start in range(0, len(word_ids), 900):
+            chunk = word_ids[start:start + 900]
+            words_by_id.update((word.id, word) for word in Word.query.filter(Word.id.in_(chunk)))
+        return [words_by_id[word_id] for word_id in word_ids if word_id in words_by_id]
+
+    def _build(self):
+        words = self._top_words()
+        fragments = list(zip((word.id for word in words), word_fragments(words)))
+        members = {
+            str(word_id): hashlib.sha1(fragment.raw).hexdigest()[:12]
+            for word_id, fragment in fragments
+        }
+        content_hash = hashlib.sha1(
+            json.dumps(members, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+        latest = DictionaryBundle.query.order_by(DictionaryBundle.version.desc()).first()
+        if latest is not None and latest.content_hash == content_hash:
+            version = latest.version
+        else:
+            bundle = DictionaryBundle(
+                content_hash=content_hash,
+                members=json.dumps(members, separators=(',', ':')),
+                word_count=len(members)
+            )
+            db.session.add(bundle)
+            db.session.flush()
+            version = bundle.version
+            # 清理旧版本
+            DictionaryBundle.query\
+                .filter(DictionaryBundle.version <= version - self.keep_versions)\
+                .delete(synchronize_session=False)
+            db.session.commit()
+            logger.info("离线词库包新版本", extra={'version': version, 'words': len(members)})
+
+        return BundleSnapshot(version, members, fragments, time.time())
+
+    def current(self):
+        """当前版本的词库包（进程内缓存 DICT_BUNDLE_REFRESH 秒）"""
+        snapshot = self._snapshot
+        if snapshot is not None and time.time() - snapshot.built_at < self.refresh_seconds:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or time.time() - snapshot.built_at >= self.refresh_seconds:
+                snapshot = self._snapshot = self._build()
+        return snapshot
+
+    def payload(self, snapshot, since=None):
+        """
+        词库包响应内容
+
+        Args:
+            snapshot: current() 返回的词库包
+            since: 客户端已有的版本号，None 表示下载完整词库包
+
+        Returns:
+            dict: 完整词库包，或相对 since 的增量（since 版本已被清理时返回完整词库包）
+        """
+        if since is None or since > snapshot.version:
+            return snapshot.full_payload()
+        if since == snapshot.version:
+            return snapshot.delta_payload(since, snapshot.members)
+
+        old = db.session.get(DictionaryBundle, since)
+        if old is None:
+            return snapshot.full_payload()
+        return snapshot.delta_payload(since, json.loads(old.members))
+
+    def clear(self):
+        self._snapshot = None
+
+
+dictionary_bundle = DictionaryBundleService()
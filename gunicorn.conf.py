@@ -0,0 +1,37 @@
+"""
+gunicorn 配置 - 预加载应用并在 worker 之间共享预热好的缓存（见 startup.py）
+
+    gunicorn -c gunicorn.conf.py 'startup:create_app()'
+
+环境变量：
+    GUNICORN_WORKERS: worker 数（默认 4）
+    GUNICORN_THREADS: 每个 worker 的线程数（默认 4）
+    GUNICORN_BIND: 监听地址（默认 127.0.0.1:5000）
+    GUNICORN_PRELOAD: master 进程预加载应用并预热缓存（默认 true）
+"""
+import gc
+import os
+
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = 120
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+if preload_app:
+    # 加载应用期间不回收，避免在 worker 将要共享的内存页中留下空洞（fork 前 gc.freeze 后恢复）
+    gc.disable()
+
+
+def when_ready(server):
+    """master 进程已加载应用，开始 fork worker 之前"""
+    if server.cfg.preload_app:
+        from startup import before_fork
+        before_fork()
+
+
+def post_fork(server, worker):
+    """worker 进程 fork 之后、处理请求之前"""
+    if server.cfg.preload_app:
+        from startup import after_fork
+        after_fork()
@@ -0,0 +1,127 @@
+"""
+HTTP 缓存 - ETag / Cache-Control / 304 支持
+
+ETag 由数据版本（单词 id + updated_at、音节单词列表的数量和最新修改时间等）计算，
+不依赖响应体，因此可以在序列化之前判断 If-None-Match，命中时直接返回 304。
+
+响应被压缩时 ETag 会带上编码后缀（"<etag>-gzip"、"<etag>-br"，见 compression.py），
+判断 If-None-Match 时同时匹配未压缩和各压缩变体。
+
+环境变量：
+    PUBLIC_CACHE_MAX_AGE: 公开查询接口的缓存时间，秒（默认 300）
+"""
+import hashlib
+import os
+
+from flask import Response, request
+
+from compression import ENCODING_SUFFIXES, compressor, variant_etag
+from json_fast import jsonify
+
+# 需要登录的接口：浏览器可以缓存，但每次使用前必须用 ETag 重新验证，代理不缓存
+PRIVATE_REVALIDATE = 'private, no-cache'
+
+PUBLIC_CACHE_MAX_AGE = int(os.getenv('PUBLIC_CACHE_MAX_AGE', '300'))
+
+
+def public_cache_control(max_age=None):
+    """公开接口的 Cache-Control：浏览器、插件和反向代理都可以缓存"""
+    max_age = PUBLIC_CACHE_MAX_AGE if max_age is None else max_age
+    return f'public, max-age={max_age}, stale-while-revalidate={max_age}'
+
+
+def make_etag(*parts):
+    """由若干版本字段计算强 ETag"""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def word_version(word):
+    """单词内容的版本号（id + updated_at）"""
+    updated_at = word.updated_at.isoformat() if word.updated_at else ''
+    return f'{word.id}:{updated_at}'
+
+
+def matching_etag(etag):
+    """
+    返回 If-None-Match 中与 etag（或其压缩变体）匹配的那个 ETag，没有匹配时返回 None
+    """
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    if if_none_match.star_tag or if_none_match.contains_weak(etag):
+        return etag
+    for encoding in ENCODING_SUFFIXES:
+        candidate = variant_etag(etag, encoding)
+        if if_none_match.contains_weak(candidate):
+            return candidate
+    return None
+
+
+def _apply_headers(response, etag, cache_control, vary_auth):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    if vary_auth:
+        response.vary.add('Authorization')
+    return response
+
+
+def conditional_response(etag, build_response, mimetype, cache_control=PRIVATE_REVALIDATE,
+                         vary_auth=True):
+    """
+    带 ETag 的响应
+
+    If-None-Match 命中时直接返回 304；预压缩缓存命中时直接返回压缩结果。
+    这两种情况都不调用 build_response。
+
+    Args:
+        etag: 响应的 ETag（不含引号）
+        build_response: 无参函数，返回 Response
+        mimetype: 响应的 MIME 类型（用于预压缩缓存命中时构建响应）
+        cache_control: Cache-Control 头
+        vary_auth: 响应是否随 Authorization 变化
+
+    Returns:
+        Response
+    """
+    matched = matching_etag(etag)
+    if matched:
+        # 回传客户端持有的那个 ETag（可能是压缩变体）
+        response = Response(status=304)
+        return _apply_headers(response, matched, cache_control, vary_auth)
+
+    # 同一内容已压缩过：直接返回缓存的压缩结果，不构建响应体
+    response, served_etag = compressor.cached_response(etag, mimetype)
+    if response is not None:
+        return _apply_headers(response, served_etag, cache_control, vary_auth)
+
+    return _apply_headers(build_response(), etag, cache_control, vary_auth)
+
+
+def conditional_json(etag, build_payload, status=200, cache_control=PRIVATE_REVALIDATE,
+                     vary_auth=True):
+    """
+    带 ETag 的 JSON 响应
+
+    If-None-Match 命中或预压缩缓存命中时不调用 build_payload，也不做序列化。
+
+    Args:
+        etag: 响应的 ETag（不含引号）
+        build_payload: 无参函数，返回要序列化的字典（可以包含 json_fast.Fragment）
+        status: 未命中时的状态码
+        cache_control: Cache-Control 头
+        vary_auth: 响应是否随 Authorization 变化
+
+    Returns:
+        Response
+    """
+    def build_response():
+        response = jsonify(build_payload())
+        response.status_code = status
+        return response
+
+    response = conditional_response(etag, build_response, 'application/json',
+                                    cache_control=cache_control, vary_auth=vary_auth)
+    if response.status_code != 304:
+        response.status_code = status
+    return response
@@ -0,0 +1,257 @@
+"""
+快速 JSON 序列化
+
+- 后端可插拔：安装了 orjson 时使用 orjson，否则使用标准库 json（紧凑输出、不排序键）。
+  可通过 JSON_BACKEND=orjson/json 强制指定
+- jsonify(): 与 flask.jsonify 用法相同，直接序列化为 UTF-8 bytes，不做缩进和键排序
+- Fragment: 预先序列化好的 JSON 片段，组装响应时原样拼接
+- word_fragments(): 单词内容按 (id, updated_at) 缓存序列化结果，
+  单词列表直接拼接缓存的片段，不再逐个单词构建字典、查询音节、格式化时间
+
+环境变量：
+    JSON_BACKEND: orjson / json（默认自动选择）
+    WORD_FRAGMENT_CACHE_SIZE: 单词片段缓存条数（默认 20000，0 表示关闭）
+"""
+import dataclasses
+import decimal
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, time
+
+from flask import current_app
+
+from logging_config import get_logger
+from models import db, Syllable, WordSyllable, decode_syllables
+
+logger = get_logger('json')
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于部署环境
+    orjson = None
+
+
+def _default(obj):
+    """标准库和 orjson 都不支持的类型"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _orjson_dumps(obj):
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+_std_encoder = json.JSONEncoder(
+    ensure_ascii=False, separators=(',', ':'), default=_default
+)
+
+
+def _std_dumps(obj):
+    return _std_encoder.encode(obj).encode('utf-8')
+
+
+def _select_backend():
+    name = os.getenv('JSON_BACKEND', '').strip().lower()
+    if name == 'json' or (name != 'orjson' and orjson is None):
+        return 'json', _std_dumps
+    if orjson is None:
+        logger.warning("JSON_BACKEND=orjson 但未安装 orjson，使用标准库 json")
+        return 'json', _std_dumps
+    return 'orjson', _orjson_dumps
+
+
+BACKEND, _dumps = _select_backend()
+
+
+class Fragment:
+    """预先序列化好的 JSON 片段（bytes）"""
+
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def extend(self, **fields):
+        """
+        在对象片段末尾追加字段，返回新片段
+
+        例如单词片段加上当前用户的 query_count，无需重新序列化单词内容。
+        """
+        if not fields:
+            return self
+        extra = _dumps(fields)
+        if self.raw == b'{}':
+            return Fragment(extra)
+        return Fragment(self.raw[:-1] + b',' + extra[1:])
+
+
+def _compose(obj):
+    """逐层序列化，遇到 Fragment 时原样拼接"""
+    if isinstance(obj, Fragment):
+        return obj.raw
+    if isinstance(obj, dict):
+        return b'{' + b','.join(
+            _dumps(str(key)) + b':' + _encode(value) for key, value in obj.items()
+        ) + b'}'
+    if isinstance(obj, (list, tuple)):
+        return b'[' + b','.join(_encode(item) for item in obj) + b']'
+    return _dumps(obj)
+
+
+def _encode(obj):
+    if isinstance(obj, Fragment):
+        return obj.raw
+    if isinstance(obj, (dict, list, tuple)):
+        # 不含片段的子树仍由后端一次序列化
+        try:
+            return _dumps(obj)
+        except TypeError:
+            return _compose(obj)
+    return _dumps(obj)
+
+
+def dumps(obj):
+    """
+    序列化为 UTF-8 bytes
+
+    先整体交给后端序列化；对象中包含 Fragment 时后端会报类型错误，
+    此时改为逐层拼接（只有包含片段的外层容器会被拆开）。
+    """
+    try:
+        return _dumps(obj)
+    except TypeError:
+        return _compose(obj)
+
+
+def jsonify(*args, **kwargs):
+    """与 flask.jsonify 用法相同的快速版本"""
+    if args and kwargs:
+        raise TypeError('jsonify() behavior undefined when passed both args and kwargs')
+    if len(args) == 1:
+        data = args[0]
+    else:
+        data = args or kwargs
+
+    return current_app.response_class(
+        dumps(data) + b'\n', mimetype=current_app.config['JSONIFY_MIMETYPE']
+    )
+
+
+# ==================== 单词片段缓存 ====================
+
+class FragmentCache:
+    """线程安全的 LRU 片段缓存"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_many(self, keys):
+        """批量查询，只加锁一次；未命中的位置为 None"""
+        data = self._data
+        with self._lock:
+            values = [data.get(key) for key in keys]
+            for key, value in zip(keys, values):
+                if value is not None:
+                    data.move_to_end(key)
+            hit = sum(value is not None for value in values)
+            self.hits += hit
+            self.misses += len(values) - hit
+        return values
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+word_fragment_cache = FragmentCache(int(os.getenv('WORD_FRAGMENT_CACHE_SIZE', '20000')))
+
+
+def _word_key(word):
+    # updated_at 变化即视为新版本，旧版本的片段由 LRU 自然淘汰
+    return word.id, word.updated_at
+
+
+def word_fragments(words):
+    """
+    返回单词列表对应的 JSON 片段（内容与 Word.to_dict() 相同）
+
+    未命中缓存的单词直接读取 syllable_list；尚未回填的单词用一次查询批量加载音节。
+
+    Args:
+        words: Word 对象列表
+
+    Returns:
+        list: Fragment 列表，顺序与 words 一致
+    """
+    fragments = word_fragment_cache.get_many([_word_key(word) for word in words])
+    missing = [word for word, fragment in zip(words, fragments) if fragment is None]
+
+    if missing:
+        syllables_by_word = {
+            word.id: decode_syllables(word.syllable_list)
+            for word in missing if word.syllable_list is not None
+        }
+        # 尚未回填 syllable_list 的单词仍从关联表读取
+        unfilled = [word.id for word in missing if word.syllable_list is None]
+        if unfilled:
+            syllables_by_word.update((word_id, []) for word_id in unfilled)
+            # 分批查询，单条语句的参数不超过 900 个
+            for start in range(0, len(unfilled), 900):
+                rows = db.session.query(WordSyllable.word_id, Syllable.syllable)\
+                    .join(Syllable, Syllable.id == WordSyllable.syllable_id)\
+                    .filter(WordSyllable.word_id.in_(unfilled[start:start + 900]))\
+                    .order_by(WordSyllable.word_id, WordSyllable.position)
+                for word_id, syllable in rows:
+                    syllables_by_word[word_id].append(syllable)
+
+        built = {}
+        for word in missing:
+            fragment = Fragment(_dumps(word.to_dict(syllables=syllables_by_word[word.id])))
+            word_fragment_cache.put(_word_key(word), fragment)
+            built[word.id] = fragment
+        fragments = [fragment or built[word.id] for word, fragment in zip(words, fragments)]
+
+    return fragments
+
+
+def word_fragment(word, **extra):
+    """单个单词的 JSON 片段，可追加字段（如 query_count）"""
+    return word_fragments([word])[0].extend(**extra)
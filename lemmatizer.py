@@ -0,0 +1,317 @@
+"""
+词形还原 - 把屈折变化形式归并到原形单词
+
+"running"、"ran"、"runs" 不再各自调用 AI、各自成为一个单词，而是作为别名
+（word_aliases 表）指向原形 "run"：
+    1. 单词或别名已存在：直接返回
+    2. 本地规则：不规则变化表 + -s/-es/-ies、-ed/-ied、-ing 规则生成候选原形，
+       候选原形已在词库中时直接返回；不规则变化和 -s 形式同时写入别名，不调用 AI。
+       -ed/-ing 形式常常是有独立意义的单词（meaning、building、tired），规则命中只用于只读查询，
+       查询/添加单词时交给 AI 确认
+    3. 都没有命中时调用 AI，AI 返回的原形（lemma）与输入不同时保存原形，输入记为别名
+
+规则只在候选原形已存在于词库时生效，不会凭规则创造新单词；多个候选原形都在词库中时
+（noted: not / note）不按规则归并，交给 AI；容易误判的单词（news、always、evening 等）不做还原。
+
+已有的变形单词可以合并到原形：
+    python lemmatizer.py collapse          # 只列出将要合并的单词
+    python lemmatizer.py collapse --apply  # 合并：查询次数转移到原形，变形改为别名
+"""
+import argparse
+import sys
+
+from logging_config import get_logger
+from models import db, Word, WordAlias, UserWordQuery
+
+logger = get_logger('lemma')
+
+
+def _expand(table):
+    """{原形: '变形 变形 ...'} -> {变形: 原形}"""
+    return {form: lemma for lemma, forms in table.items() for form in forms.split()}
+
+
+# 不规则变化（过去式、过去分词、第三人称单数等）
+IRREGULAR_VERBS = {
+    'be': 'am is are was were been being', 'have': 'has had having', 'do': 'does did done doing',
+    'go': 'goes went gone going', 'arise': 'arose arisen', 'awake': 'awoke awoken',
+    'bear': 'bore borne born', 'beat': 'beaten', 'become': 'became', 'begin': 'began begun',
+    'bend': 'bent', 'bind': 'bound', 'bite': 'bit bitten', 'bleed': 'bled',
+    'blow': 'blew blown', 'break': 'broke broken', 'breed': 'bred', 'bring': 'brought',
+    'build': 'built', 'burn': 'burnt', 'buy': 'bought', 'catch': 'caught', 'choose': 'chose chosen',
+    'cling': 'clung', 'come': 'came', 'creep': 'crept', 'deal': 'dealt', 'dig': 'dug',
+    'draw': 'drew drawn', 'dream': 'dreamt', 'drink': 'drank drunk', 'drive': 'drove driven',
+    'eat': 'ate eaten', 'fall': 'fell fallen', 'feed': 'fed', 'feel': 'felt', 'fight': 'fought',
+    'find': 'found', 'flee': 'fled', 'fly': 'flew flown flies', 'forbid': 'forbade forbidden',
+    'forget': 'forgot forgotten', 'forgive': 'forgave forgiven', 'freeze': 'froze frozen',
+    'get': 'got gotten', 'give': 'gave given', 'grind': 'ground', 'grow': 'grew grown',
+    'hang': 'hung', 'hear': 'heard', 'hide': 'hid hidden', 'hold': 'held', 'keep': 'kept',
+    'kneel': 'knelt', 'know': 'knew known', 'lay': 'laid', 'lead': 'led', 'lean': 'leant',
+    'leap': 'leapt', 'learn': 'learnt', 'leave': 'left', 'lend': 'lent', 'lie': 'lay lain lying',
+    'light': 'lit', 'lose': 'lost', 'make': 'made', 'mean': 'meant', 'meet': 'met',
+    'mistake': 'mistook mistaken', 'overcome': 'overcame', 'pay': 'paid', 'prove': 'proven',
+    'ride': 'rode ridden', 'ring': 'rang rung', 'rise': 'rose risen', 'run': 'ran',
+    'say': 'said', 'see': 'saw seen', 'seek': 'sought', 'sell': 'sold', 'send': 'sent',
+    'sew': 'sewn', 'shake': 'shook shaken', 'shine': 'shone', 'shoot': 'shot', 'show': 'shown',
+    'shrink': 'shrank shrunk', 'sing': 'sang sung', 'sink': 'sank sunk', 'sit': 'sat',
+    'sleep': 'slept', 'slide': 'slid', 'speak': 'spoke spoken', 'speed': 'sped', 'spend': 'spent',
+    'spin': 'spun', 'spit': 'spat', 'spring': 'sprang sprung',
+    'stand': 'stood', 'steal': 'stole stolen', 'stick': 'stuck', 'sting': 'stung',
+    'stink': 'stank stunk', 'strike': 'struck stricken', 'strive': 'strove striven',
+    'swear': 'swore sworn', 'sweep': 'swept', 'swim': 'swam swum', 'swing': 'swung',
+    'take': 'took taken', 'teach': 'taught', 'tear': 'tore torn', 'tell': 'told',
+    'think': 'thought', 'throw': 'threw thrown', 'tread': 'trod trodden',
+    'understand': 'understood', 'undertake': 'undertook undertaken', 'wake': 'woke woken',
+    'wear': 'wore worn', 'weave': 'wove woven', 'weep': 'wept', 'win': 'won', 'wind': 'wound',
+    'withdraw': 'withdrew withdrawn', 'wring': 'wrung', 'write': 'wrote written',
+    'die': 'dies died dying', 'tie': 'ties tied tying', 'can': 'could', 'will': 'would',
+    'shall': 'should', 'may': 'might',
+}
+
+# 不规则复数
+IRREGULAR_PLURALS = {
+    'man': 'men', 'woman': 'women', 'child': 'children', 'person': 'people', 'foot': 'feet',
+    'tooth': 'teeth', 'goose': 'geese', 'mouse': 'mice', 'louse': 'lice', 'ox': 'oxen',
+    'die': 'dice', 'leaf': 'leaves', 'life': 'lives', 'knife': 'knives', 'wife': 'wives',
+    'half': 'halves', 'wolf': 'wolves', 'shelf': 'shelves', 'thief': 'thieves',
+    'loaf': 'loaves', 'calf': 'calves', 'self': 'selves', 'elf': 'elves',
+    'analysis': 'analyses', 'basis': 'bases', 'crisis': 'crises', 'thesis': 'theses',
+    'hypothesis': 'hypotheses', 'phenomenon': 'phenomena', 'criterion': 'criteria',
+    'datum': 'data', 'medium': 'media', 'bacterium': 'bacteria', 'curriculum': 'curricula',
+    'cactus': 'cacti', 'fungus': 'fungi', 'nucleus': 'nuclei', 'stimulus': 'stimuli',
+    'radius': 'radii', 'syllabus': 'syllabi', 'appendix': 'appendices', 'index': 'indices',
+    'matrix': 'matrices', 'vertex': 'vertices',
+}
+
+# 不规则比较级、最高级
+IRREGULAR_ADJECTIVES = {
+    'good': 'better best', 'bad': 'worse worst', 'far': 'farther farthest further furthest',
+    'little': 'less least', 'many': 'more most',
+}
+
+IRREGULAR = {}
+IRREGULAR.update(_expand(IRREGULAR_VERBS))
+IRREGULAR.update(_expand(IRREGULAR_PLURALS))
+IRREGULAR.update(_expand(IRREGULAR_ADJECTIVES))
+# 本身是常用单词的变形不归并（lay 是 lie 的过去式也是独立动词，依此类推）
+for _word in ('lay', 'left', 'found', 'bound', 'ground', 'wound', 'lit', 'bases', 'media',
+              'data', 'people', 'more', 'most', 'less', 'least', 'further', 'could', 'would',
+              'should', 'might', 'born', 'drunk', 'stricken', 'dice'):
+    IRREGULAR.pop(_word, None)
+
+# 以 s/ed/ing 结尾但不是变形的常见单词
+NOT_INFLECTED = frozenset('''
+    always news series species means physics politics economics mathematics statistics
+    ethics lens plus thus this perhaps whereas besides sometimes nevertheless afterwards
+    towards downstairs upstairs evening morning during nothing something anything
+    everything thing ceiling wedding according including regarding concerning pudding
+    sibling darling duckling hundred sacred naked wicked rugged ragged beloved crooked
+    dogged jagged kindred indeed exceed proceed succeed breed
+    meaning building feeling meeting painting beginning ending opening setting training
+    warning savings earnings interested tired learned aged advanced detailed limited
+    needed skilled talented
+'''.split())
+
+# 辅音双写后加 -ed/-ing 的结尾（stopped、running）；ll/ss/ff/zz 多为原形本身的结尾
+DOUBLED_KEEP = frozenset('lsfz')
+
+VOWELS = frozenset('aeiou')
+
+
+def ends_cvc(stem):
+    """词干以辅音-元音-辅音结尾（not、hop、writ）：去掉的多半是原形的 e（noted、hoping）"""
+    if len(stem) < 3:
+        return False
+    first, vowel, last = stem[-3:]
+    return (first not in VOWELS and vowel in VOWELS
+            and last not in VOWELS and last not in 'wxy')
+
+
+def lemma_candidates(word):
+    """
+    可能的原形（按可能性从高到低，不含单词本身）
+
+    Args:
+        word: 小写的单词
+
+    Returns:
+        list: 候选原形，不是变形时为空列表
+    """
+    if word in IRREGULAR:
+        return [IRREGULAR[word]]
+    if word.endswith("'s") and len(word) > 3:
+        return [word[:-2]]
+    if word in NOT_INFLECTED or len(word) < 4 or not word.isalpha():
+        return []
+
+    candidates = []
+
+    def add(candidate):
+        if len(candidate) >= 2 and candidate != word and candidate not in candidates:
+            candidates.append(candidate)
+
+    def add_stem(stem):
+        """去掉 -ed/-ing 后的词干：stopp -> stop，mak -> make，not -> note，walk -> walk"""
+        if len(stem) < 3:
+            return
+        if stem[-1] == stem[-2] and stem[-1] not in 'aeiouy':
+            if stem[-1] in DOUBLED_KEEP:
+                add(stem)
+                add(stem[:-1])
+            else:
+                add(stem[:-1])
+                add(stem)
+            return
+        if ends_cvc(stem):
+            add(stem + 'e')
+            add(stem)
+        else:
+            add(stem)
+            add(stem + 'e')
+
+    if word.endswith('ies') and len(word) > 4:
+        add(word[:-3] + 'y')
+    elif word.endswith(('ches', 'shes', 'sses', 'xes', 'zes', 'oes')):
+        add(word[:-2])
+        add(word[:-1])
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        add(word[:-1])
+
+    if word.endswith('ied') and len(word) > 4:
+        add(word[:-3] + 'y')
+    elif word.endswith('ed'):
+        add_stem(word[:-2])
+
+    if word.endswith('ing'):
+        add_stem(word[:-3])
+
+    return candidates
+
+
+def needs_confirmation(word):
+    """按 -ed/-ing 规则得到的原形需要 AI 确认后才能写入别名（不规则变化表除外）"""
+    return word not in IRREGULAR and word.endswith(('ed', 'ing'))
+
+
+def find_word(word_text, create_alias=False):
+    """
+    查找单词：原文、已有别名、本地规则得到的原形
+
+    Args:
+        word_text: 小写的单词
+        create_alias: 按规则命中原形时是否写入别名（不提交事务）；
+            为 True 时 -ed/-ing 形式不按规则返回（needs_confirmation），由调用方交给 AI
+
+    Returns:
+        tuple: (Word, 变形)，直接命中时变形为 None；都没有找到时返回 (None, None)
+    """
+    word = Word.query.filter_by(word=word_text).first()
+    if word:
+        return word, None
+
+    alias = WordAlias.query.filter_by(alias=word_text).first()
+    if alias:
+        return alias.word, word_text
+
+    candidates = lemma_candidates(word_text)
+    if not candidates:
+        return None, None
+    found = Word.query.filter(Word.word.in_(candidates)).all()
+    # 多个候选原形都在词库中时（noted: not / note）规则无法判断，交给 AI 返回原形
+    if len(found) != 1:
+        return None, None
+    if create_alias:
+        if needs_confirmation(word_text):
+            return None, None
+        add_alias(word_text, found[0])
+    return found[0], word_text
+
+
+def add_alias(alias_text, word):
+    """添加别名（不提交事务）"""
+    db.session.add(WordAlias(alias=alias_text, word_id=word.id))
+    logger.info("添加单词变形", extra={'alias': alias_text, 'word': word.word})
+
+
+# ==================== 合并已有的变形单词 ====================
+
+def find_variants():
+    """
+    词库中可以归并到原形的单词
+
+    Returns:
+        list: [(变形 Word, 原形 Word)]
+    """
+    words = {word.word: word for word in Word.query.order_by(Word.id)}
+    pairs = []
+    for text, word in words.items():
+        found = [candidate for candidate in lemma_candidates(text) if candidate in words]
+        # 多个候选原形都在词库中时无法判断，不合并
+        if len(found) != 1:
+            continue
+        # 原形本身也是变形时（链式）跳过，下次运行再处理
+        if not any(c in words for c in lemma_candidates(found[0])):
+            pairs.append((word, words[found[0]]))
+    return pairs
+
+
+def merge_variant(variant, lemma):
+    """把变形单词合并到原形：查询次数累加到原形，变形改为别名（不提交事务）"""
+    for query in UserWordQuery.query.filter_by(word_id=variant.id).all():
+        target = UserWordQuery.query.filter_by(user_id=query.user_id, word_id=lemma.id).first()
+        if target is None:
+            query.word_id = lemma.id
+            continue
+        target.query_count = (target.query_count or 0) + (query.query_count or 0)
+        if query.last_queried_at and (
+                target.last_queried_at is None or query.last_queried_at > target.last_queried_at):
+            target.last_queried_at = query.last_queried_at
+        db.session.delete(query)
+
+    db.session.flush()
+    WordAlias.query.filter_by(word_id=variant.id).update(
+        {'word_id': lemma.id}, synchronize_session=False)
+    variant_text = variant.word
+    db.session.delete(variant)
+    db.session.flush()
+    add_alias(variant_text, lemma)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='词形还原')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    collapse = subparsers.add_parser('collapse', help='把词库中的变形单词合并到原形')
+    collapse.add_argument('--apply', action='store_true', help='执行合并（默认只列出）')
+    check = subparsers.add_parser('check', help='显示单词的候选原形')
+    check.add_argument('words', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.command == 'check':
+        for word in args.words:
+            word = word.strip().lower()
+            print(f"{word} -> {', '.join(lemma_candidates(word)) or '（原形）'}")
+        return 0
+
+    from app import app
+
+    with app.app_context():
+        pairs = find_variants()
+        for variant, lemma in pairs:
+            print(f'{variant.word} -> {lemma.word}')
+        if not args.apply:
+            print(f'共 {len(pairs)} 个变形单词（加 --apply 执行合并）')
+            return 0
+        try:
+            for variant, lemma in pairs:
+                merge_variant(variant, lemma)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f'✗ 合并失败: {e}', file=sys.stderr)
+            return 1
+        print(f'✓ 已合并 {len(pairs)} 个变形单词')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+结构化日志配置 - 基于 QueueHandler/QueueListener 的非阻塞日志
+
+请求线程只负责把日志记录放入内存队列，格式化和写文件/标准输出都在
+后台监听线程中完成，请求线程不会因为日志 I/O 被阻塞。
+
+环境变量：
+    LOG_LEVEL: 日志级别（DEBUG/INFO/WARNING/ERROR，默认 INFO）
+    LOG_FORMAT: 输出格式（json 或 text，默认 json）
+    LOG_FILE: 日志文件路径（默认输出到 stderr）
+    LOG_SAMPLE_RATE: INFO 及以下级别日志的采样率（0~1，默认 1，即全部输出）
+    LOG_QUEUE_SIZE: 日志队列容量（默认 10000，队列满时丢弃日志而不是阻塞）
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+LOGGER_NAME = 'word_memory'
+
+# LogRecord 的标准属性，其余属性（通过 extra 传入）作为结构化字段输出
+_RESERVED_ATTRS = frozenset(
+    logging.LogRecord('', 0, '', 0, '', (), None).__dict__.keys()
+) | {'message', 'asctime', 'sample_rate'}
+
+_listener = None
+_queue_handler = None
+_listener_pid = None
+_atexit_registered = False
+
+
+class StructuredFormatter(logging.Formatter):
+    """结构化日志格式化器，输出 JSON 或 key=value 文本"""
+
+    def __init__(self, fmt_type='json'):
+        super().__init__()
+        self.fmt_type = fmt_type
+
+    def format(self, record):
+        fields = {
+            key: value for key, value in record.__dict__.items()
+            if key not in _RESERVED_ATTRS and not key.startswith('_')
+        }
+        timestamp = datetime.fromtimestamp(record.created, timezone.utc).isoformat()
+
+        if self.fmt_type == 'json':
+            entry = {
+                'ts': timestamp,
+                'level': record.levelname,
+                'logger': record.name,
+                'pid': record.process,
+                'msg': record.getMessage(),
+            }
+            entry.update(fields)
+            if record.exc_info:
+                entry['exc'] = self.formatException(record.exc_info)
+            return json.dumps(entry, ensure_ascii=False, default=str)
+
+        parts = [timestamp, record.levelname, record.name, record.getMessage()]
+        parts.extend(f'{key}={value}' for key, value in fields.items())
+        text = ' '.join(str(part) for part in parts)
+        if record.exc_info:
+            text += '\n' + self.formatException(record.exc_info)
+        return text
+
+
+class SamplingFilter(logging.Filter):
+    """
+    日志采样过滤器
+
+    WARNING 及以上级别始终保留；INFO/DEBUG 按采样率随机保留。
+    单条日志可以通过 extra={'sample_rate': 0.01} 覆盖全局采样率。
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = getattr(record, 'sample_rate', self.rate)
+        return rate >= 1.0 or random.random() < rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    非阻塞队列处理器
+
+    - 队列满时直接丢弃日志并计数，不阻塞请求线程
+    - 不在请求线程中格式化消息，格式化推迟到监听线程
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _build_target_handler(fmt_type):
+    """创建真正执行 I/O 的处理器（在监听线程中运行）"""
+    log_file = os.getenv('LOG_FILE')
+    if log_file:
+        handler = logging.FileHandler(log_file, encoding='utf-8')
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(StructuredFormatter(fmt_type))
+    return handler
+
+
+def setup_logging():
+    """
+    初始化日志系统（幂等）
+
+    在 fork 出的子进程（如 gunicorn worker）中再次调用时，
+    会为当前进程重新启动监听线程。
+
+    Returns:
+        logging.Logger: 应用根日志器
+    """
+    global _listener, _queue_handler, _listener_pid, _atexit_registered
+
+    logger = logging.getLogger(LOGGER_NAME)
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return logger
+
+    level_name = os.getenv('LOG_LEVEL', 'INFO').upper()
+    level = getattr(logging, level_name, logging.INFO)
+    fmt_type = os.getenv('LOG_FORMAT', 'json').lower()
+    sample_rate = float(os.getenv('LOG_SAMPLE_RATE', '1'))
+    queue_size = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+    # fork 之后父进程的监听线程不存在，丢弃旧的处理器重新创建
+    if _queue_handler is not None:
+        logger.removeHandler(_queue_handler)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, _build_target_handler(fmt_type), respect_handler_level=False
+    )
+    _listener.start()
+    _listener_pid = pid
+
+    if not _atexit_registered:
+        atexit.register(shutdown_logging)
+        _atexit_registered = True
+
+    logger.setLevel(level)
+    logger.addHandler(_queue_handler)
+    logger.propagate = False
+
+    return logger
+
+
+def shutdown_logging():
+    """停止监听线程，并把队列中剩余的日志写出"""
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+    _listener_pid = None
+
+
+def get_logger(name=None):
+    """
+    获取应用日志器
+
+    Args:
+        name: 子模块名称，例如 'deepseek'
+
+    Returns:
+        logging.Logger
+    """
+    if name:
+        return logging.getLogger(f'{LOGGER_NAME}.{name}')
+    return logging.getLogger(LOGGER_NAME)
+
+
+def get_dropped_count():
+    """返回因队列满而被丢弃的日志条数"""
+    return _queue_handler.dropped if _queue_handler is not None else 0
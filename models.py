@@ -1,11 +1,24 @@
 """
 数据库模型定义
 """
+import json
 from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 
-db = SQLAlchemy()
+from db_routing import RoutingSQLAlchemy
+from password_hashing import password_hasher
+
+# 支持只读副本路由（未配置副本时与普通 SQLAlchemy 行为一致）
+db = RoutingSQLAlchemy()
+
+
+def encode_syllables(syllables):
+    """有序音节列表 -> words.syllable_list 的 JSON 文本"""
+    return json.dumps(list(syllables), ensure_ascii=False, separators=(',', ':'))
+
+
+def decode_syllables(value):
+    """words.syllable_list 的 JSON 文本 -> 有序音节列表"""
+    return json.loads(value)
 
 
 class User(db.Model):
@@ -24,12 +37,16 @@ class User(db.Model):
     syllable_queries = db.relationship('UserSyllableQuery', backref='user', lazy='dynamic')
     
     def set_password(self, password):
-        """设置密码"""
-        self.password_hash = generate_password_hash(password)
+        """设置密码（在哈希进程池中计算）"""
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        """验证密码"""
-        return check_password_hash(self.password_hash, password)
+        """验证密码（在哈希进程池中计算）"""
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """密码哈希是否由旧的哈希参数生成"""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def to_dict(self):
         """转换为字典"""
@@ -51,6 +68,12 @@ class Word(db.Model):
     phonetic = db.Column(db.String(200))
     phonetic_analysis = db.Column(db.Text)  # 自然拼读解析
     root_affix = db.Column(db.Text)  # 词根词缀
+    # 音标检索键（由 phonetic_keys.py 在设置音标时计算）
+    rhyme_key = db.Column(db.String(50), index=True)  # 最后一个重读元音及之后的音素
+    onset_key = db.Column(db.String(20), index=True)  # 第一个元音之前的辅音
+    stress_pattern = db.Column(db.String(20), index=True)  # 每个音节的重音，如 2010
+    # 按位置排好序的音节（JSON 数组，与 word_syllables 在同一事务中写入；NULL 表示尚未回填）
+    syllable_list = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -58,9 +81,17 @@ class Word(db.Model):
     word_syllables = db.relationship('WordSyllable', backref='word', lazy='dynamic', 
                                      cascade='all, delete-orphan')
     user_queries = db.relationship('UserWordQuery', backref='word', lazy='dynamic')
+    aliases = db.relationship('WordAlias', backref='word', lazy='dynamic',
+                              cascade='all, delete-orphan')
     
-    def to_dict(self, include_syllables=True):
-        """转换为字典"""
+    def to_dict(self, include_syllables=True, syllables=None):
+        """
+        转换为字典
+        
+        Args:
+            include_syllables: 是否包含音节
+            syllables: 已按位置排好序的音节列表（批量加载时传入，避免逐个查询）
+        """
         result = {
             'id': self.id,
             'word': self.word,
@@ -72,12 +103,22 @@ class Word(db.Model):
         }
         
         if include_syllables:
-            # 按位置排序获取音节
-            syllables = [ws.syllable.syllable for ws in 
-                        sorted(self.word_syllables.all(), key=lambda x: x.position)]
-            result['syllables'] = syllables
+            if syllables is None:
+                syllables = self.ordered_syllables()
+            result['syllables'] = list(syllables)
         
         return result
+    
+    def set_syllables(self, syllables):
+        """保存有序音节的冗余副本（与 WordSyllable 行在同一事务中调用）"""
+        self.syllable_list = encode_syllables(syllables)
+    
+    def ordered_syllables(self):
+        """按位置排好序的音节：读取 syllable_list，尚未回填时查询关联表"""
+        if self.syllable_list is not None:
+            return decode_syllables(self.syllable_list)
+        return [ws.syllable.syllable for ws in 
+                sorted(self.word_syllables.all(), key=lambda x: x.position)]
 
 
 class Syllable(db.Model):
@@ -169,3 +210,100 @@ class UserSyllableQuery(db.Model):
             'last_queried_at': self.last_queried_at.isoformat() if self.last_queried_at else None
         }
 
+
+class DictionaryBundle(db.Model):
+    """离线词库包版本表（浏览器插件下载的热门单词包，用于计算增量更新）"""
+    __tablename__ = 'dictionary_bundles'
+    
+    version = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(40), nullable=False)
+    members = db.Column(db.Text, nullable=False)  # JSON：{单词ID: 单词内容哈希}
+    word_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ChangeLog(db.Model):
+    """变更日志（增量同步的游标来源，id 单调递增）"""
+    __tablename__ = 'change_log'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # word / word_query / syllable_query / reset
+    entity_id = db.Column(db.Integer)
+    user_id = db.Column(db.Integer, index=True)  # 用户计数器的所属用户，全局数据为空
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class RejectedWord(db.Model):
+    """非单词负缓存（AI 判定不是英文单词或获取失败的输入，到期前直接拒绝）"""
+    __tablename__ = 'rejected_words'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    word = db.Column(db.String(100), unique=True, nullable=False, index=True)
+    reason = db.Column(db.String(20), nullable=False)  # invalid / failed
+    failures = db.Column(db.Integer, nullable=False, default=1)  # 连续失败次数
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class WordAlias(db.Model):
+    """单词变形表（running / ran / runs -> run，查询变形时返回原形单词）"""
+    __tablename__ = 'word_aliases'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    alias = db.Column(db.String(100), unique=True, nullable=False, index=True)
+    word_id = db.Column(db.Integer, db.ForeignKey('words.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class QueryEvent(db.Model):
+    """查询事件流（只追加，批量写入；汇总到 query_rollups 后按保留期清理）"""
+    __tablename__ = 'query_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # 不加外键：单词删除或合并后事件仍然保留
+    user_id = db.Column(db.Integer, nullable=False)
+    word_id = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=1)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class QueryRollup(db.Model):
+    """按小时 / 天汇总的用户单词查询次数（UTC 时间桶）"""
+    __tablename__ = 'query_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    word_id = db.Column(db.Integer, nullable=False)
+    period = db.Column(db.String(4), nullable=False)  # hour / day
+    bucket = db.Column(db.DateTime, nullable=False)  # 时间桶的开始时间
+    query_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'period', 'bucket', 'word_id', name='uix_rollup_bucket'),
+        db.Index('ix_query_rollups_period_bucket', 'period', 'bucket'),
+    )
+
+
+class TrendingSketch(db.Model):
+    """热门单词检查点（每个 worker 进程、每个时间段的概要结构，见 trending.py）"""
+    __tablename__ = 'trending_sketches'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    node = db.Column(db.String(64), nullable=False)  # 主机名:进程号:随机后缀
+    epoch = db.Column(db.Integer, nullable=False, index=True)  # 时间段编号
+    data = db.Column(db.LargeBinary(length=16 * 1024 * 1024), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('node', 'epoch', name='uix_trending_node_epoch'),
+    )
+
+
+class SchemaVersion(db.Model):
+    """数据库结构版本（模型定义的哈希，与当前代码一致时启动跳过建表检查，见 startup.py）"""
+    __tablename__ = 'schema_versions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    schema_hash = db.Column(db.String(40), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
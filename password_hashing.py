@@ -0,0 +1,136 @@
+"""
+密码哈希 - 在独立进程池中计算 PBKDF2，避免注册/登录高峰占满 worker
+
+PBKDF2 是纯 CPU 计算，在请求线程中执行时会持有 GIL，同一 worker 内的其他线程
+（单词查询等）只能排队。这里把哈希计算交给每个 worker 进程各自的小进程池：
+    - 进程池大小固定（PASSWORD_HASH_WORKERS），同时执行的任务数有上限
+      （PASSWORD_HASH_MAX_CONCURRENCY），超出的请求排队；排队的请求也有上限
+      （PASSWORD_HASH_MAX_PENDING），队列已满或等待超时抛出 PasswordHashBusy，
+      登录请求不会占满 worker 的全部线程
+    - 可选择以较低优先级运行哈希进程（PASSWORD_HASH_NICE），CPU 紧张时优先处理查询
+    - 请求线程等待结果时释放 GIL，配合 gunicorn --threads，查询请求不受影响
+    - 哈希参数可配置；登录时发现旧参数生成的哈希会自动用新参数重新计算
+
+环境变量：
+    PASSWORD_HASH_METHOD: werkzeug 哈希方法（默认 pbkdf2:sha256:260000）
+    PASSWORD_SALT_LENGTH: 盐长度（默认 16）
+    PASSWORD_HASH_WORKERS: 每个 worker 的哈希进程数（默认 1，0 表示在请求线程中直接计算）
+    PASSWORD_HASH_MAX_CONCURRENCY: 每个 worker 同时执行的哈希任务上限（默认等于进程数）
+    PASSWORD_HASH_MAX_PENDING: 每个 worker 排队等待的哈希任务上限（默认 2）
+    PASSWORD_HASH_WAIT_TIMEOUT: 排队的最长时间，秒（默认 5）
+    PASSWORD_HASH_NICE: 哈希进程的 nice 增量（默认 0，即不调整）
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+)
+
+from logging_config import get_logger
+
+logger = get_logger('password')
+
+
+class PasswordHashBusy(Exception):
+    """哈希任务过多：排队已满或等待超时"""
+
+
+def _init_worker(nice):
+    """哈希进程初始化：降低调度优先级"""
+    if nice:
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+
+
+def normalize_method(method):
+    """补全 PBKDF2 的迭代次数（werkzeug 写入哈希时总是带迭代次数）"""
+    parts = method.split(':')
+    if parts[0] == 'pbkdf2' and len(parts) == 2:
+        parts.append(str(DEFAULT_PBKDF2_ITERATIONS))
+    return ':'.join(parts)
+
+
+class PasswordHasher:
+    """进程池密码哈希"""
+
+    def __init__(self):
+        self.method = normalize_method(os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000'))
+        self.salt_length = int(os.getenv('PASSWORD_SALT_LENGTH', '16'))
+        self.workers = int(os.getenv('PASSWORD_HASH_WORKERS', '1'))
+        self.max_concurrency = max(1, int(os.getenv(
+            'PASSWORD_HASH_MAX_CONCURRENCY', str(max(1, self.workers)))))
+        self.max_pending = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '2'))
+        self.wait_timeout = float(os.getenv('PASSWORD_HASH_WAIT_TIMEOUT', '5'))
+        self.nice = int(os.getenv('PASSWORD_HASH_NICE', '0'))
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._pending = 0
+
+    def _get_executor(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    # fork 出的 worker 不能复用父进程的进程池；使用 spawn 启动，
+                    # 子进程只导入 werkzeug.security，不会重新加载应用
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker, initargs=(self.nice,)
+                    )
+                    self._slots = threading.BoundedSemaphore(self.max_concurrency)
+                    self._pending = 0
+                    self._pid = pid
+        return self._executor
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+
+        executor = self._get_executor()
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            with self._lock:
+                if self._pending >= self.max_pending:
+                    raise PasswordHashBusy('密码校验繁忙，请稍后重试')
+                self._pending += 1
+            try:
+                acquired = slots.acquire(timeout=self.wait_timeout)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+            if not acquired:
+                logger.warning("密码哈希任务排队超时", extra={'max_concurrency': self.max_concurrency})
+                raise PasswordHashBusy('密码校验繁忙，请稍后重试')
+        try:
+            return executor.submit(func, *args).result()
+        finally:
+            slots.release()
+
+    def hash(self, password):
+        """按当前配置计算密码哈希"""
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        """校验密码"""
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """哈希是否由不同于当前配置的参数生成"""
+        return bool(pwhash) and pwhash.split('$', 1)[0] != self.method
+
+    def shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._pid = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,222 @@
+"""
+音标检索键 - 从 Word.phonetic（IPA）计算押韵、首音、重音模式
+
+    rhyme_key       最后一个重读元音及之后的音素（/ˌkɒnvəˈseɪʃn/ -> eɪʃn），押韵的单词相同
+    onset_key       第一个元音之前的辅音（/strɒŋ/ -> str，元音开头为空字符串）
+    stress_pattern  每个音节的重音：1 主重音、2 次重音、0 不重读（/ˌkɒnvəˈseɪʃn/ -> 2010）
+
+三个键保存在 words 表的索引列上，设置 Word.phonetic 时自动更新，
+按键查询直接走索引，不需要扫描所有音标。
+
+没有重音符号时：单音节词视为重读；多音节词的押韵键从最后一个元音开始。
+英美音标的常见差异（ɛ/e、oʊ/əʊ、ɝ/ɜː、ɡ/g 等）在计算前统一；第一个音节之后、阻塞音之后的
+ən/əl/əm 记作成音节辅音（/ˈneɪʃən/ 与 /ˈneɪʃn/ 相同），单独算一个不重读音节；
+第一个音节的 kən-/kəm- 等保留元音。
+
+用法：
+    python phonetic_keys.py backfill      # 为已有单词计算检索键
+    python phonetic_keys.py check /ˈneɪʃn/ /kənˈvɜːʃn/
+"""
+import argparse
+import re
+import sys
+
+from sqlalchemy import event, select
+
+from logging_config import get_logger
+from models import db, Word
+
+logger = get_logger('phonetic')
+
+RHYME = 'rhyme'
+ONSET = 'onset'
+STRESS = 'stress'
+
+# 检索方式 -> Word 的列
+KEY_COLUMNS = {
+    RHYME: 'rhyme_key',
+    ONSET: 'onset_key',
+    STRESS: 'stress_pattern',
+}
+
+PRIMARY = 'ˈ'
+SECONDARY = 'ˌ'
+
+# 统一英美音标写法和不同的字符
+_NORMALIZE = [
+    (':', 'ː'), ("'", PRIMARY), ('ɡ', 'g'), ('ɹ', 'r'), ('ɫ', 'l'), ('ɾ', 't'), ('ʳ', ''),
+    ('ɛ', 'e'), ('ɐ', 'ʌ'), ('ᵻ', 'ɪ'), ('ɝ', 'ɜː'), ('ɚ', 'ə'), ('oʊ', 'əʊ'), ('ɜr', 'ɜː'),
+]
+_DROP = re.compile(r'\([^)]*\)|[\s./\[\]\-‿ˑ\u0329\u030d]')
+_FIRST_TRANSCRIPTION = re.compile(r'/([^/]+)/')
+
+# 多字符元音（长的在前）
+_DIPHTHONGS = ('aɪə', 'aʊə', 'eɪ', 'aɪ', 'ɔɪ', 'əʊ', 'aʊ', 'ɪə', 'eə', 'ʊə')
+_VOWELS = set('iɪeæaɑɒɔoʊuʌəɜyøœɨʉ')
+_AFFRICATES = ('tʃ', 'dʒ')
+_OBSTRUENTS = set('pbtdkgfvθðszʃʒ') | set(_AFFRICATES)
+_SYLLABIC = set('nlm')
+_VOWEL_CLASS = ''.join(sorted(_VOWELS)) + 'ː'
+# 阻塞音之后、不接元音的 ən/əl/əm 统一写作成音节辅音（是否在第一个音节之后由 _drop_schwa 判断）
+_SCHWA_SYLLABIC = re.compile(
+    rf'(?<=[pbtdkgfvθðszʃʒ])ə(?=[nlm](?:$|[^{_VOWEL_CLASS}]))'
+)
+
+
+def _drop_schwa(match):
+    # 前面还没有元音时是第一个音节（kənˈvɜːʃn、kəmˈpjuːt），保留 ə
+    before = match.string[:match.start()]
+    return '' if any(char in _VOWELS for char in before) else match.group(0)
+
+
+def normalize(phonetic):
+    """取第一个音标并统一写法，无法识别时返回空字符串"""
+    if not phonetic:
+        return ''
+    match = _FIRST_TRANSCRIPTION.search(phonetic)
+    text = match.group(1) if match else re.split(r'[,;，；]', phonetic)[0]
+    for old, new in _NORMALIZE:
+        text = text.replace(old, new)
+    return _SCHWA_SYLLABIC.sub(_drop_schwa, _DROP.sub('', text))
+
+
+def tokenize(ipa):
+    """
+    拆分音素
+
+    Returns:
+        list: [(音素, 是否音节核心, 重音)]，音节核心为元音或成音节辅音，重音只对音节核心有意义（1/2/0）
+    """
+    tokens = []
+    stress = None
+    i = 0
+    while i < len(ipa):
+        char = ipa[i]
+        if char in (PRIMARY, SECONDARY):
+            stress = '1' if char == PRIMARY else '2'
+            i += 1
+            continue
+        if char in _VOWELS:
+            phoneme = next((d for d in _DIPHTHONGS if ipa.startswith(d, i)), char)
+            i += len(phoneme)
+            if phoneme == char and ipa.startswith('ː', i):
+                phoneme += 'ː'
+                i += 1
+            tokens.append((phoneme, True, stress or '0'))
+            stress = None
+            continue
+        phoneme = next((a for a in _AFFRICATES if ipa.startswith(a, i)), char)
+        i += len(phoneme)
+        if phoneme == 'ː':
+            continue
+        # 成音节辅音：元音之后的阻塞音 + n/l/m，且后面不接元音（/ˈbɒtl/、/ˈrɪðm/）
+        syllabic = (
+            phoneme in _SYLLABIC and len(tokens) >= 2 and tokens[-1][0] in _OBSTRUENTS
+            and any(vowel for _, vowel, _ in tokens) and (i >= len(ipa) or ipa[i] not in _VOWEL_CLASS)
+        )
+        tokens.append((phoneme, syllabic, '0' if syllabic else None))
+    return tokens
+
+
+def phonetic_keys(phonetic):
+    """
+    计算音标的检索键
+
+    Args:
+        phonetic: IPA 音标（如 /ˌkɒnvəˈseɪʃn/）
+
+    Returns:
+        dict: rhyme_key / onset_key / stress_pattern，音标为空或没有元音时全部为 None
+    """
+    tokens = tokenize(normalize(phonetic))
+    nuclei = [index for index, (_, vowel, _) in enumerate(tokens) if vowel]
+    if not nuclei:
+        return {'rhyme_key': None, 'onset_key': None, 'stress_pattern': None}
+
+    stresses = [tokens[index][2] for index in nuclei]
+    if len(nuclei) == 1 and stresses[0] == '0':
+        stresses = ['1']
+    # 押韵从最后一个主重音开始，其次最后一个次重音，都没有时从最后一个元音开始
+    start = nuclei[-1]
+    for mark in ('1', '2'):
+        marked = [index for index, stress in zip(nuclei, stresses) if stress == mark]
+        if marked:
+            start = marked[-1]
+            break
+
+    return {
+        'rhyme_key': ''.join(phoneme for phoneme, _, _ in tokens[start:])[:50],
+        'onset_key': ''.join(phoneme for phoneme, _, _ in tokens[:nuclei[0]])[:20],
+        'stress_pattern': ''.join(stresses)[:20],
+    }
+
+
+@event.listens_for(Word.phonetic, 'set')
+def _update_keys(word, value, oldvalue, initiator):
+    """设置音标时同步更新检索键"""
+    for column, key in phonetic_keys(value).items():
+        setattr(word, column, key)
+
+
+def backfill(batch_size=1000):
+    """
+    为检索键与音标不一致的单词重新计算（不提交事务）
+
+    Returns:
+        int: 更新的单词数
+    """
+    table = Word.__table__
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(table.c.id, table.c.phonetic, table.c.rhyme_key, table.c.onset_key,
+                   table.c.stress_pattern, table.c.updated_at)
+            .where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return updated
+        changes = []
+        for row in rows:
+            keys = phonetic_keys(row.phonetic)
+            if (row.rhyme_key, row.onset_key, row.stress_pattern) != (
+                    keys['rhyme_key'], keys['onset_key'], keys['stress_pattern']):
+                # 原样写回 updated_at，避免 onupdate 刷新（单词内容没有变化，缓存仍然有效）
+                changes.append({'id': row.id, 'updated_at': row.updated_at, **keys})
+        if changes:
+            db.session.bulk_update_mappings(Word, changes)
+        updated += len(changes)
+        last_id = rows[-1].id
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='音标检索键')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('backfill', help='为已有单词计算检索键')
+    check = subparsers.add_parser('check', help='显示音标的检索键')
+    check.add_argument('phonetics', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.command == 'check':
+        for phonetic in args.phonetics:
+            keys = phonetic_keys(phonetic)
+            print(f"{phonetic} -> 押韵 {keys['rhyme_key']}  首音 {keys['onset_key']!r}  "
+                  f"重音 {keys['stress_pattern']}")
+        return 0
+
+    from app import app
+
+    with app.app_context():
+        try:
+            updated = backfill()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f'✗ 计算失败: {e}', file=sys.stderr)
+            return 1
+        print(f'✓ 已更新 {updated} 个单词的检索键')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
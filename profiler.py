@@ -0,0 +1,190 @@
+"""
+请求级性能剖析 - 基于 cProfile 的按需/采样剖析
+
+开启方式（默认关闭，未设置 PROFILE_TOKEN 时完全不生效）：
+    - 单个请求：请求头 X-Profile: <PROFILE_TOKEN>
+    - 全局采样：PROFILE_SAMPLE_RATE=0.01（按 1% 的比例随机剖析）
+
+同一进程同一时间只剖析一个请求（多线程 worker 中重叠的请求不剖析：Python 3.12 起
+cProfile 基于 sys.monitoring，同时启用第二个剖析器会抛出 ValueError）。
+
+只保留耗时最长的 PROFILE_TOP_N 个请求的剖析结果（每个 worker 进程各自保留），
+可以通过受保护的 /api/debug/profiles 接口查看和下载（pstats 格式）。
+
+环境变量：
+    PROFILE_TOKEN: 访问令牌，同时用于开启单请求剖析和下载结果
+    PROFILE_SAMPLE_RATE: 全局采样率（0~1，默认 0）
+    PROFILE_TOP_N: 保留最慢的请求数（默认 20）
+"""
+import cProfile
+import hmac
+import heapq
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from datetime import datetime
+
+from flask import g, request
+
+from logging_config import get_logger
+
+logger = get_logger('profiler')
+
+# 文本摘要可用的排序字段
+SORT_KEYS = frozenset(key.value for key in pstats.SortKey)
+
+
+class ProfileRecord:
+    """一次请求的剖析结果"""
+
+    def __init__(self, record_id, method, path, status, duration, stats):
+        self.id = record_id
+        self.method = method
+        self.path = path
+        self.status = status
+        self.duration = duration
+        self.created_at = datetime.utcnow()
+        self.stats = stats
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'duration_ms': round(self.duration * 1000, 3),
+            'created_at': self.created_at.isoformat()
+        }
+
+    def pstats_bytes(self):
+        """返回与 pstats.Stats.dump_stats() 相同格式的二进制数据"""
+        return marshal.dumps(self.stats)
+
+    def summary_text(self, limit=40, sort='cumulative'):
+        """返回按指定字段（SORT_KEYS 之一）排序的文本摘要"""
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.stats = self.stats
+        stats.get_top_level_stats()
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+class RequestProfiler:
+    """
+    请求剖析器
+
+    通过 before_request/after_request 钩子包裹所有视图函数，
+    采样到的请求用 cProfile 记录，只保留耗时最长的 top_n 个。
+    """
+
+    def __init__(self, app=None):
+        self.token = None
+        self.sample_rate = 0.0
+        self.top_n = 20
+        self._heap = []
+        self._records = {}
+        self._lock = threading.Lock()
+        self._active = threading.Lock()  # 正在剖析的请求（每个进程最多一个）
+        self._seq = itertools.count(1)
+        self.skipped = 0
+        if app is not None:
+            self.init_app(app)
+
+    @property
+    def enabled(self):
+        return bool(self.token)
+
+    def init_app(self, app):
+        self.token = os.getenv('PROFILE_TOKEN') or None
+        self.sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+        self.top_n = max(1, int(os.getenv('PROFILE_TOP_N', '20')))
+
+        if not self.enabled:
+            return
+
+        app.before_request(self._start)
+        app.after_request(self._stop)
+        app.teardown_request(self._discard)
+        logger.info("请求剖析已开启", extra={
+            'sample_rate': self.sample_rate, 'top_n': self.top_n
+        })
+
+    def check_token(self, value):
+        """校验访问令牌（常量时间比较）"""
+        return self.enabled and bool(value) and hmac.compare_digest(value, self.token)
+
+    def _should_profile(self):
+        if self.check_token(request.headers.get('X-Profile')):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _start(self):
+        if request.path.startswith('/api/debug/') or not self._should_profile():
+            return
+        if not self._active.acquire(blocking=False):
+            # 其他线程正在剖析，本请求跳过
+            self.skipped += 1
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # 其他剖析器（如 python -m cProfile 启动的进程）已经启用
+            self._active.release()
+            self.skipped += 1
+            logger.debug("跳过请求剖析: %s", e)
+            return
+        g._profile = profile
+        g._profile_start = time.perf_counter()
+
+    def _finish(self, profile):
+        profile.disable()
+        self._active.release()
+
+    def _stop(self, response):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return response
+        self._finish(profile)
+        duration = time.perf_counter() - g.pop('_profile_start')
+        self._store(profile, request.method, request.path, response.status_code, duration)
+        return response
+
+    def _discard(self, exc):
+        # 视图抛出未处理异常时 after_request 不会执行，这里确保停止剖析
+        profile = g.pop('_profile', None)
+        if profile is not None:
+            self._finish(profile)
+
+    def _store(self, profile, method, path, status, duration):
+        with self._lock:
+            if len(self._heap) >= self.top_n and duration <= self._heap[0][0]:
+                return
+            profile.create_stats()
+            record = ProfileRecord(next(self._seq), method, path, status, duration, profile.stats)
+            if len(self._heap) >= self.top_n:
+                _, evicted_id = heapq.heappushpop(self._heap, (duration, record.id))
+                self._records.pop(evicted_id, None)
+            else:
+                heapq.heappush(self._heap, (duration, record.id))
+            self._records[record.id] = record
+
+    def list_records(self):
+        """按耗时从高到低返回所有保留的剖析结果"""
+        with self._lock:
+            records = list(self._records.values())
+        return sorted(records, key=lambda r: r.duration, reverse=True)
+
+    def get_record(self, record_id):
+        with self._lock:
+            return self._records.get(record_id)
+
+
+request_profiler = RequestProfiler()
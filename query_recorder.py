@@ -0,0 +1,299 @@
+"""
+查询次数记录
+
+- apply_query_counts(): 原子地累加用户的单词/音节查询次数
+  （INSERT ... ON CONFLICT DO UPDATE SET query_count = query_count + n），
+  并发请求不会互相覆盖，也不会因为同时插入同一行而触发唯一约束错误；
+  变化的计数器同时写入变更日志（delta_sync），查询事件追加到事件流（query_rollup），
+  事务提交后再更新热门单词的概要结构（trending，回滚的计数不计入）
+- QueryEventRecorder: 后台线程批量应用前端/插件上报的查看事件，
+  读接口因此不再承担写入，可以走只读副本并被 ETag 缓存；
+  同一线程定期把事件流汇总成小时/天时间桶，并写入热门单词检查点（trending）
+
+环境变量：
+    QUERY_EVENT_FLUSH_INTERVAL: 后台写入间隔，秒（默认 1）
+    QUERY_EVENT_QUEUE_SIZE: 待写入事件队列长度，满时拒绝新事件（默认 10000）
+    QUERY_EVENT_MAX_BATCH: 单次上报的最大事件数（默认 500）
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from db_routing import RoutingSession
+from models import db, WordSyllable, UserWordQuery, UserSyllableQuery
+from delta_sync import record_changes, WORD_QUERY, SYLLABLE_QUERY
+from query_rollup import record_query_events, maybe_rollup
+from trending import trending_tracker
+from logging_config import get_logger
+
+logger = get_logger('query_recorder')
+
+MAX_EVENT_COUNT = 100  # 单个事件最多累加的次数
+PENDING_TRENDING = 'pending_trending'  # session.info 中待提交的热门单词计数
+
+
+def _upsert_statement(table, key_column):
+    """按数据库方言生成“插入或累加”语句，不支持的方言返回 None"""
+    dialect = db.engine.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        module = sqlite if dialect == 'sqlite' else postgresql
+        stmt = module.insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=['user_id', key_column],
+            set_={
+                'query_count': table.c.query_count + stmt.excluded.query_count,
+                'last_queried_at': stmt.excluded.last_queried_at,
+            }
+        )
+
+    if dialect == 'mysql':
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(
+            query_count=table.c.query_count + stmt.inserted.query_count,
+            last_queried_at=stmt.inserted.last_queried_at,
+        )
+
+    return None
+
+
+def _increment(table, key_column, counts, now):
+    """
+    把 counts 累加到查询次数表
+
+    Args:
+        table: user_word_queries / user_syllable_queries 表
+        key_column: word_id / syllable_id
+        counts: {(user_id, key_id): 次数}
+        now: 查询时间
+    """
+    if not counts:
+        return
+
+    # 按主键顺序写入，减少并发事务之间的死锁
+    rows = [
+        {'user_id': user_id, key_column: key_id, 'query_count': count,
+         'last_queried_at': now, 'created_at': now}
+        for (user_id, key_id), count in sorted(counts.items())
+    ]
+
+    stmt = _upsert_statement(table, key_column)
+    if stmt is not None:
+        db.session.execute(stmt, rows)
+        return
+
+    # 其他数据库：先原子累加，不存在时再插入
+    for row in rows:
+        result = db.session.execute(
+            table.update()
+            .where(table.c.user_id == row['user_id'], table.c[key_column] == row[key_column])
+            .values(query_count=table.c.query_count + row['query_count'],
+                    last_queried_at=now)
+        )
+        if not result.rowcount:
+            db.session.execute(table.insert().values(**row))
+
+
+def apply_query_counts(word_counts):
+    """
+    累加单词查询次数及其音节的查询次数（不提交事务）
+
+    Args:
+        word_counts: {(user_id, word_id): 次数}
+    """
+    word_counts = {key: count for key, count in word_counts.items() if count > 0}
+    if not word_counts:
+        return
+
+    word_ids = {word_id for _, word_id in word_counts}
+    links = db.session.query(WordSyllable.word_id, WordSyllable.syllable_id).filter(
+        WordSyllable.word_id.in_(word_ids)
+    ).all()
+
+    syllables_by_word = {}
+    for word_id, syllable_id in links:
+        syllables_by_word.setdefault(word_id, []).append(syllable_id)
+
+    # 与之前逐条记录一致：单词中出现几次的音节就累加几次
+    syllable_counts = Counter()
+    for (user_id, word_id), count in word_counts.items():
+        for syllable_id in syllables_by_word.get(word_id, ()):
+            syllable_counts[(user_id, syllable_id)] += count
+
+    now = datetime.utcnow()
+    _increment(UserWordQuery.__table__, 'word_id', word_counts, now)
+    _increment(UserSyllableQuery.__table__, 'syllable_id', syllable_counts, now)
+
+    # 批量语句不经过 ORM flush，显式记录变更（DML 语句始终路由到主库）
+    changes = [(WORD_QUERY, word_id, user_id) for user_id, word_id in word_counts]
+    changes += [(SYLLABLE_QUERY, syllable_id, user_id) for user_id, syllable_id in syllable_counts]
+    record_changes(db.session, changes, now)
+    record_query_events(db.session, word_counts, now)
+    db.session.info.setdefault(PENDING_TRENDING, Counter()).update(word_counts)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_trending(session):
+    pending = session.info.pop(PENDING_TRENDING, None)
+    if pending:
+        trending_tracker.record(pending)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _discard_trending(session, transaction):
+    # 回滚（或未提交就关闭）的事务：计数没有写入数据库，热门单词也不计入
+    if transaction.parent is None:
+        session.info.pop(PENDING_TRENDING, None)
+
+
+def get_query_count(user_id, word_id):
+    """返回用户查询某个单词的次数"""
+    count = db.session.query(UserWordQuery.query_count).filter_by(
+        user_id=user_id, word_id=word_id
+    ).scalar()
+    return count or 0
+
+
+def record_word_query(user_id, word_id, count=1):
+    """
+    同步记录一次单词查询（不提交事务）
+
+    Returns:
+        int: 记录后的查询次数
+    """
+    apply_query_counts({(user_id, word_id): count})
+    return get_query_count(user_id, word_id)
+
+
+class QueryEventRecorder:
+    """
+    查看事件的异步写入器
+
+    请求线程只把事件放入内存队列，后台线程每隔 flush_interval 秒
+    合并同一用户同一单词的事件，在一个事务中批量累加。
+    每个 worker 进程各自维护队列和线程（fork 后自动重新启动）。
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.flush_interval = 1.0
+        self.queue_size = 10000
+        self.max_batch = 500
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.dropped = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = float(os.getenv('QUERY_EVENT_FLUSH_INTERVAL', '1'))
+        self.queue_size = int(os.getenv('QUERY_EVENT_QUEUE_SIZE', '10000'))
+        self.max_batch = int(os.getenv('QUERY_EVENT_MAX_BATCH', '500'))
+        # 每个处理请求的 worker 都启动后台线程（即使没有上报事件也要定期汇总）
+        app.before_request(self._ensure_started)
+        atexit.register(self.shutdown)
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            # fork 出的子进程不会继承父进程的线程，这里重新创建队列和线程
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._stop = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, name='query-event-recorder', daemon=True
+            )
+            self._pid = pid
+            self._thread.start()
+
+    def submit(self, user_id, word_counts):
+        """
+        提交查看事件
+
+        Args:
+            user_id: 用户ID
+            word_counts: {word_id: 次数}
+
+        Returns:
+            bool: 队列已满时返回 False
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((user_id, dict(word_counts)))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("查询事件队列已满，事件被拒绝", extra={'user_id': user_id})
+            return False
+
+    def _drain(self):
+        counts = Counter()
+        while True:
+            try:
+                user_id, word_counts = self._queue.get_nowait()
+            except queue.Empty:
+                return counts
+            for word_id, count in word_counts.items():
+                counts[(user_id, word_id)] += count
+
+    def flush(self):
+        """把队列中的事件写入数据库，返回写入的 (用户, 单词) 组合数"""
+        if self._queue is None or self._pid != os.getpid():
+            return 0
+        counts = self._drain()
+        if not counts:
+            return 0
+
+        with self.app.app_context():
+            try:
+                apply_query_counts(counts)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error("查询事件写入失败", extra={'pairs': len(counts), 'error': str(e)})
+                return 0
+            finally:
+                db.session.remove()
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("查询事件已写入 pairs=%d", len(counts))
+        return len(counts)
+
+    def maintain(self):
+        """到了各自的间隔时汇总事件流、写入热门单词检查点"""
+        with self.app.app_context():
+            try:
+                maybe_rollup()
+                trending_tracker.maybe_checkpoint()
+            finally:
+                db.session.remove()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+            self.maintain()
+
+    def shutdown(self):
+        """停止后台线程，并写入剩余事件"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+query_event_recorder = QueryEventRecorder()
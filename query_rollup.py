@@ -0,0 +1,278 @@
+"""
+查询事件流与时间桶汇总
+
+- record_query_events(): 累加查询次数时在同一事务中批量追加查询事件（query_events，只追加）
+- rollup(): 把最近的事件汇总成每个用户、每个单词的小时桶，再由小时桶汇总成天桶（query_rollups）。
+  涉及的时间桶先删除再重新计算，重复执行结果相同
+- prune(): 按保留期清理原始事件和过期的时间桶
+- window_*(): “最近 N 天”的单词/音节排行、概览和活跃度曲线，只读汇总表
+
+汇总在每个 worker 的查询事件后台线程中执行（至多每 QUERY_ROLLUP_INTERVAL 秒一次），
+按时间窗口的统计因此最多延迟这么久。时间桶按 UTC 划分。
+
+环境变量：
+    QUERY_ROLLUP_INTERVAL: 汇总间隔，秒（默认 60，0 表示不汇总）
+    QUERY_ROLLUP_LOOKBACK: 每次至少重新计算的回溯时间，秒（默认 600，需大于事件写入延迟）
+    QUERY_EVENT_RETENTION_DAYS: 原始事件保留天数（默认 7）
+    QUERY_ROLLUP_HOURLY_DAYS: 小时桶保留天数（默认 14）
+    QUERY_ROLLUP_DAILY_DAYS: 天桶保留天数，也是 days 参数的上限（默认 400）
+"""
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from logging_config import get_logger
+from models import db, QueryEvent, QueryRollup, Word, Syllable, WordSyllable
+
+logger = get_logger('rollup')
+
+HOUR = 'hour'
+DAY = 'day'
+
+ROLLUP_INTERVAL = float(os.getenv('QUERY_ROLLUP_INTERVAL', '60'))
+LOOKBACK = float(os.getenv('QUERY_ROLLUP_LOOKBACK', '600'))
+EVENT_RETENTION_DAYS = float(os.getenv('QUERY_EVENT_RETENTION_DAYS', '7'))
+# 天桶由小时桶重新计算，小时桶至少保留两天
+HOURLY_DAYS = max(2, int(os.getenv('QUERY_ROLLUP_HOURLY_DAYS', '14')))
+DAILY_DAYS = int(os.getenv('QUERY_ROLLUP_DAILY_DAYS', '400'))
+
+BATCH_SIZE = 1000
+
+
+def floor_hour(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value):
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def record_query_events(executor, word_counts, now):
+    """
+    批量追加查询事件（不提交事务）
+
+    Args:
+        executor: Session 或 Connection
+        word_counts: {(user_id, word_id): 次数}
+        now: 查询时间
+    """
+    rows = [
+        {'user_id': user_id, 'word_id': word_id, 'count': count, 'created_at': now}
+        for (user_id, word_id), count in sorted(word_counts.items())
+    ]
+    if rows:
+        executor.execute(QueryEvent.__table__.insert(), rows)
+
+
+# ==================== 汇总 ====================
+
+def _replace_buckets(period, start, counts):
+    """删除 start 之后的时间桶，写入重新计算的结果"""
+    table = QueryRollup.__table__
+    db.session.execute(table.delete().where(table.c.period == period, table.c.bucket >= start))
+    rows = [
+        {'user_id': user_id, 'word_id': word_id, 'period': period, 'bucket': bucket,
+         'query_count': count}
+        for (user_id, word_id, bucket), count in sorted(counts.items())
+    ]
+    for offset in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(table.insert(), rows[offset:offset + BATCH_SIZE])
+
+
+def rollup(now=None):
+    """
+    重新计算最近的小时桶和天桶（不提交事务）
+
+    从最新的小时桶和 now - LOOKBACK 中较早的一个开始，之前的时间桶视为已完成。
+
+    Returns:
+        int: 写入的小时桶行数
+    """
+    now = now or datetime.utcnow()
+    events = QueryEvent.__table__
+    rollups = QueryRollup.__table__
+
+    latest = db.session.execute(
+        select(func.max(rollups.c.bucket)).where(rollups.c.period == HOUR)
+    ).scalar()
+    if latest is None:
+        # 首次汇总：从最早的事件开始
+        latest = db.session.execute(select(func.min(events.c.created_at))).scalar()
+        if latest is None:
+            return 0
+    start = floor_hour(min(latest, now - timedelta(seconds=LOOKBACK)))
+
+    hourly = Counter()
+    rows = db.session.execute(
+        select(events.c.user_id, events.c.word_id, events.c.count, events.c.created_at)
+        .where(events.c.created_at >= start)
+    )
+    for user_id, word_id, count, created_at in rows:
+        hourly[(user_id, word_id, floor_hour(created_at))] += count
+    _replace_buckets(HOUR, start, hourly)
+
+    day_start = floor_day(start)
+    daily = Counter()
+    rows = db.session.execute(
+        select(rollups.c.user_id, rollups.c.word_id, rollups.c.bucket, rollups.c.query_count)
+        .where(rollups.c.period == HOUR, rollups.c.bucket >= day_start)
+    )
+    for user_id, word_id, bucket, count in rows:
+        daily[(user_id, word_id, floor_day(bucket))] += count
+    _replace_buckets(DAY, day_start, daily)
+    return len(hourly)
+
+
+def prune(now=None):
+    """
+    清理过期的原始事件和时间桶（不提交事务）
+
+    原始事件只清理已经汇总过的部分（早于最新的小时桶）。
+
+    Returns:
+        dict: 各类删除的行数
+    """
+    now = now or datetime.utcnow()
+    events = QueryEvent.__table__
+    rollups = QueryRollup.__table__
+
+    deleted = {'events': 0, 'hourly': 0, 'daily': 0}
+    latest = db.session.execute(
+        select(func.max(rollups.c.bucket)).where(rollups.c.period == HOUR)
+    ).scalar()
+    if latest is not None:
+        cutoff = min(now - timedelta(days=EVENT_RETENTION_DAYS), latest)
+        deleted['events'] = db.session.execute(
+            events.delete().where(events.c.created_at < cutoff)
+        ).rowcount
+    deleted['hourly'] = db.session.execute(rollups.delete().where(
+        rollups.c.period == HOUR, rollups.c.bucket < floor_day(now) - timedelta(days=HOURLY_DAYS)
+    )).rowcount
+    deleted['daily'] = db.session.execute(rollups.delete().where(
+        rollups.c.period == DAY, rollups.c.bucket < floor_day(now) - timedelta(days=DAILY_DAYS)
+    )).rowcount
+    return deleted
+
+
+_last_rollup = 0.0
+_rollup_lock = threading.Lock()
+
+
+def maybe_rollup():
+    """每个进程每 ROLLUP_INTERVAL 秒最多汇总一次（需要应用上下文）"""
+    global _last_rollup
+    if ROLLUP_INTERVAL <= 0 or time.time() - _last_rollup < ROLLUP_INTERVAL:
+        return
+    with _rollup_lock:
+        if time.time() - _last_rollup < ROLLUP_INTERVAL:
+            return
+        _last_rollup = time.time()
+    try:
+        buckets = rollup()
+        deleted = prune()
+        db.session.commit()
+        if any(deleted.values()):
+            logger.info("已清理过期查询事件和时间桶", extra=deleted)
+        logger.debug("查询事件已汇总 buckets=%d", buckets)
+    except Exception as e:
+        # 多个 worker 同时汇总时可能冲突，下次重新计算即可
+        db.session.rollback()
+        logger.warning("汇总查询事件失败: %s", e)
+
+
+# ==================== 按时间窗口统计 ====================
+
+def window_start(days, now=None):
+    """最近 days 天（含今天）的第一个天桶"""
+    return floor_day(now or datetime.utcnow()) - timedelta(days=days - 1)
+
+
+def _daily(user_id, days):
+    return db.session.query(QueryRollup).filter(
+        QueryRollup.user_id == user_id,
+        QueryRollup.period == DAY,
+        QueryRollup.bucket >= window_start(days)
+    )
+
+
+def window_word_stats(user_id, days, limit):
+    """最近 days 天查询次数最多的单词"""
+    total = func.sum(QueryRollup.query_count).label('query_count')
+    rows = _daily(user_id, days)\
+        .join(Word, Word.id == QueryRollup.word_id)\
+        .with_entities(QueryRollup.word_id, Word.word, total, func.max(QueryRollup.bucket))\
+        .group_by(QueryRollup.word_id, Word.word)\
+        .order_by(total.desc(), QueryRollup.word_id)\
+        .limit(limit)
+    return [
+        {'user_id': user_id, 'word_id': word_id, 'word': word, 'query_count': int(count),
+         'last_queried_at': last.isoformat()}
+        for word_id, word, count, last in rows
+    ]
+
+
+def window_syllable_stats(user_id, days, limit):
+    """最近 days 天查询次数最多的音节（单词中出现几次的音节就计几次）"""
+    total = func.sum(QueryRollup.query_count).label('query_count')
+    rows = _daily(user_id, days)\
+        .join(WordSyllable, WordSyllable.word_id == QueryRollup.word_id)\
+        .join(Syllable, Syllable.id == WordSyllable.syllable_id)\
+        .with_entities(Syllable.id, Syllable.syllable, total, func.max(QueryRollup.bucket))\
+        .group_by(Syllable.id, Syllable.syllable)\
+        .order_by(total.desc(), Syllable.id)\
+        .limit(limit)
+    return [
+        {'user_id': user_id, 'syllable_id': syllable_id, 'syllable': syllable,
+         'query_count': int(count), 'last_queried_at': last.isoformat()}
+        for syllable_id, syllable, count, last in rows
+    ]
+
+
+def window_overview(user_id, days):
+    """最近 days 天的查询总数和不同单词/音节数"""
+    words = _daily(user_id, days).with_entities(
+        func.sum(QueryRollup.query_count), func.count(func.distinct(QueryRollup.word_id))
+    ).one()
+    syllables = _daily(user_id, days)\
+        .join(WordSyllable, WordSyllable.word_id == QueryRollup.word_id)\
+        .with_entities(func.sum(QueryRollup.query_count),
+                       func.count(func.distinct(WordSyllable.syllable_id)))\
+        .one()
+    return {
+        'total_word_queries': int(words[0] or 0),
+        'unique_words_queried': words[1],
+        'total_syllable_queries': int(syllables[0] or 0),
+        'unique_syllables_queried': syllables[1],
+    }
+
+
+def activity(user_id, days, period=DAY):
+    """
+    每个时间桶的查询次数（没有查询的时间桶为 0）
+
+    Returns:
+        list: [{'bucket': ISO 时间, 'query_count': 次数}]，按时间从早到晚
+    """
+    now = datetime.utcnow()
+    if period == HOUR:
+        step = timedelta(hours=1)
+        first = floor_hour(now) - timedelta(hours=days * 24 - 1)
+    else:
+        step = timedelta(days=1)
+        first = window_start(days, now)
+    rows = db.session.query(QueryRollup.bucket, func.sum(QueryRollup.query_count))\
+        .filter(QueryRollup.user_id == user_id, QueryRollup.period == period,
+                QueryRollup.bucket >= first)\
+        .group_by(QueryRollup.bucket)
+    counts = {bucket: int(count) for bucket, count in rows}
+
+    series = []
+    bucket = first
+    while bucket <= now:
+        series.append({'bucket': bucket.isoformat(), 'query_count': counts.get(bucket, 0)})
+        bucket += step
+    return series
@@ -0,0 +1,189 @@
+"""
+自适应限流 - 控制调用外部 API（DeepSeek）的速率和并发
+
+两层控制：
+    - 令牌桶：平均速率不超过 DEEPSEEK_RATE_LIMIT 次/秒，允许 DEEPSEEK_BURST 次突发
+    - AIMD 并发上限：请求成功且并发已用满时上限加 1/上限（约每轮加 1），
+      被限流（429/503）时上限减半，最低 DEEPSEEK_MIN_CONCURRENCY，最高 DEEPSEEK_MAX_CONCURRENCY。
+      同一轮中先发出的请求陆续返回 429 只减一次
+
+服务端返回 Retry-After 时，在该时间之前本进程不再发出新请求（所有线程共享）。
+等待令牌/并发名额的请求都带截止时间，超时抛出 RateLimitTimeout。
+
+限流状态在每个 worker 进程内独立，多 worker 部署时速率上限按 worker 数平分。
+"""
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from logging_config import get_logger
+
+logger = get_logger('ratelimit')
+
+# 请求结果
+OK = 'ok'
+THROTTLED = 'throttled'
+ERROR = 'error'
+
+MAX_RETRY_AFTER = 60
+
+
+class RateLimitTimeout(Exception):
+    """在截止时间之前没有拿到令牌或并发名额"""
+
+
+def parse_retry_after(value):
+    """
+    解析 Retry-After 响应头（秒数或 HTTP 日期）
+
+    Returns:
+        float: 需要等待的秒数（最多 MAX_RETRY_AFTER），无法解析时返回 None
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class AdaptiveRateLimiter:
+    """令牌桶 + AIMD 并发控制"""
+
+    def __init__(self, rate=None, burst=None, initial_concurrency=None,
+                 min_concurrency=None, max_concurrency=None):
+        self.rate = float(rate if rate is not None else os.getenv('DEEPSEEK_RATE_LIMIT', '10'))
+        self.burst = max(1.0, float(
+            burst if burst is not None else os.getenv('DEEPSEEK_BURST', str(max(1.0, self.rate)))))
+        self.min_concurrency = max(1, int(
+            min_concurrency if min_concurrency is not None
+            else os.getenv('DEEPSEEK_MIN_CONCURRENCY', '1')))
+        self.max_concurrency = max(self.min_concurrency, int(
+            max_concurrency if max_concurrency is not None
+            else os.getenv('DEEPSEEK_MAX_CONCURRENCY', '16')))
+        initial = float(
+            initial_concurrency if initial_concurrency is not None
+            else os.getenv('DEEPSEEK_INITIAL_CONCURRENCY', '4'))
+
+        self._cond = threading.Condition()
+        self._limit = min(max(initial, self.min_concurrency), self.max_concurrency)
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._queued = 0
+        self._counters = {
+            'requests': 0, 'succeeded': 0, 'throttled': 0, 'errors': 0,
+            'retries': 0, 'timeouts': 0, 'decreases': 0,
+        }
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self, deadline):
+        """
+        等待令牌和并发名额
+
+        Args:
+            deadline: 截止时间（time.monotonic()）
+
+        Returns:
+            float: 请求开始时间，release() 时传回
+
+        Raises:
+            RateLimitTimeout: 截止时间之前没有拿到名额
+        """
+        with self._cond:
+            self._queued += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now >= deadline:
+                        self._counters['timeouts'] += 1
+                        raise RateLimitTimeout('等待 API 调用名额超时')
+
+                    if self._paused_until > now:
+                        wait = self._paused_until - now
+                    elif self._in_flight >= int(self._limit):
+                        wait = deadline - now  # 等待 release() 唤醒
+                    else:
+                        self._refill(now)
+                        if self.rate <= 0 or self._tokens >= 1:
+                            if self.rate > 0:
+                                self._tokens -= 1
+                            self._in_flight += 1
+                            self._counters['requests'] += 1
+                            return now
+                        wait = (1 - self._tokens) / self.rate
+                    self._cond.wait(min(wait, deadline - now))
+            finally:
+                self._queued -= 1
+
+    def release(self, started, outcome, retry_after=None):
+        """
+        归还并发名额并根据结果调整上限
+
+        Args:
+            started: acquire() 的返回值
+            outcome: OK / THROTTLED / ERROR
+            retry_after: 服务端要求的等待秒数
+        """
+        with self._cond:
+            full = self._in_flight >= int(self._limit)
+            self._in_flight -= 1
+            now = time.monotonic()
+
+            if outcome == OK:
+                self._counters['succeeded'] += 1
+                # 只有并发用满时才增加，空闲时上限不会无限上涨
+                if full:
+                    self._limit = min(self.max_concurrency, self._limit + 1.0 / self._limit)
+            elif outcome == THROTTLED:
+                self._counters['throttled'] += 1
+                # 上次减小之后才发出的请求被限流时才再次减小
+                if started >= self._last_decrease:
+                    self._limit = max(self.min_concurrency, self._limit / 2)
+                    self._last_decrease = now
+                    self._counters['decreases'] += 1
+                    logger.info("API 被限流，降低并发上限", extra={
+                        'limit': round(self._limit, 2), 'retry_after': retry_after
+                    })
+                # 已经排队的令牌作废，避免暂停结束后集中发出
+                self._tokens = min(self._tokens, 1.0)
+            else:
+                self._counters['errors'] += 1
+
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            self._cond.notify_all()
+
+    def record_retry(self):
+        with self._cond:
+            self._counters['retries'] += 1
+
+    def snapshot(self):
+        """当前的上限、排队数和累计计数"""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'pid': os.getpid(),
+                'rate_limit': self.rate,
+                'burst': self.burst,
+                'tokens': round(self._tokens, 2),
+                'concurrency_limit': round(self._limit, 2),
+                'min_concurrency': self.min_concurrency,
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self._in_flight,
+                'queued': self._queued,
+                'paused_for': round(max(0.0, self._paused_until - now), 2),
+                **self._counters,
+            }
@@ -0,0 +1,330 @@
+"""
+相关单词 - 按共享音节排序的相似单词
+
+每个单词表示为音节上的稀疏向量：权重 = 音节 IDF × 位置权重（首音节、尾音节更高），
+向量归一化后两个单词的点积（余弦相似度）即相关度。查询一个单词的相关单词就是
+单词×音节矩阵与该单词向量的一次稀疏乘法，不需要多次 SQL 连接。
+
+后端：
+    - 安装了 numpy 和 scipy 时使用 CSC 稀疏矩阵
+    - 否则使用纯 Python 倒排表（音节 -> {行: 权重}），结果相同
+    可通过 RELATED_BACKEND=scipy/python 强制指定
+
+更新：
+    索引在每个 worker 进程内首次查询时构建（gunicorn 预加载时由 master 进程构建一次，
+    worker 共享，见 startup.py）。之后每隔 RELATED_SYNC_INTERVAL 秒读取
+    变更日志（change_log，见 delta_sync.py），增量更新新增、修改、删除的单词，
+    其他 worker 添加的单词也会同步过来。增量更新的单词使用当前 IDF，其余单词的权重不变；
+    增量更新的单词超过总数的 RELATED_REBUILD_RATIO 或索引超过 RELATED_MAX_AGE 秒时完整重建。
+
+环境变量：
+    RELATED_BACKEND: scipy / python（默认自动选择）
+    RELATED_SYNC_INTERVAL: 读取变更日志的最短间隔，秒（默认 5）
+    RELATED_REBUILD_RATIO: 增量更新占比超过该值时重建（默认 0.05）
+    RELATED_MAX_AGE: 索引完整重建的最长间隔，秒（默认 3600）
+"""
+import heapq
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from delta_sync import WORD, RESET, current_cursor
+from logging_config import get_logger
+from models import db, ChangeLog, WordSyllable
+
+logger = get_logger('related')
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover - 取决于部署环境
+    np = sparse = None
+
+FIRST_WEIGHT = 1.5
+LAST_WEIGHT = 1.25
+
+
+def position_weight(position, count):
+    """首音节（词首）和尾音节（押韵）共享时更相关"""
+    if position == 0:
+        return FIRST_WEIGHT
+    if position == count - 1:
+        return LAST_WEIGHT
+    return 1.0
+
+
+def _load_syllables(word_ids=None):
+    """{单词ID: [(音节ID, 位置)]}，word_ids 为 None 时加载全部"""
+    table = WordSyllable.__table__
+    query = select(table.c.word_id, table.c.syllable_id, table.c.position)
+    result = defaultdict(list)
+    if word_ids is None:
+        rows = db.session.execute(query)
+    else:
+        rows = []
+        word_ids = list(word_ids)
+        for start in range(0, len(word_ids), 900):
+            rows += db.session.execute(
+                query.where(table.c.word_id.in_(word_ids[start:start + 900]))
+            ).all()
+    for word_id, syllable_id, position in rows:
+        result[word_id].append((syllable_id, position))
+    return result
+
+
+class _Snapshot:
+    """某一时刻的索引（查询时只读，更新时在锁内修改）"""
+
+    def __init__(self, backend, links):
+        self.backend = backend
+        self.built_at = time.time()
+        self.word_ids = []             # 行 -> 单词ID
+        self.row_of = {}               # 单词ID -> 行
+        self.column_of = {}            # 音节ID -> 列
+        self.syllable_ids = []         # 列 -> 音节ID
+        self.df = defaultdict(int)     # 列 -> 包含该音节的单词数
+        self.vectors = {}              # 行 -> {列: 权重}（归一化）
+        self.updated = set()           # 构建之后增量更新过的行
+        self.removed = set()           # 构建之后删除的行
+
+        for syllables in links.values():
+            for column in {self._column(syllable_id) for syllable_id, _ in syllables}:
+                self.df[column] += 1
+        self.count = len(links)
+        for word_id, syllables in links.items():
+            row = len(self.word_ids)
+            self.word_ids.append(word_id)
+            self.row_of[word_id] = row
+            self.vectors[row] = self._vector(syllables)
+
+        self.postings = None
+        self.matrix = None
+        if backend == 'scipy':
+            self._build_matrix()
+        else:
+            self.postings = defaultdict(dict)
+            for row, vector in self.vectors.items():
+                for column, weight in vector.items():
+                    self.postings[column][row] = weight
+
+    def _column(self, syllable_id):
+        column = self.column_of.get(syllable_id)
+        if column is None:
+            column = self.column_of[syllable_id] = len(self.column_of)
+            self.syllable_ids.append(syllable_id)
+        return column
+
+    def _idf(self, column):
+        return math.log((self.count + 1) / (self.df.get(column, 0) + 1)) + 1
+
+    def _vector(self, syllables):
+        vector = defaultdict(float)
+        total = max(position for _, position in syllables) + 1
+        for syllable_id, position in syllables:
+            column = self._column(syllable_id)
+            vector[column] += self._idf(column) * position_weight(position, total)
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {column: weight / norm for column, weight in vector.items()}
+
+    def _build_matrix(self):
+        rows, columns, data = [], [], []
+        for row, vector in self.vectors.items():
+            for column, weight in vector.items():
+                rows.append(row)
+                columns.append(column)
+                data.append(weight)
+        self.matrix = sparse.csc_matrix(
+            (np.asarray(data, dtype=np.float32), (rows, columns)),
+            shape=(len(self.word_ids), len(self.column_of)), dtype=np.float32
+        )
+        self.base_rows = len(self.word_ids)
+        self.base_columns = len(self.column_of)
+
+    # ---------- 增量更新 ----------
+
+    def upsert(self, word_id, syllables):
+        """新增或修改单词（df 同步更新，已有单词的权重不重新计算）"""
+        row = self.row_of.get(word_id)
+        if row is None:
+            row = len(self.word_ids)
+            self.word_ids.append(word_id)
+            self.row_of[word_id] = row
+            self.count += 1
+        else:
+            self._unlink(row)
+        self.removed.discard(row)
+
+        for column in {self._column(syllable_id) for syllable_id, _ in syllables}:
+            self.df[column] += 1
+        vector = self._vector(syllables)
+        self.vectors[row] = vector
+        self.updated.add(row)
+        if self.postings is not None:
+            for column, weight in vector.items():
+                self.postings[column][row] = weight
+
+    def remove(self, word_id):
+        row = self.row_of.pop(word_id, None)
+        if row is None:
+            return
+        self._unlink(row)
+        self.vectors.pop(row, None)
+        self.removed.add(row)
+        self.updated.discard(row)
+        self.count -= 1
+
+    def _unlink(self, row):
+        for column in self.vectors.get(row, {}):
+            self.df[column] -= 1
+            if self.postings is not None:
+                self.postings[column].pop(row, None)
+
+    # ---------- 查询 ----------
+
+    def top(self, row, limit):
+        """相关度最高的 limit 个 [(行, 相关度)]（不含自身），按相关度从高到低"""
+        query = self.vectors.get(row)
+        if not query:
+            return []
+        if self.postings is not None:
+            scores = defaultdict(float)
+            for column, weight in query.items():
+                for other, other_weight in self.postings.get(column, {}).items():
+                    scores[other] += weight * other_weight
+            scores.pop(row, None)
+            return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+        # 构建时的矩阵：取查询涉及的列做一次稀疏乘法，argpartition 取前 limit 个
+        candidates = []
+        base = [(column, weight) for column, weight in query.items() if column < self.base_columns]
+        if base:
+            columns = [column for column, _ in base]
+            weights = np.asarray([weight for _, weight in base], dtype=np.float32)
+            product = self.matrix[:, columns] @ weights
+            # 增量更新过的行以当前向量为准
+            stale = [other for other in self.updated | self.removed | {row} if other < self.base_rows]
+            product[stale] = 0
+            nonzero = np.count_nonzero(product)
+            if nonzero > limit:
+                best = np.argpartition(-product, limit)[:limit]
+            else:
+                best = np.flatnonzero(product)
+            candidates = list(zip(best.tolist(), product[best].tolist()))
+        for other in self.updated:
+            if other == row:
+                continue
+            vector = self.vectors[other]
+            score = sum(weight * vector.get(column, 0.0) for column, weight in query.items())
+            if score:
+                candidates.append((other, score))
+        return heapq.nlargest(limit, candidates, key=lambda item: (item[1], -item[0]))
+
+
+class RelatedWordsIndex:
+    """相关单词索引（每个 worker 进程一份）"""
+
+    def __init__(self):
+        backend = os.getenv('RELATED_BACKEND', '').lower()
+        if backend not in ('scipy', 'python'):
+            backend = 'scipy' if sparse is not None else 'python'
+        if backend == 'scipy' and sparse is None:
+            logger.warning("未安装 numpy/scipy，相关单词使用纯 Python 后端")
+            backend = 'python'
+        self.backend = backend
+        self.sync_interval = float(os.getenv('RELATED_SYNC_INTERVAL', '5'))
+        self.rebuild_ratio = float(os.getenv('RELATED_REBUILD_RATIO', '0.05'))
+        self.max_age = float(os.getenv('RELATED_MAX_AGE', '3600'))
+        self._snapshot = None
+        self._cursor = 0
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def _build(self):
+        start = time.perf_counter()
+        # 先读游标再加载数据，构建期间的变更会在下次同步时重新应用
+        cursor = current_cursor()
+        snapshot = _Snapshot(self.backend, _load_syllables())
+        self._snapshot, self._cursor, self._synced_at = snapshot, cursor, time.time()
+        logger.info("相关单词索引已构建", extra={
+            'backend': self.backend, 'words': snapshot.count, 'syllables': len(snapshot.column_of),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)
+        })
+
+    def _sync(self):
+        """应用变更日志中游标之后的单词变更"""
+        log = ChangeLog.__table__
+        rows = db.session.execute(
+            select(log.c.id, log.c.entity, log.c.entity_id)
+            .where(log.c.id > self._cursor, log.c.entity.in_((WORD, RESET)))
+            .order_by(log.c.id)
+        ).all()
+        self._synced_at = time.time()
+        if not rows:
+            return
+        if any(row.entity == RESET for row in rows):
+            self._build()
+            return
+
+        word_ids = {row.entity_id for row in rows}
+        links = _load_syllables(word_ids)
+        snapshot = self._snapshot
+        for word_id in word_ids:
+            if links.get(word_id):
+                snapshot.upsert(word_id, links[word_id])
+            else:
+                snapshot.remove(word_id)
+        self._cursor = rows[-1].id
+
+        changed = len(snapshot.updated) + len(snapshot.removed)
+        if changed > max(100, snapshot.count * self.rebuild_ratio):
+            self._build()
+
+    def _refresh(self):
+        """按需构建或同步（调用方持有锁）"""
+        snapshot = self._snapshot
+        if snapshot is None or time.time() - snapshot.built_at >= self.max_age:
+            self._build()
+        elif time.time() - self._synced_at >= self.sync_interval:
+            self._sync()
+        return self._snapshot
+
+    def related(self, word_id, limit=20):
+        """
+        与单词共享音节最多（按 IDF 和位置加权）的单词
+
+        Args:
+            word_id: 单词ID
+            limit: 返回数量
+
+        Returns:
+            list: [(单词ID, 相关度, 共享的音节ID列表)]，按相关度从高到低；
+                单词不存在或没有音节时为空列表
+        """
+        with self._lock:
+            snapshot = self._refresh()
+            row = snapshot.row_of.get(word_id)
+            if row is None:
+                return []
+            top = snapshot.top(row, limit)
+            query = snapshot.vectors[row]
+            return [
+                (snapshot.word_ids[other], round(score, 4),
+                 [snapshot.syllable_ids[column] for column in query if column in snapshot.vectors[other]])
+                for other, score in top
+            ]
+
+    def warm(self):
+        """预先构建索引（启动时调用，需要应用上下文）"""
+        with self._lock:
+            return self._refresh().count
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+
+
+related_index = RelatedWordsIndex()
@@ -38,7 +38,7 @@ else
 fi
 
 # 方法 2: 通过进程名关闭
-pkill -f "gunicorn.*app:app" 2>/dev/null
+pkill -f "gunicorn.*(app:app|startup:create_app)" 2>/dev/null
 sleep 1
 
 echo ""
@@ -76,12 +76,11 @@ if ! command -v gunicorn &> /dev/null; then
 fi
 
 # 启动 Gunicorn（后台运行）
-nohup gunicorn -w 4 -b 127.0.0.1:5000 \
-    --timeout 120 \
+nohup gunicorn -c gunicorn.conf.py \
     --access-logfile "$LOG_FILE" \
     --error-logfile "$LOG_FILE" \
     --pid "$PID_FILE" \
-    app:app > "$LOG_FILE" 2>&1 &
+    'startup:create_app()' > "$LOG_FILE" 2>&1 &
 
 BACKEND_PID=$!
 echo "  服务已启动，PID: $BACKEND_PID"
@@ -91,7 +90,13 @@ echo ""
 
 # 4. 等待启动并验证
 echo "[步骤 4/4] 验证服务状态..."
-sleep 3
+# 预加载时 master 先检查数据库结构并预热缓存，之后才开始监听端口
+for i in $(seq 1 60); do
+    if lsof -ti:5000 > /dev/null 2>&1 || ! ps -p $BACKEND_PID > /dev/null 2>&1; then
+        break
+    fi
+    sleep 0.5
+done
 
 # 检查进程是否还在运行
 if ps -p $BACKEND_PID > /dev/null 2>&1; then
@@ -0,0 +1,324 @@
+"""
+中文反查 - 按中文释义查找英文单词（输入“谈话”得到 conversation）
+
+Word.translation 是中文自由文本（如“n. 会话，谈话；交谈”），LIKE '%...%' 只能全表扫描。
+这里在每个 worker 进程内维护释义的倒排索引：
+
+    - 词项：释义中每段连续汉字的单字和相邻两字（字符二元组），标点、字母、词性不参与
+    - 查询：两个字及以上的查询只用二元组（“谈话” -> 谈话），单字查询用单字；
+      候选单词是命中查询词项比例（覆盖率）不低于 REVERSE_MIN_COVERAGE 的单词
+    - 排序：覆盖率 + 原样出现在义项中的查询片段比例 + 义项以查询开头 + 某个义项与查询完全相同，
+      再加上特异度（查询长度 / 包含它的最短义项长度），同分时释义越短越靠前
+
+返回的匹配类型：exact（某个义项与查询相同）、prefix（义项以查询开头）、
+phrase（查询原样出现）、partial（只命中部分二元组）。
+
+更新：
+    与相关单词索引（related_words.py）相同：每个 worker 首次查询时构建（gunicorn 预加载时由
+    master 构建，worker 共享），之后每隔 REVERSE_SYNC_INTERVAL 秒读取变更日志，
+    新增、修改、删除的单词增量更新；增量超过总数的 REVERSE_REBUILD_RATIO 或索引超过
+    REVERSE_MAX_AGE 秒时完整重建。
+
+环境变量：
+    REVERSE_SYNC_INTERVAL: 读取变更日志的最短间隔，秒（默认 5）
+    REVERSE_REBUILD_RATIO: 增量更新占比超过该值时重建（默认 0.05）
+    REVERSE_MAX_AGE: 索引完整重建的最长间隔，秒（默认 3600）
+    REVERSE_MIN_COVERAGE: 候选单词至少命中的查询词项比例（默认 0.5）
+"""
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from delta_sync import WORD, RESET, current_cursor
+from logging_config import get_logger
+from models import db, ChangeLog, Word
+
+logger = get_logger('reverse')
+
+EXACT = 'exact'
+PREFIX = 'prefix'
+PHRASE = 'phrase'
+PARTIAL = 'partial'
+
+MAX_QUERY_LENGTH = 50
+
+_HANZI = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+# 义项分隔：中英文逗号、分号、顿号、斜线、空白；括号中的补充说明单独成为义项
+_SENSE_SEPARATORS = re.compile(r'[，,；;、/|\s()（）\[\]【】]+')
+
+
+def hanzi_runs(text):
+    """文本中连续的汉字片段"""
+    return _HANZI.findall(text or '')
+
+
+def index_terms(text):
+    """释义的索引词项：每段汉字的单字和二元组"""
+    terms = set()
+    for run in hanzi_runs(text):
+        terms.update(run)
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def query_terms(runs):
+    """查询词项：两个字及以上的片段用二元组，单字片段用单字"""
+    terms = set()
+    for run in runs:
+        if len(run) == 1:
+            terms.add(run)
+        else:
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def senses(translation):
+    """释义拆分成义项，每个义项只保留汉字"""
+    result = []
+    for part in _SENSE_SEPARATORS.split(translation or ''):
+        sense = ''.join(hanzi_runs(part))
+        if sense:
+            result.append(sense)
+    return result
+
+
+def match_quality(runs, translation, coverage):
+    """
+    单个释义的匹配质量
+
+    Args:
+        runs: 查询的汉字片段
+        translation: 单词释义
+        coverage: 命中的查询词项比例
+
+    Returns:
+        tuple: (得分, 匹配类型)
+    """
+    parts = senses(translation)
+    containing = [sense for sense in parts if any(run in sense for run in runs)]
+    # 原样出现在某个义项中的查询片段比例
+    phrase = sum(any(run in sense for sense in parts) for run in runs) / len(runs)
+    single = runs[0] if len(runs) == 1 else None
+    exact = single is not None and single in parts
+    prefix = single is not None and any(sense.startswith(single) for sense in parts)
+    specificity = 0.0
+    if phrase == 1:
+        specificity = min(1.0, sum(map(len, runs)) / min(map(len, containing)))
+
+    score = coverage + phrase + 0.5 * prefix + exact + 0.5 * specificity
+    if exact:
+        kind = EXACT
+    elif prefix:
+        kind = PREFIX
+    elif phrase == 1:
+        kind = PHRASE
+    else:
+        kind = PARTIAL
+    return round(score, 4), kind
+
+
+def _load_translations(word_ids=None):
+    """{单词ID: 释义}，word_ids 为 None 时加载全部"""
+    table = Word.__table__
+    query = select(table.c.id, table.c.translation)
+    if word_ids is None:
+        return dict(db.session.execute(query).all())
+    result = {}
+    word_ids = list(word_ids)
+    for start in range(0, len(word_ids), 900):
+        result.update(db.session.execute(
+            query.where(table.c.id.in_(word_ids[start:start + 900]))
+        ).all())
+    return result
+
+
+class _Snapshot:
+    """某一时刻的倒排索引（查询时只读，更新时在锁内修改）"""
+
+    def __init__(self, translations):
+        self.built_at = time.time()
+        self.word_ids = []             # 行 -> 单词ID
+        self.row_of = {}               # 单词ID -> 行
+        self.texts = []                # 行 -> 释义（已删除为 None）
+        self.stale = set()             # 构建之后修改或删除的行（构建时的倒排表对它们无效）
+        self.extra = defaultdict(set)  # 词项 -> 构建之后新增或修改的行
+        self.added = 0
+
+        postings = defaultdict(list)
+        for word_id, translation in translations.items():
+            row = len(self.word_ids)
+            self.word_ids.append(word_id)
+            self.row_of[word_id] = row
+            self.texts.append(translation)
+            for term in index_terms(translation):
+                postings[term].append(row)
+        # 紧凑存储：每个词项一个无符号整数数组
+        self.postings = {term: array('I', rows) for term, rows in postings.items()}
+        self.base_rows = len(self.word_ids)
+
+    @property
+    def count(self):
+        return len(self.row_of)
+
+    @property
+    def changed(self):
+        return len(self.stale) + self.added
+
+    # ---------- 增量更新 ----------
+
+    def _unlink(self, row):
+        if row < self.base_rows:
+            self.stale.add(row)
+        for term in index_terms(self.texts[row]):
+            rows = self.extra.get(term)
+            if rows is not None:
+                rows.discard(row)
+
+    def upsert(self, word_id, translation):
+        row = self.row_of.get(word_id)
+        if row is None:
+            row = len(self.word_ids)
+            self.word_ids.append(word_id)
+            self.texts.append(None)
+            self.row_of[word_id] = row
+            self.added += 1
+        else:
+            self._unlink(row)
+        self.texts[row] = translation
+        for term in index_terms(translation):
+            self.extra[term].add(row)
+
+    def remove(self, word_id):
+        row = self.row_of.pop(word_id, None)
+        if row is None:
+            return
+        self._unlink(row)
+        self.texts[row] = None
+
+    # ---------- 查询 ----------
+
+    def candidates(self, terms):
+        """{行: 命中的查询词项数}"""
+        hits = defaultdict(int)
+        stale = self.stale
+        for term in terms:
+            for row in self.postings.get(term, ()):
+                if row not in stale:
+                    hits[row] += 1
+            for row in self.extra.get(term, ()):
+                hits[row] += 1
+        return hits
+
+
+class ReverseLookupIndex:
+    """中文反查索引（每个 worker 进程一份）"""
+
+    def __init__(self):
+        self.sync_interval = float(os.getenv('REVERSE_SYNC_INTERVAL', '5'))
+        self.rebuild_ratio = float(os.getenv('REVERSE_REBUILD_RATIO', '0.05'))
+        self.max_age = float(os.getenv('REVERSE_MAX_AGE', '3600'))
+        self.min_coverage = float(os.getenv('REVERSE_MIN_COVERAGE', '0.5'))
+        self._snapshot = None
+        self._cursor = 0
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def _build(self):
+        start = time.perf_counter()
+        # 先读游标再加载数据，构建期间的变更会在下次同步时重新应用
+        cursor = current_cursor()
+        snapshot = _Snapshot(_load_translations())
+        self._snapshot, self._cursor, self._synced_at = snapshot, cursor, time.time()
+        logger.info("中文反查索引已构建", extra={
+            'words': snapshot.count, 'terms': len(snapshot.postings),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)
+        })
+
+    def _sync(self):
+        """应用变更日志中游标之后的单词变更"""
+        log = ChangeLog.__table__
+        rows = db.session.execute(
+            select(log.c.id, log.c.entity, log.c.entity_id)
+            .where(log.c.id > self._cursor, log.c.entity.in_((WORD, RESET)))
+            .order_by(log.c.id)
+        ).all()
+        self._synced_at = time.time()
+        if not rows:
+            return
+        if any(row.entity == RESET for row in rows):
+            self._build()
+            return
+
+        word_ids = {row.entity_id for row in rows}
+        translations = _load_translations(word_ids)
+        snapshot = self._snapshot
+        for word_id in word_ids:
+            if word_id in translations:
+                snapshot.upsert(word_id, translations[word_id])
+            else:
+                snapshot.remove(word_id)
+        self._cursor = rows[-1].id
+
+        if snapshot.changed > max(100, snapshot.count * self.rebuild_ratio):
+            self._build()
+
+    def _refresh(self):
+        """按需构建或同步（调用方持有锁）"""
+        snapshot = self._snapshot
+        if snapshot is None or time.time() - snapshot.built_at >= self.max_age:
+            self._build()
+        elif time.time() - self._synced_at >= self.sync_interval:
+            self._sync()
+        return self._snapshot
+
+    def lookup(self, text, limit=20):
+        """
+        按中文释义查找单词
+
+        Args:
+            text: 查询文本（只使用其中的汉字，最多 MAX_QUERY_LENGTH 个字符）
+            limit: 返回数量
+
+        Returns:
+            list: [(单词ID, 得分, 匹配类型)]，按得分从高到低；查询不含汉字时为空列表
+        """
+        runs = hanzi_runs((text or '')[:MAX_QUERY_LENGTH])
+        terms = query_terms(runs)
+        if not terms:
+            return []
+        with self._lock:
+            snapshot = self._refresh()
+            hits = snapshot.candidates(terms)
+            needed = max(1, math.ceil(len(terms) * self.min_coverage))
+            # 先按覆盖率和释义长度粗排，只对前面的候选计算完整得分
+            candidates = heapq.nsmallest(
+                max(limit * 10, 200),
+                ((row, count) for row, count in hits.items() if count >= needed),
+                key=lambda item: (-item[1], len(snapshot.texts[item[0]]), item[0])
+            )
+            scored = []
+            for row, count in candidates:
+                translation = snapshot.texts[row]
+                score, kind = match_quality(runs, translation, count / len(terms))
+                scored.append((score, len(translation), snapshot.word_ids[row], kind))
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1], item[2]))
+        return [(word_id, score, kind) for score, _, word_id, kind in best]
+
+    def warm(self):
+        """预先构建索引（启动时调用，需要应用上下文）"""
+        with self._lock:
+            return self._refresh().count
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+
+
+reverse_index = ReverseLookupIndex()
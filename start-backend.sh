@@ -47,19 +47,23 @@ fi
 
 # 启动 Gunicorn（后台运行）
 echo "正在启动服务..."
-nohup gunicorn -w 4 -b 127.0.0.1:5000 \
-    --timeout 120 \
+nohup gunicorn -c gunicorn.conf.py \
     --access-logfile "$LOG_FILE" \
     --error-logfile "$LOG_FILE" \
     --pid "$PID_FILE" \
-    app:app > "$LOG_FILE" 2>&1 &
+    'startup:create_app()' > "$LOG_FILE" 2>&1 &
 
 BACKEND_PID=$!
 echo "服务已启动，PID: $BACKEND_PID"
 echo $BACKEND_PID > "$PID_FILE"
 
-# 等待启动
-sleep 3
+# 等待启动（预加载时 master 先检查数据库结构并预热缓存，之后才开始监听端口）
+for i in $(seq 1 60); do
+    if lsof -ti:5000 > /dev/null 2>&1 || ! ps -p $BACKEND_PID > /dev/null 2>&1; then
+        break
+    fi
+    sleep 0.5
+done
 
 # 验证
 if ps -p $BACKEND_PID > /dev/null 2>&1; then
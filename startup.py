@@ -0,0 +1,176 @@
+"""
+应用启动 - 数据库结构版本检查、缓存预热和 gunicorn 预加载
+
+create_app() 是 gunicorn 的应用工厂（gunicorn.conf.py 使用 startup:create_app()）：
+    1. 检查数据库结构版本：schema_versions 表中记录的哈希与当前模型一致时跳过
+       db.create_all()（create_all 会逐个检查所有表），不一致时建表并记录新版本。
+       create_all 只创建缺少的表，已有表的新增列仍需执行 database_migration.sql
+    2. 预热进程内缓存：离线词库包（同时填充单词 JSON 片段缓存）、相关单词索引
+       （单词 -> 音节向量）、中文反查索引、词表布隆过滤器
+
+预加载（GUNICORN_PRELOAD=true，默认）时 master 进程执行一次 create_app()，然后：
+    - before_fork(): 关闭 master 的数据库连接，gc.freeze() 把已有对象移出垃圾回收，
+      worker 中的回收不再修改这些对象，预热好的缓存页以写时复制方式共享
+    - after_fork(): worker 重新启动日志线程，丢弃继承的连接池
+其余按进程的状态（查询事件线程、密码哈希进程池、热门单词检查点）在 worker 中按进程号
+重新创建，不需要额外处理。不预加载时每个 worker 各自执行 create_app()。
+
+启动耗时写入日志（startup 日志器）；部署后到请求变快的时间用
+python -m benchmarks.bench_cold_start 测量。
+
+环境变量：
+    SCHEMA_CHECK: version（默认，版本一致时跳过建表检查）/ always（每次执行 create_all）/
+        off（不检查，由部署流程负责建表）
+    STARTUP_WARM: 启动时是否预热缓存（默认 true）
+"""
+import gc
+import hashlib
+import os
+import time
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from logging_config import get_logger, setup_logging
+from models import db, SchemaVersion
+
+logger = get_logger('startup')
+
+SCHEMA_CHECK = os.getenv('SCHEMA_CHECK', 'version').lower()
+STARTUP_WARM = os.getenv('STARTUP_WARM', 'true').lower() == 'true'
+
+_prepared = False
+
+
+def schema_hash(dialect):
+    """当前模型定义（所有表和索引的 CREATE 语句）的哈希"""
+    statements = []
+    for table in db.metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=dialect)).strip())
+        statements.extend(
+            str(CreateIndex(index).compile(dialect=dialect)).strip()
+            for index in sorted(table.indexes, key=lambda index: index.name or '')
+        )
+    return hashlib.sha1('\n'.join(statements).encode('utf-8')).hexdigest()
+
+
+def ensure_schema(mode=None):
+    """
+    按需建表（需要应用上下文）
+
+    Args:
+        mode: version / always / off，默认取 SCHEMA_CHECK
+
+    Returns:
+        bool: 是否执行了 db.create_all()
+    """
+    mode = mode or SCHEMA_CHECK
+    if mode == 'off':
+        return False
+
+    expected = schema_hash(db.engine.dialect)
+    if mode != 'always':
+        try:
+            current = db.session.execute(
+                select(SchemaVersion.id).where(SchemaVersion.schema_hash == expected)
+            ).scalar()
+        except SQLAlchemyError:
+            # 新数据库还没有 schema_versions 表
+            db.session.rollback()
+            current = None
+        if current is not None:
+            return False
+
+    db.create_all()
+    try:
+        if not db.session.execute(
+                select(SchemaVersion.id).where(SchemaVersion.schema_hash == expected)).scalar():
+            db.session.add(SchemaVersion(schema_hash=expected))
+        db.session.commit()
+    except SQLAlchemyError as e:
+        # 多个 worker 同时启动时可能重复写入，下次启动会再检查
+        db.session.rollback()
+        logger.warning("记录数据库结构版本失败: %s", e)
+    logger.info("数据库结构已检查", extra={'schema_hash': expected[:12]})
+    return True
+
+
+def warm_caches():
+    """
+    预热进程内缓存（需要应用上下文）
+
+    Returns:
+        dict: 各项缓存的预热耗时（毫秒）
+    """
+    from dict_bundle import dictionary_bundle
+    from related_words import related_index
+    from reverse_lookup import reverse_index
+    from word_gate import word_gate
+
+    timings = {}
+    for name, warm in (
+            ('dictionary_bundle', dictionary_bundle.current),
+            ('related_words', related_index.warm),
+            ('reverse_lookup', reverse_index.warm),
+            ('word_gate', word_gate.warm)):
+        start = time.perf_counter()
+        try:
+            warm()
+        except Exception as e:
+            # 预热失败不影响启动，首次请求时再构建
+            db.session.rollback()
+            logger.warning("预热 %s 失败: %s", name, e)
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    return timings
+
+
+def prepare(app):
+    """检查数据库结构并预热缓存（每个进程只执行一次）"""
+    global _prepared
+    if _prepared:
+        return
+    start = time.perf_counter()
+    with app.app_context():
+        created = ensure_schema()
+        schema_ms = round((time.perf_counter() - start) * 1000, 1)
+        timings = warm_caches() if STARTUP_WARM else {}
+        db.session.remove()
+    _prepared = True
+    logger.info("应用启动准备完成", extra={
+        'schema_created': created, 'schema_ms': schema_ms,
+        'warm_ms': timings, 'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)
+    })
+
+
+def create_app():
+    """
+    应用工厂：返回已完成启动准备的 Flask 应用
+
+    Returns:
+        Flask: app.py 中的应用
+    """
+    from app import app
+
+    prepare(app)
+    return app
+
+
+def before_fork():
+    """预加载的 master 进程在 fork worker 之前调用"""
+    from app import app
+
+    # worker 不能共用 master 的数据库连接
+    db.dispose_engines(app)
+    gc.freeze()
+    gc.enable()
+    logger.info("已冻结预加载对象", extra={'frozen': gc.get_freeze_count()})
+
+
+def after_fork():
+    """预加载时每个 worker 在 fork 之后调用"""
+    from app import app
+
+    # fork 不复制线程：重新创建日志监听线程（必须最先执行）
+    setup_logging()
+    db.dispose_engines(app, close=False)
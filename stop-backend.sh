@@ -24,7 +24,7 @@ if lsof -ti:5000 > /dev/null 2>&1; then
 fi
 
 # 通过进程名关闭
-pkill -f "gunicorn.*app:app" 2>/dev/null
+pkill -f "gunicorn.*(app:app|startup:create_app)" 2>/dev/null
 
 sleep 1
 
@@ -0,0 +1,102 @@
+"""
+单词有序音节列 - words.syllable_list 保存按位置排好序的音节（JSON 数组）
+
+读取单词的音节（单词详情、列表、离线词库包）直接取这一列，不再连接 word_syllables 和
+syllables 再按位置排序，单个单词的读取只查询一行。word_syllables 表保留，用于按音节查单词、
+相关单词和音节统计。
+
+写入：
+    - app.attach_syllables() 与 WordSyllable 行在同一事务中设置（Word.set_syllables()）
+    - 词库导入（dict_archive.py）和基准数据生成批量写入时直接计算
+syllable_list 为 NULL（升级前添加的单词）时读取回退到关联表，执行 backfill 后不再回退。
+
+用法：
+    python syllable_list.py backfill   # 为已有单词填充（或修正）有序音节列
+    python syllable_list.py check      # 只统计与关联表不一致的单词数
+"""
+import argparse
+import sys
+
+from sqlalchemy import select
+
+from models import db, Word, Syllable, WordSyllable, encode_syllables
+
+
+def _ordered_syllables(first_id, last_id):
+    """{单词ID: [音节]}，按位置排序（只含有音节的单词）"""
+    links = WordSyllable.__table__
+    syllables = Syllable.__table__
+    rows = db.session.execute(
+        select(links.c.word_id, syllables.c.syllable)
+        .join(syllables, syllables.c.id == links.c.syllable_id)
+        .where(links.c.word_id.between(first_id, last_id))
+        .order_by(links.c.word_id, links.c.position)
+    )
+    result = {}
+    for word_id, syllable in rows:
+        result.setdefault(word_id, []).append(syllable)
+    return result
+
+
+def backfill(batch_size=1000, dry_run=False):
+    """
+    按关联表重新计算与之不一致（含 NULL）的 syllable_list（不提交事务）
+
+    Args:
+        batch_size: 每批处理的单词数
+        dry_run: 只统计，不写入
+
+    Returns:
+        int: 不一致（已更新）的单词数
+    """
+    words = Word.__table__
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(words.c.id, words.c.syllable_list, words.c.updated_at)
+            .where(words.c.id > last_id).order_by(words.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return updated
+        ordered = _ordered_syllables(rows[0].id, rows[-1].id)
+        changes = []
+        for row in rows:
+            value = encode_syllables(ordered.get(row.id, []))
+            if row.syllable_list != value:
+                # 原样写回 updated_at：单词内容没有变化，客户端缓存和片段缓存仍然有效
+                changes.append({'id': row.id, 'syllable_list': value, 'updated_at': row.updated_at})
+        if changes and not dry_run:
+            db.session.bulk_update_mappings(Word, changes)
+        updated += len(changes)
+        last_id = rows[-1].id
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='单词有序音节列')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('backfill', help='为已有单词填充有序音节列')
+    subparsers.add_parser('check', help='统计与关联表不一致的单词数')
+    args = parser.parse_args(argv)
+
+    from app import app
+
+    with app.app_context():
+        if args.command == 'check':
+            mismatched = backfill(dry_run=True)
+            db.session.rollback()
+            print(f'{"✓" if not mismatched else "✗"} 与关联表不一致的单词: {mismatched}')
+            return 0 if not mismatched else 1
+        try:
+            updated = backfill()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f'✗ 回填失败: {e}', file=sys.stderr)
+            return 1
+        print(f'✓ 已更新 {updated} 个单词的有序音节列')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+测试公共配置 - 在导入 app 之前指向临时 SQLite 数据库
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+_DB_DIR = tempfile.mkdtemp(prefix='word_test_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('JWT_SECRET_KEY', 'test-secret-key-with-enough-length')
+
+
+@pytest.fixture
+def app_module():
+    """每个测试使用空数据库，返回 app 模块（已推入应用上下文）"""
+    import app as app_module
+
+    with app_module.app.app_context():
+        app_module.db.drop_all()
+        app_module.db.create_all()
+        yield app_module
+        app_module.db.session.remove()
+
+
+@pytest.fixture
+def auth_headers(app_module):
+    """一个测试用户的认证请求头"""
+    from flask_jwt_extended import create_access_token
+
+    user = app_module.User(username='tester', email='tester@example.com', password_hash='x')
+    app_module.db.session.add(user)
+    app_module.db.session.commit()
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
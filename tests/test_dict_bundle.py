@@ -0,0 +1,63 @@
+"""
+离线词库包测试
+"""
+from benchmarks.bench_api import letter_code
+from dict_bundle import dictionary_bundle
+
+
+def add_word(app_module, word, translation):
+    entry = app_module.Word(word=word, translation=translation)
+    app_module.db.session.add(entry)
+    app_module.db.session.flush()
+    return entry
+
+
+def test_bundle_with_one_queried_word(app_module, auth_headers, monkeypatch):
+    """只有部分单词被查询过时，按添加顺序补齐到 DICT_BUNDLE_SIZE"""
+    monkeypatch.setattr(dictionary_bundle, 'size', 3)
+    monkeypatch.setattr(dictionary_bundle, '_snapshot', None)
+    db = app_module.db
+    words = [add_word(app_module, name, '测试') for name in ('apple', 'banana', 'cherry', 'date')]
+    user_id = app_module.User.query.one().id
+    db.session.add(app_module.UserWordQuery(user_id=user_id, word_id=words[2].id, query_count=5))
+    db.session.commit()
+
+    response = app_module.app.test_client().get('/api/dictionary/bundle', headers=auth_headers)
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    data = response.get_json()
+    assert data['full'] is True
+    assert [word['word'] for word in data['words']] == ['cherry', 'apple', 'banana']
+
+
+def test_bundle_fill_binds_few_parameters(app_module, auth_headers, monkeypatch):
+    """补齐时不把已排名的单词ID逐个绑定为参数（SQLite 旧版本最多 999 个）"""
+    from sqlalchemy import event
+
+    monkeypatch.setattr(dictionary_bundle, 'size', 1200)
+    monkeypatch.setattr(dictionary_bundle, '_snapshot', None)
+    db = app_module.db
+    words = [app_module.Word(word=f'word{letter_code(index)}', translation='测试')
+             for index in range(1300)]
+    db.session.add_all(words)
+    db.session.flush()
+    user_id = app_module.User.query.one().id
+    db.session.add_all(app_module.UserWordQuery(user_id=user_id, word_id=word.id, query_count=1)
+                       for word in words[-1000:])
+    db.session.commit()
+
+    parameter_counts = []
+
+    def count_parameters(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            parameter_counts.append(len(parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', count_parameters)
+    try:
+        snapshot = dictionary_bundle.current()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_parameters)
+
+    assert len(snapshot.fragments) == 1200
+    assert len({word_id for word_id, _ in snapshot.fragments}) == 1200
+    assert max(parameter_counts) <= 900
@@ -0,0 +1,72 @@
+"""
+词形还原测试
+"""
+import pytest
+
+from lemmatizer import lemma_candidates, find_word, find_variants
+from models import WordAlias
+
+
+@pytest.mark.parametrize('word, lemma, stem', [
+    ('noted', 'note', 'not'),
+    ('caring', 'care', 'car'),
+    ('hoping', 'hope', 'hop'),
+    ('writing', 'write', 'writ'),
+    ('biting', 'bite', 'bit'),
+    ('taped', 'tape', 'tap'),
+])
+def test_silent_e_before_bare_stem(word, lemma, stem):
+    candidates = lemma_candidates(word)
+    assert candidates.index(lemma) < candidates.index(stem)
+
+
+@pytest.mark.parametrize('word, lemma', [
+    ('walked', 'walk'), ('wanted', 'want'), ('stopped', 'stop'), ('running', 'run'),
+    ('making', 'make'), ('studies', 'study'), ('ran', 'run'),
+])
+def test_first_candidate(word, lemma):
+    assert lemma_candidates(word)[0] == lemma
+
+
+def add_words(app_module, *texts):
+    words = [app_module.Word(word=text, translation='测试') for text in texts]
+    app_module.db.session.add_all(words)
+    app_module.db.session.commit()
+    return words
+
+
+def test_find_word_single_candidate(app_module):
+    note, = add_words(app_module, 'note')
+    word, alias = find_word('notes', create_alias=True)
+    assert (word.id, alias) == (note.id, 'notes')
+    assert WordAlias.query.filter_by(alias='notes').one().word_id == note.id
+
+
+def test_suffix_rule_needs_ai_confirmation(app_module):
+    """-ed/-ing 规则命中只用于只读查询，不写入别名"""
+    note, = add_words(app_module, 'note')
+    assert find_word('noted') == (note, 'noted')
+    assert find_word('noted', create_alias=True) == (None, None)
+    assert WordAlias.query.count() == 0
+
+
+@pytest.mark.parametrize('word, lemma', [
+    ('meaning', 'mean'), ('building', 'build'), ('tired', 'tire'), ('interested', 'interest'),
+])
+def test_standalone_word_not_aliased(app_module, word, lemma):
+    add_words(app_module, lemma)
+    assert find_word(word) == (None, None)
+    assert find_word(word, create_alias=True) == (None, None)
+    assert WordAlias.query.count() == 0
+
+
+def test_find_word_ambiguous_candidates(app_module):
+    add_words(app_module, 'not', 'note')
+    assert find_word('noted', create_alias=True) == (None, None)
+    assert WordAlias.query.count() == 0
+
+
+def test_find_variants_skips_ambiguous(app_module):
+    add_words(app_module, 'car', 'care', 'caring', 'tape', 'taped')
+    pairs = [(variant.word, lemma.word) for variant, lemma in find_variants()]
+    assert pairs == [('taped', 'tape')]
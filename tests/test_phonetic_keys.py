@@ -0,0 +1,42 @@
+"""
+音标检索键测试
+"""
+import pytest
+
+from phonetic_keys import phonetic_keys, backfill
+
+
+@pytest.mark.parametrize('phonetic, rhyme, onset, stress', [
+    ('/kəmˈpjuːt/', 'uːt', 'k', '01'),          # compute
+    ('/kənˈvɜːt/', 'ɜːt', 'k', '01'),           # convert
+    ('/kənˈdɪʃn/', 'ɪʃn', 'k', '010'),          # condition
+    ('/kənˈdɪʃən/', 'ɪʃn', 'k', '010'),
+    ('/ˈbʌtn/', 'ʌtn', 'b', '10'),              # button
+    ('/ˈbʌtən/', 'ʌtn', 'b', '10'),
+    ('/ˈlɪtl/', 'ɪtl', 'l', '10'),              # little
+    ('/ˈlɪtəl/', 'ɪtl', 'l', '10'),
+    ('/ˌkɒnvəˈseɪʃn/', 'eɪʃn', 'k', '2010'),
+])
+def test_phonetic_keys(phonetic, rhyme, onset, stress):
+    assert phonetic_keys(phonetic) == {
+        'rhyme_key': rhyme, 'onset_key': onset, 'stress_pattern': stress,
+    }
+
+
+def test_empty_phonetic():
+    assert phonetic_keys('') == {'rhyme_key': None, 'onset_key': None, 'stress_pattern': None}
+
+
+def test_backfill_corrects_stale_keys(app_module):
+    db = app_module.db
+    word = app_module.Word(word='compute', translation='计算', phonetic='/kəmˈpjuːt/')
+    db.session.add(word)
+    db.session.commit()
+    # 修复前算出的错误检索键
+    db.session.execute(app_module.Word.__table__.update().values(onset_key='kmpj', stress_pattern='1'))
+    db.session.commit()
+
+    assert backfill() == 1
+    db.session.commit()
+    db.session.refresh(word)
+    assert (word.onset_key, word.stress_pattern) == ('k', '01')
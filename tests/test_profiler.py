@@ -0,0 +1,66 @@
+"""
+请求剖析接口测试
+"""
+import cProfile
+import threading
+
+import pytest
+
+from profiler import request_profiler
+
+
+@pytest.fixture
+def profile_id(app_module, monkeypatch):
+    monkeypatch.setattr(request_profiler, 'token', 'profile-token')
+    monkeypatch.setattr(request_profiler, '_heap', [])
+    monkeypatch.setattr(request_profiler, '_records', {})
+    profile = cProfile.Profile()
+    profile.enable()
+    sorted(range(1000), key=lambda value: -value)
+    profile.disable()
+    request_profiler._store(profile, 'GET', '/api/health', 200, 0.01)
+    return next(iter(request_profiler._records))
+
+
+@pytest.mark.parametrize('sort, status', [('cumulative', 200), ('time', 200), ('bogus', 400)])
+def test_text_summary_sort(app_module, profile_id, sort, status):
+    response = app_module.app.test_client().get(
+        f'/api/debug/profiles/{profile_id}', query_string={'format': 'text', 'sort': sort},
+        headers={'X-Profile-Token': 'profile-token'})
+    assert response.status_code == status
+
+
+def test_overlapping_request_not_profiled(app_module, monkeypatch):
+    """同一进程已有请求在剖析时，重叠的请求跳过剖析，而不是启用第二个剖析器"""
+    monkeypatch.setattr(request_profiler, 'token', 'profile-token')
+    monkeypatch.setattr(request_profiler, '_heap', [])
+    monkeypatch.setattr(request_profiler, '_records', {})
+    headers = {'X-Profile': 'profile-token'}
+    app = app_module.app
+
+    with app.test_request_context('/api/health', headers=headers) as first:
+        request_profiler._start()
+        assert first.g.get('_profile') is not None
+        skipped = request_profiler.skipped
+
+        def overlapping():
+            with app.test_request_context('/api/health', headers=headers) as second:
+                request_profiler._start()
+                results.append(second.g.get('_profile'))
+
+        # 另一个线程中的请求（多线程 worker）
+        results = []
+        thread = threading.Thread(target=overlapping)
+        thread.start()
+        thread.join()
+        assert results == [None]
+        assert request_profiler.skipped == skipped + 1
+
+        request_profiler._stop(app.response_class(status=200))
+
+    # 第一个请求结束后可以再次剖析
+    with app.test_request_context('/api/health', headers=headers) as third:
+        request_profiler._start()
+        assert third.g.get('_profile') is not None
+        request_profiler._discard(None)
+    assert len(request_profiler._records) == 1
@@ -0,0 +1,27 @@
+"""
+公开查询接口测试
+"""
+from benchmarks.bench_api import FakeDeepseek
+from models import QueryEvent
+
+
+def test_added_word_records_query(app_module, monkeypatch):
+    """AI 添加的新单词与已有单词一样记录查询次数、音节次数和查询事件"""
+    monkeypatch.setattr(app_module, 'deepseek_service', FakeDeepseek())
+    db = app_module.db
+    for index in range(1, 5):
+        db.session.add(app_module.User(username=f'user{index}', email=f'user{index}@example.com',
+                                       password_hash='x'))
+    db.session.commit()
+
+    response = app_module.app.test_client().post(
+        '/api/words/public-lookup', json={'word': 'melody', 'code': '19921012QWER'})
+
+    assert response.status_code == 201, response.get_data(as_text=True)
+    data = response.get_json()
+    assert data['action'] == 'added'
+    assert data['word']['query_count'] == 1
+    word_id = data['word']['id']
+    assert app_module.UserWordQuery.query.filter_by(user_id=4, word_id=word_id).one().query_count == 1
+    assert app_module.UserSyllableQuery.query.filter_by(user_id=4).count() == 2
+    assert QueryEvent.query.filter_by(user_id=4, word_id=word_id).one().count == 1
@@ -0,0 +1,28 @@
+"""
+查询次数记录测试
+"""
+from query_recorder import record_word_query
+from trending import current_epoch, trending_tracker
+
+
+def trending_estimate(word_id):
+    sketches = trending_tracker._epochs.get(current_epoch())
+    return sketches.cms.estimate(word_id) if sketches else 0
+
+
+def test_trending_counts_only_committed_queries(app_module, auth_headers):
+    db = app_module.db
+    word = app_module.Word(word='trend', translation='趋势')
+    db.session.add(word)
+    db.session.commit()
+    user_id = app_module.User.query.one().id
+    before = trending_estimate(word.id)
+
+    record_word_query(user_id, word.id, count=3)
+    db.session.rollback()
+    assert trending_estimate(word.id) == before
+
+    record_word_query(user_id, word.id, count=2)
+    assert trending_estimate(word.id) == before
+    db.session.commit()
+    assert trending_estimate(word.id) == before + 2
@@ -0,0 +1,364 @@
+"""
+全站热门单词 - 用流式概要结构统计查询最多的单词
+
+查询次数累加的事务提交后（query_recorder.apply_query_counts，查询/添加单词、?record=1 和上报的查看事件
+都经过这里）每个 worker 进程更新三种概要结构，不需要对 user_word_queries 全表 GROUP BY：
+    - Count-Min Sketch（保守更新）：任意单词的查询次数估计，只会多估
+    - Top-K 最小堆：查询次数估计最高的候选单词
+    - HyperLogLog：每个候选单词的独立用户数估计
+
+时间按 TRENDING_WINDOW 秒分段，每段使用新的概要结构。热度 = 当前段的次数
++ 上一段的次数 × 上一段仍在滑动窗口内的比例（近似最近 TRENDING_WINDOW 秒的查询次数）。
+
+检查点：每个进程每 TRENDING_CHECKPOINT_INTERVAL 秒把自己的概要结构写入 trending_sketches
+（每个进程、每个时间段一行）。三种结构都可以合并（计数相加、寄存器取最大值、候选取并集），
+读取时合并所有进程的检查点和本进程的实时数据，结果缓存 TRENDING_CACHE_SECONDS 秒，
+接口直接返回缓存。进程重启只丢失最后一次检查点之后的计数。
+
+环境变量：
+    TRENDING_WINDOW: 滑动窗口长度，秒（默认 86400）
+    TRENDING_TOP_K: 跟踪的候选单词数，也是返回数量的上限（默认 100）
+    TRENDING_CMS_WIDTH / TRENDING_CMS_DEPTH: Count-Min Sketch 的宽度和行数（默认 2048 / 4）
+    TRENDING_HLL_PRECISION: HyperLogLog 精度 p，每个单词 2^p 个寄存器（默认 10，误差约 3%）
+    TRENDING_CHECKPOINT_INTERVAL: 检查点间隔，秒（默认 60，0 表示不写检查点）
+    TRENDING_CACHE_SECONDS: 读取结果的缓存时间，秒（默认 10）
+"""
+import hashlib
+import heapq
+import math
+import os
+import socket
+import struct
+import threading
+import time
+import uuid
+import zlib
+from array import array
+from datetime import datetime
+
+from logging_config import get_logger
+from models import db, TrendingSketch
+
+logger = get_logger('trending')
+
+WINDOW = float(os.getenv('TRENDING_WINDOW', '86400'))
+TOP_K = int(os.getenv('TRENDING_TOP_K', '100'))
+CMS_WIDTH = int(os.getenv('TRENDING_CMS_WIDTH', '2048'))
+CMS_DEPTH = int(os.getenv('TRENDING_CMS_DEPTH', '4'))
+HLL_PRECISION = int(os.getenv('TRENDING_HLL_PRECISION', '10'))
+CHECKPOINT_INTERVAL = float(os.getenv('TRENDING_CHECKPOINT_INTERVAL', '60'))
+CACHE_SECONDS = float(os.getenv('TRENDING_CACHE_SECONDS', '10'))
+
+
+def _hash64(value, salt=b''):
+    return int.from_bytes(
+        hashlib.blake2b(str(value).encode('utf-8'), digest_size=8, salt=salt).digest(), 'little'
+    )
+
+
+class CountMinSketch:
+    """Count-Min Sketch（double hashing，保守更新）"""
+
+    def __init__(self, width, depth, table=None):
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else array('I', bytes(4 * width * depth))
+
+    def _cells(self, key):
+        digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, key, count=1):
+        """累加并返回新的估计值（只把低于新估计值的格子抬高，减少多估）"""
+        cells = self._cells(key)
+        estimate = min(self.table[cell] for cell in cells) + count
+        for cell in cells:
+            if self.table[cell] < estimate:
+                self.table[cell] = estimate
+        return estimate
+
+    def estimate(self, key):
+        return min(self.table[cell] for cell in self._cells(key))
+
+    def merge(self, other):
+        table = self.table
+        for index, value in enumerate(other.table):
+            if value:
+                table[index] += value
+
+
+class HyperLogLog:
+    """HyperLogLog 基数估计（小基数时使用线性计数）"""
+
+    def __init__(self, precision, registers=None):
+        self.precision = precision
+        self.registers = registers if registers is not None else bytearray(1 << precision)
+
+    def add(self, value):
+        hashed = _hash64(value, salt=b'hll')
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        registers = self.registers
+        for index, rank in enumerate(other.registers):
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class TopK:
+    """估计值最高的 capacity 个键（最小堆，过期条目延迟删除）"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self._heap = []
+
+    def offer(self, key, estimate):
+        """
+        更新键的估计值
+
+        Returns:
+            被挤出的键；key 没有进入候选或没有挤出其他键时为 None
+        """
+        evicted = None
+        if key not in self.counts and len(self.counts) >= self.capacity:
+            # 估计值只增不减，堆顶的值与当前值不同就是过期条目
+            while self._heap and self.counts.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            if estimate <= self._heap[0][0]:
+                return None
+            _, evicted = heapq.heappop(self._heap)
+            del self.counts[evicted]
+        self.counts[key] = estimate
+        heapq.heappush(self._heap, (estimate, key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, k) for k, count in self.counts.items()]
+            heapq.heapify(self._heap)
+        return evicted
+
+
+class Sketches:
+    """一个时间段的概要结构"""
+
+    MAGIC = b'WSYLTRD1'
+    HEADER = struct.Struct('<IIII')
+    CANDIDATE = struct.Struct('<IQ')
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH, top_k=TOP_K, precision=HLL_PRECISION):
+        self.cms = CountMinSketch(width, depth)
+        self.top = TopK(top_k)
+        self.precision = precision
+        self.users = {}  # 候选单词ID -> HyperLogLog
+
+    def record(self, user_id, word_id, count):
+        estimate = self.cms.add(word_id, count)
+        evicted = self.top.offer(word_id, estimate)
+        if evicted is not None:
+            self.users.pop(evicted, None)
+        if word_id in self.top.counts:
+            hll = self.users.get(word_id)
+            if hll is None:
+                hll = self.users[word_id] = HyperLogLog(self.precision)
+            hll.add(user_id)
+
+    def dumps(self):
+        parts = [self.MAGIC, self.HEADER.pack(self.cms.width, self.cms.depth, self.precision,
+                                              len(self.top.counts)),
+                 self.cms.table.tobytes()]
+        for word_id, count in self.top.counts.items():
+            parts.append(self.CANDIDATE.pack(word_id, count))
+            hll = self.users.get(word_id)
+            parts.append(bytes(hll.registers) if hll else bytes(1 << self.precision))
+        return zlib.compress(b''.join(parts))
+
+    @classmethod
+    def loads(cls, data):
+        data = zlib.decompress(data)
+        if data[:len(cls.MAGIC)] != cls.MAGIC:
+            raise ValueError('不是热门单词检查点')
+        offset = len(cls.MAGIC)
+        width, depth, precision, candidates = cls.HEADER.unpack_from(data, offset)
+        offset += cls.HEADER.size
+        sketches = cls(width, depth, max(candidates, 1), precision)
+        table = array('I')
+        table.frombytes(data[offset:offset + 4 * width * depth])
+        sketches.cms.table = table
+        offset += 4 * width * depth
+        registers = 1 << precision
+        for _ in range(candidates):
+            word_id, count = cls.CANDIDATE.unpack_from(data, offset)
+            offset += cls.CANDIDATE.size
+            sketches.top.counts[word_id] = count
+            sketches.users[word_id] = HyperLogLog(precision, bytearray(data[offset:offset + registers]))
+            offset += registers
+        return sketches
+
+
+def current_epoch(now=None):
+    return int((now or time.time()) // WINDOW)
+
+
+class TrendingTracker:
+    """每个 worker 进程的热门单词统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._pid = None
+        self._node = None
+        self._epochs = {}
+        self._dirty = set()
+        self._checkpointed_at = 0.0
+        self._cache = None
+        self._cached_at = 0.0
+
+    def _ensure_process(self):
+        """fork 出的子进程重新开始计数，使用新的检查点名称（调用方持有锁）"""
+        pid = os.getpid()
+        if self._pid != pid:
+            self._pid = pid
+            self._node = f'{socket.gethostname()[:40]}:{pid}:{uuid.uuid4().hex[:8]}'
+            self._epochs = {}
+            self._dirty = set()
+
+    def record(self, word_counts):
+        """
+        记录单词查询
+
+        Args:
+            word_counts: {(user_id, word_id): 次数}
+        """
+        epoch = current_epoch()
+        with self._lock:
+            self._ensure_process()
+            sketches = self._epochs.get(epoch)
+            if sketches is None:
+                sketches = self._epochs[epoch] = Sketches()
+                for old in [e for e in self._epochs if e < epoch - 1]:
+                    del self._epochs[old]
+            for (user_id, word_id), count in word_counts.items():
+                sketches.record(user_id, word_id, count)
+            self._dirty.add(epoch)
+
+    def checkpoint(self):
+        """
+        把本进程有变化的时间段写入检查点，并删除过期的检查点（不提交事务）
+
+        Returns:
+            int: 写入的时间段数
+        """
+        epoch = current_epoch()
+        with self._lock:
+            self._ensure_process()
+            node = self._node
+            payloads = {e: self._epochs[e].dumps() for e in self._dirty if e in self._epochs}
+            self._dirty = set()
+        table = TrendingSketch.__table__
+        now = datetime.utcnow()
+        for e, data in payloads.items():
+            db.session.execute(table.delete().where(table.c.node == node, table.c.epoch == e))
+            db.session.execute(table.insert().values(node=node, epoch=e, data=data, updated_at=now))
+        db.session.execute(table.delete().where(table.c.epoch < epoch - 1))
+        return len(payloads)
+
+    def maybe_checkpoint(self):
+        """每 CHECKPOINT_INTERVAL 秒最多写一次检查点（需要应用上下文）"""
+        if CHECKPOINT_INTERVAL <= 0 or time.time() - self._checkpointed_at < CHECKPOINT_INTERVAL:
+            return
+        self._checkpointed_at = time.time()
+        try:
+            self.checkpoint()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("写入热门单词检查点失败: %s", e)
+
+    def _merged(self, epoch):
+        """合并所有进程（检查点 + 本进程实时数据）在某个时间段的概要结构"""
+        with self._lock:
+            self._ensure_process()
+            node = self._node
+            # 本进程的实时数据通过序列化复制，避免合并时持有锁
+            local = self._epochs.get(epoch)
+            parts = [Sketches.loads(local.dumps())] if local else []
+        rows = db.session.query(TrendingSketch.data).filter(
+            TrendingSketch.epoch == epoch, TrendingSketch.node != node
+        )
+        for (data,) in rows:
+            try:
+                parts.append(Sketches.loads(data))
+            except (ValueError, zlib.error, struct.error) as e:
+                logger.warning("热门单词检查点无法读取: %s", e)
+        if not parts:
+            return None
+        merged = parts[0]
+        for other in parts[1:]:
+            if (other.cms.width, other.cms.depth) != (merged.cms.width, merged.cms.depth):
+                continue  # 配置变更前的检查点
+            merged.cms.merge(other.cms)
+            for word_id, hll in other.users.items():
+                if word_id in merged.users:
+                    merged.users[word_id].merge(hll)
+                elif hll.precision == merged.precision:
+                    merged.users[word_id] = hll
+        return merged
+
+    def _build(self):
+        now = time.time()
+        epoch = current_epoch(now)
+        # 上一时间段仍在滑动窗口内的比例
+        weight = 1 - (now % WINDOW) / WINDOW
+        current, previous = self._merged(epoch), self._merged(epoch - 1)
+
+        results = []
+        candidates = set()
+        for sketches in (current, previous):
+            if sketches:
+                candidates.update(sketches.users)
+        for word_id in candidates:
+            score = current.cms.estimate(word_id) if current else 0
+            if previous:
+                score += weight * previous.cms.estimate(word_id)
+            users = None
+            for sketches in (current, previous):
+                hll = sketches.users.get(word_id) if sketches else None
+                if hll is not None:
+                    if users is None:
+                        users = HyperLogLog(hll.precision, bytearray(hll.registers))
+                    elif users.precision == hll.precision:
+                        users.merge(hll)
+            results.append((word_id, int(round(score)), users.count() if users else 0))
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results[:TOP_K]
+
+    def top(self, limit=20):
+        """
+        热门单词（结果缓存 CACHE_SECONDS 秒，需要应用上下文）
+
+        Returns:
+            list: [(单词ID, 窗口内查询次数估计, 独立用户数估计)]，按次数从高到低
+        """
+        if self._cache is None or time.time() - self._cached_at >= CACHE_SECONDS:
+            with self._cache_lock:
+                if self._cache is None or time.time() - self._cached_at >= CACHE_SECONDS:
+                    self._cache = self._build()
+                    self._cached_at = time.time()
+        return self._cache[:limit]
+
+
+trending_tracker = TrendingTracker()
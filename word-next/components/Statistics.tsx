@@ -2,6 +2,7 @@
 
 import { useState, useEffect } from 'react';
 import { statsAPI, StatsOverview, WordStat, SyllableStat } from '@/utils/api';
+import { syncMirror, getMirroredWordStats, getMirroredSyllableStats } from '@/utils/localMirror';
 
 export default function Statistics() {
   const [overview, setOverview] = useState<StatsOverview | null>(null);
@@ -14,17 +15,45 @@ export default function Statistics() {
     fetchStats();
   }, []);
 
+  // 排行榜优先从本地镜像读取（增量同步后只传输变化的计数器），镜像不可用时请求统计接口
+  const loadRankings = async () => {
+    try {
+      await syncMirror();
+      const [words, syllables] = await Promise.all([
+        getMirroredWordStats(10),
+        getMirroredSyllableStats(10),
+      ]);
+      if (words && syllables) {
+        setWordStats(words);
+        setSyllableStats(syllables);
+        return;
+      }
+    } catch (err) {
+      console.warn('本地镜像同步失败，改用统计接口:', err);
+    }
+    const [wordStatsRes, syllableStatsRes] = await Promise.all([
+      statsAPI.getWordStats(10),
+      statsAPI.getSyllableStats(10),
+    ]);
+    setWordStats(wordStatsRes.data.stats);
+    setSyllableStats(syllableStatsRes.data.stats);
+  };
+
   const fetchStats = async () => {
     setLoading(true);
     try {
-      const [overviewRes, wordStatsRes, syllableStatsRes] = await Promise.all([
-        statsAPI.getOverview(),
-        statsAPI.getWordStats(10),
-        statsAPI.getSyllableStats(10),
+      // 先显示上次同步的排行榜，同步完成后再更新
+      const [cachedWords, cachedSyllables] = await Promise.all([
+        getMirroredWordStats(10).catch(() => null),
+        getMirroredSyllableStats(10).catch(() => null),
       ]);
+      if (cachedWords?.length && cachedSyllables) {
+        setWordStats(cachedWords);
+        setSyllableStats(cachedSyllables);
+      }
+
+      const [overviewRes] = await Promise.all([statsAPI.getOverview(), loadRankings()]);
       setOverview(overviewRes.data.overview);
-      setWordStats(wordStatsRes.data.stats);
-      setSyllableStats(syllableStatsRes.data.stats);
     } catch (err) {
       console.error('Failed to fetch stats:', err);
     } finally {
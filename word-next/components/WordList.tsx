@@ -1,7 +1,7 @@
 'use client';
 
 import { useState, useEffect } from 'react';
-import { wordsAPI, Word } from '@/utils/api';
+import { wordsAPI, eventsAPI, Word } from '@/utils/api';
 
 interface WordListProps {
   refresh: number;
@@ -55,6 +55,8 @@ export default function WordList({ refresh }: WordListProps) {
         // 按单词搜索
         const response = await wordsAPI.searchWord(searchQuery.trim());
         setSearchResult(response.data.word);
+        // 搜索接口只读，查看次数异步上报
+        eventsAPI.queueQuery({ word_id: response.data.word.id });
       } else {
         // 按音节搜索
         await searchBySyllable(searchQuery.trim(), 1);
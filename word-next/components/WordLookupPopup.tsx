@@ -58,8 +58,8 @@ export default function WordLookupPopup({ word, position, onClose, isLoggedIn =
           setWordData(response.data.word);
           setAction(response.data.action);
         } else {
-          // 未登录：调用公开接口，不记录次数
-          const response = await wordsAPI.publicLookupWord({ word: word.toLowerCase() });
+          // 未登录：调用公开只读接口，不记录次数（响应可被缓存）
+          const response = await wordsAPI.publicGetWord(word.toLowerCase());
           setWordData(response.data.word);
           setAction(response.data.action);
         }
@@ -1,7 +1,8 @@
 import type { NextConfig } from "next";
 
 const nextConfig: NextConfig = {
-  /* config options here */
+  // gzip 压缩页面和 public/ 下的静态文件（课程数据 nec_data.json 等）
+  compress: true,
 };
 
 export default nextConfig;
@@ -123,6 +123,7 @@ export interface LookupWordRequest {
 export interface LookupWordResponse {
   message: string;
   action: 'queried' | 'added';  // 'queried' 表示已存在, 'added' 表示新添加
+  alias?: string | null;  // 查询的是变形时为该变形，word 为原形
   word: Word;
 }
 
@@ -135,6 +136,7 @@ export interface PublicLookupRequest {
 export interface PublicLookupResponse {
   message: string;
   action: 'queried' | 'added' | 'not_found';
+  alias?: string | null;
   word: Word | null;
 }
 
@@ -160,12 +162,82 @@ export const wordsAPI = {
   // 公开查询接口（无需登录）
   publicLookupWord: (data: PublicLookupRequest) => 
     api.post<PublicLookupResponse>('/words/public-lookup', data),
+  // 公开只读查询（GET，可被浏览器和代理缓存）
+  publicGetWord: (word: string) =>
+    api.get<PublicLookupResponse>('/words/public-lookup', { params: { word } }),
+};
+
+// ===== 查看事件 =====
+// 单词详情/搜索接口是只读的，查看次数通过事件接口批量异步上报
+
+export interface QueryEvent {
+  word_id?: number;
+  word?: string;
+  count?: number;
+}
+
+export interface QueryEventsResponse {
+  accepted: number;
+  ignored: number;
+}
+
+const EVENT_FLUSH_DELAY_MS = 2000;
+let pendingEvents: QueryEvent[] = [];
+let flushTimer: ReturnType<typeof setTimeout> | null = null;
+
+const flushQueryEvents = (onPageHide = false) => {
+  if (flushTimer) {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+  }
+  if (pendingEvents.length === 0) return;
+
+  const events = pendingEvents;
+  pendingEvents = [];
+
+  // 页面关闭时用 keepalive 请求，保证页面卸载后仍能发送完成
+  if (onPageHide) {
+    const token = localStorage.getItem('access_token');
+    if (!token) return;
+    fetch(`${API_BASE_URL}/events/query`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Authorization: `Bearer ${token}`,
+      },
+      body: JSON.stringify({ events }),
+      keepalive: true,
+    }).catch(() => {});
+    return;
+  }
+
+  api.post<QueryEventsResponse>('/events/query', { events }).catch(() => {
+    // 上报失败不影响使用，丢弃即可
+  });
+};
+
+if (typeof window !== 'undefined') {
+  window.addEventListener('pagehide', () => flushQueryEvents(true));
+}
+
+export const eventsAPI = {
+  recordQueries: (events: QueryEvent[]) =>
+    api.post<QueryEventsResponse>('/events/query', { events }),
+  // 加入待上报队列，合并后延迟发送
+  queueQuery: (event: QueryEvent) => {
+    pendingEvents.push(event);
+    if (!flushTimer) {
+      flushTimer = setTimeout(() => flushQueryEvents(), EVENT_FLUSH_DELAY_MS);
+    }
+  },
+  flush: () => flushQueryEvents(),
 };
 
 // ===== 统计相关 =====
 
+// 带 days 参数时 query_count 是时间窗口内的次数，没有 id，last_queried_at 精确到天
 export interface WordStat {
-  id: number;
+  id?: number;
   user_id: number;
   word_id: number;
   word: string;
@@ -174,7 +246,7 @@ export interface WordStat {
 }
 
 export interface SyllableStat {
-  id: number;
+  id?: number;
   user_id: number;
   syllable_id: number;
   syllable: string;
@@ -191,13 +263,49 @@ export interface StatsOverview {
   total_syllables_in_system: number;
 }
 
+// 全站热门单词：score 为窗口内的查询次数估计，users 为独立用户数估计
+export interface TrendingWord extends Word {
+  score: number;
+  users: number;
+}
+
+export interface ActivityPoint {
+  bucket: string;  // 时间桶的开始时间（UTC）
+  query_count: number;
+}
+
+// days 不传时为全部时间，传入时只统计最近 N 天
 export const statsAPI = {
-  getWordStats: (limit = 50) => 
-    api.get<{ stats: WordStat[] }>('/stats/words', { params: { limit } }),
-  getSyllableStats: (limit = 50) => 
-    api.get<{ stats: SyllableStat[] }>('/stats/syllables', { params: { limit } }),
-  getOverview: () => 
-    api.get<{ overview: StatsOverview }>('/stats/overview'),
+  getWordStats: (limit = 50, days?: number) => 
+    api.get<{ stats: WordStat[]; days?: number }>('/stats/words', { params: { limit, days } }),
+  getSyllableStats: (limit = 50, days?: number) => 
+    api.get<{ stats: SyllableStat[]; days?: number }>('/stats/syllables', { params: { limit, days } }),
+  getOverview: (days?: number) => 
+    api.get<{ overview: StatsOverview; days?: number }>('/stats/overview', { params: { days } }),
+  getTrending: (limit = 20) =>
+    api.get<{ window: number; trending: TrendingWord[] }>('/stats/trending', { params: { limit } }),
+  getActivity: (days = 30, period: 'day' | 'hour' = 'day') =>
+    api.get<{ period: string; days: number; series: ActivityPoint[] }>('/stats/activity', { params: { days, period } }),
+};
+
+// ===== 增量同步 =====
+// 首次同步不传 since，之后用上次返回的 cursor 只拉取变化的数据
+
+export interface SyncResponse {
+  cursor: number;
+  reset: boolean;  // 为 true 时清空本地数据（返回用户全部的查询次数）
+  has_more: boolean;  // 为 true 时立即用新游标继续同步
+  words: Word[];
+  deleted_words: number[];
+  word_queries: WordStat[];
+  deleted_word_queries: number[];
+  syllable_queries: SyllableStat[];
+  deleted_syllable_queries: number[];
+}
+
+export const syncAPI = {
+  sync: (since?: number) =>
+    api.get<SyncResponse>('/sync', { params: since === undefined ? {} : { since } }),
 };
 
 // ===== 健康检查 =====
@@ -0,0 +1,146 @@
+// 本地数据镜像（IndexedDB）
+// 通过 /api/sync 增量同步：单词（按需缓存，已缓存的单词保持最新）和当前用户的查询次数（完整）
+// 每个用户使用独立的数据库，退出登录后切换用户不会混用数据
+
+import { syncAPI, Word, WordStat, SyllableStat } from './api';
+
+const DB_VERSION = 1;
+const WORDS = 'words';
+const WORD_QUERIES = 'wordQueries';
+const SYLLABLE_QUERIES = 'syllableQueries';
+const META = 'meta';
+const MAX_SYNC_ROUNDS = 20;
+
+const currentUserId = (): number | null => {
+  try {
+    const user = JSON.parse(localStorage.getItem('user') || 'null');
+    return user?.id ?? null;
+  } catch {
+    return null;
+  }
+};
+
+const requestToPromise = <T>(request: IDBRequest<T>) =>
+  new Promise<T>((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+
+const transactionDone = (tx: IDBTransaction) =>
+  new Promise<void>((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error);
+    tx.onabort = () => reject(tx.error);
+  });
+
+let dbPromise: Promise<IDBDatabase> | null = null;
+let dbUserId: number | null = null;
+
+const openMirror = (): Promise<IDBDatabase> | null => {
+  if (typeof indexedDB === 'undefined') return null;
+  const userId = currentUserId();
+  if (userId === null) return null;
+
+  if (!dbPromise || dbUserId !== userId) {
+    dbUserId = userId;
+    dbPromise = new Promise((resolve, reject) => {
+      const request = indexedDB.open(`word-mirror-${userId}`, DB_VERSION);
+      request.onupgradeneeded = () => {
+        const db = request.result;
+        db.createObjectStore(WORDS, { keyPath: 'id' });
+        db.createObjectStore(WORD_QUERIES, { keyPath: 'word_id' });
+        db.createObjectStore(SYLLABLE_QUERIES, { keyPath: 'syllable_id' });
+        db.createObjectStore(META);
+      };
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+  }
+  return dbPromise;
+};
+
+// 把列表页、搜索结果等接口返回的单词放入镜像
+export const cacheWords = async (words: Word[]) => {
+  const dbp = openMirror();
+  if (!dbp || words.length === 0) return;
+  const db = await dbp;
+  const tx = db.transaction(WORDS, 'readwrite');
+  const store = tx.objectStore(WORDS);
+  words.forEach((word) => {
+    // query_count 属于当前用户的计数器，单独保存在 wordQueries 中
+    const entry = { ...word };
+    delete entry.query_count;
+    store.put(entry);
+  });
+  await transactionDone(tx);
+};
+
+export const getCachedWord = async (id: number): Promise<Word | undefined> => {
+  const dbp = openMirror();
+  if (!dbp) return undefined;
+  const db = await dbp;
+  return requestToPromise(db.transaction(WORDS).objectStore(WORDS).get(id));
+};
+
+let syncing: Promise<boolean> | null = null;
+
+// 增量同步，返回本地数据是否有变化
+export const syncMirror = (): Promise<boolean> => {
+  if (!syncing) {
+    syncing = runSync().finally(() => {
+      syncing = null;
+    });
+  }
+  return syncing;
+};
+
+const runSync = async (): Promise<boolean> => {
+  const dbp = openMirror();
+  if (!dbp) return false;
+  const db = await dbp;
+
+  let cursor = await requestToPromise<number | undefined>(
+    db.transaction(META).objectStore(META).get('cursor')
+  );
+  let changed = false;
+
+  for (let round = 0; round < MAX_SYNC_ROUNDS; round++) {
+    const { data } = await syncAPI.sync(cursor);
+    const tx = db.transaction([WORDS, WORD_QUERIES, SYLLABLE_QUERIES, META], 'readwrite');
+    const words = tx.objectStore(WORDS);
+    const wordQueries = tx.objectStore(WORD_QUERIES);
+    const syllableQueries = tx.objectStore(SYLLABLE_QUERIES);
+
+    if (data.reset) {
+      words.clear();
+      wordQueries.clear();
+      syllableQueries.clear();
+    }
+    data.words.forEach((word) => words.put(word));
+    data.deleted_words.forEach((id) => words.delete(id));
+    data.word_queries.forEach((row) => wordQueries.put(row));
+    data.deleted_word_queries.forEach((id) => wordQueries.delete(id));
+    data.syllable_queries.forEach((row) => syllableQueries.put(row));
+    data.deleted_syllable_queries.forEach((id) => syllableQueries.delete(id));
+    tx.objectStore(META).put(data.cursor, 'cursor');
+    await transactionDone(tx);
+
+    changed = changed || data.reset || data.cursor !== cursor;
+    cursor = data.cursor;
+    if (!data.has_more) break;
+  }
+  return changed;
+};
+
+const topByCount = async <T extends { query_count: number }>(storeName: string, limit: number) => {
+  const dbp = openMirror();
+  if (!dbp) return null;
+  const db = await dbp;
+  const rows = await requestToPromise<T[]>(db.transaction(storeName).objectStore(storeName).getAll());
+  return rows.sort((a, b) => b.query_count - a.query_count).slice(0, limit);
+};
+
+// 与 /api/stats/words、/api/stats/syllables 相同的排序；镜像不可用时返回 null
+export const getMirroredWordStats = (limit = 50) => topByCount<WordStat>(WORD_QUERIES, limit);
+export const getMirroredSyllableStats = (limit = 50) =>
+  topByCount<SyllableStat>(SYLLABLE_QUERIES, limit);
@@ -103,7 +103,7 @@ class WordAPI {
     return data;
   }
 
-  // 搜索单词
+  // 搜索单词（只读，不记录查询次数；需要计数时调用 recordQueryEvents）
   async searchWord(word) {
     const response = await fetch(
       `${this.baseUrl}/api/words/search?word=${encodeURIComponent(word)}`,
@@ -123,6 +123,27 @@ class WordAPI {
     return await response.json();
   }
 
+  // 批量上报查看事件（服务器异步累加查询次数，搜索/查看接口本身只读）
+  // events: [{ word_id: 1 }, { word: 'hello', count: 2 }]
+  async recordQueryEvents(events) {
+    if (!events || events.length === 0) {
+      return null;
+    }
+
+    const response = await fetch(`${this.baseUrl}/api/events/query`, {
+      method: 'POST',
+      headers: this.getHeaders(),
+      body: JSON.stringify({ events }),
+      keepalive: true
+    });
+
+    if (!response.ok) {
+      throw new Error('上报查询事件失败');
+    }
+
+    return await response.json();
+  }
+
   // 保存认证信息到 Chrome Storage
   async saveAuth(token, user) {
     return new Promise((resolve) => {
@@ -11,6 +11,126 @@ chrome.runtime.onInstalled.addListener(() => {
   console.log('单词记忆助手已安装');
 });
 
+// ==================== 离线词库 ====================
+// 热门单词包保存在 chrome.storage.local（dictBundle: { version, syncedAt, words: {id: 单词} }），
+// 命中时直接在本地返回结果，只向服务器上报查看事件；未命中时再请求 /api/words/lookup
+
+const BUNDLE_REFRESH_MS = 6 * 60 * 60 * 1000; // 6 小时检查一次更新
+let bundleIndex = null; // 单词文本 -> 单词详情
+let bundleSyncing = null;
+
+function indexBundle(bundle) {
+  bundleIndex = new Map();
+  if (bundle && bundle.words) {
+    Object.values(bundle.words).forEach(entry => bundleIndex.set(entry.word, entry));
+  }
+}
+
+async function loadBundle() {
+  const result = await chrome.storage.local.get(['dictBundle']);
+  indexBundle(result.dictBundle);
+  return result.dictBundle || null;
+}
+
+// 下载完整词库包或增量更新
+async function syncBundle(apiUrl, token) {
+  if (bundleSyncing) {
+    return bundleSyncing;
+  }
+  bundleSyncing = (async () => {
+    const bundle = await loadBundle();
+    const url = bundle
+      ? `${apiUrl}/api/dictionary/bundle?since=${bundle.version}`
+      : `${apiUrl}/api/dictionary/bundle`;
+    const response = await fetch(url, {
+      headers: { 'Authorization': `Bearer ${token}` }
+    });
+    if (!response.ok) {
+      throw new Error('下载离线词库失败');
+    }
+    const data = await response.json();
+
+    const words = data.full || !bundle ? {} : bundle.words;
+    (data.full ? data.words : data.upserts).forEach(entry => {
+      words[entry.id] = entry;
+    });
+    (data.removes || []).forEach(id => {
+      delete words[id];
+    });
+
+    const updated = { version: data.version, syncedAt: Date.now(), words };
+    await chrome.storage.local.set({ dictBundle: updated });
+    indexBundle(updated);
+    console.log(`离线词库已更新到版本 ${data.version}（${Object.keys(words).length} 个单词）`);
+  })().finally(() => {
+    bundleSyncing = null;
+  });
+  return bundleSyncing;
+}
+
+// 词库包过期时在后台更新，不阻塞本次查询
+function refreshBundleIfStale(apiUrl, token) {
+  chrome.storage.local.get(['dictBundle'], (result) => {
+    const bundle = result.dictBundle;
+    if (!bundle || Date.now() - bundle.syncedAt > BUNDLE_REFRESH_MS) {
+      syncBundle(apiUrl, token).catch(error => console.warn('离线词库更新失败:', error));
+    }
+  });
+}
+
+async function findInBundle(word) {
+  if (!bundleIndex) {
+    await loadBundle();
+  }
+  return bundleIndex.get(word) || null;
+}
+
+// 查询单词：优先使用离线词库，未命中时请求服务器（服务器会自动添加新单词）
+async function lookupWord(word, apiUrl, token) {
+  refreshBundleIfStale(apiUrl, token);
+
+  const entry = await findInBundle(word);
+  if (entry) {
+    // 本地命中：异步上报查看事件，由服务器累加查询次数
+    fetch(`${apiUrl}/api/events/query`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${token}`
+      },
+      body: JSON.stringify({ events: [{ word_id: entry.id }] }),
+      keepalive: true
+    }).catch(error => console.warn('上报查看事件失败:', error));
+
+    return { message: '单词查询成功', word: entry, action: 'queried', offline: true };
+  }
+
+  const response = await fetch(`${apiUrl}/api/words/lookup`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Authorization': `Bearer ${token}`
+    },
+    body: JSON.stringify({ word })
+  });
+
+  const data = await response.json();
+
+  if (!response.ok) {
+    throw new Error(data.error || '查询失败');
+  }
+
+  return data;
+}
+
+chrome.runtime.onStartup.addListener(() => {
+  chrome.storage.local.get(['token', 'apiUrl'], (result) => {
+    if (result.token) {
+      refreshBundleIfStale(result.apiUrl || 'http://localhost:5000', result.token);
+    }
+  });
+});
+
 // 处理右键菜单点击
 chrome.contextMenus.onClicked.addListener(async (info, tab) => {
   if (info.menuItemId === 'addWordToMemory') {
@@ -38,25 +158,12 @@ chrome.contextMenus.onClicked.addListener(async (info, tab) => {
       // 已登录，直接查询
       try {
         const apiUrl = result.apiUrl || 'http://localhost:5000';
-        const response = await fetch(`${apiUrl}/api/words/lookup`, {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-            'Authorization': `Bearer ${result.token}`
-          },
-          body: JSON.stringify({ word })
-        });
-        
-        const data = await response.json();
-        
-        if (!response.ok) {
-          throw new Error(data.error || '查询失败');
-        }
+        const data = await lookupWord(word, apiUrl, result.token);
         
         console.log('查询成功:', data);
         
-        // 保存待显示的单词并打开 popup
-        await chrome.storage.local.set({ pendingWord: word });
+        // 保存待显示的单词和查询结果（popup 直接显示，不再重复查询）
+        await chrome.storage.local.set({ pendingWord: word, pendingResult: data });
         
         // 通知 popup 显示结果
         chrome.runtime.sendMessage({
@@ -121,23 +228,10 @@ async function handleWordLookup(word) {
     
     try {
       const apiUrl = result.apiUrl || 'http://localhost:5000';
-      const response = await fetch(`${apiUrl}/api/words/lookup`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${result.token}`
-        },
-        body: JSON.stringify({ word })
-      });
-      
-      const data = await response.json();
+      const data = await lookupWord(word, apiUrl, result.token);
       
-      if (!response.ok) {
-        throw new Error(data.error || '查询失败');
-      }
-      
-      // 保存并打开 popup
-      await chrome.storage.local.set({ pendingWord: word });
+      // 保存查询结果并打开 popup
+      await chrome.storage.local.set({ pendingWord: word, pendingResult: data });
       chrome.action.openPopup();
       
     } catch (error) {
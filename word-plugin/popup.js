@@ -71,12 +71,18 @@ async function init() {
 // 检查是否有待查询的单词
 async function checkPendingWord() {
   try {
-    const result = await chrome.storage.local.get(['pendingWord']);
+    const result = await chrome.storage.local.get(['pendingWord', 'pendingResult']);
     if (result.pendingWord) {
-      // 有待查询的单词，立即查询
-      await lookupWord(result.pendingWord);
+      const pending = result.pendingResult;
+      if (pending && pending.word && pending.word.word === result.pendingWord) {
+        // 后台已完成查询（离线词库或服务器），直接显示结果
+        displayWordDetail(pending);
+      } else {
+        // 有待查询的单词，立即查询
+        await lookupWord(result.pendingWord);
+      }
       // 清除待查询的单词
-      await chrome.storage.local.remove(['pendingWord']);
+      await chrome.storage.local.remove(['pendingWord', 'pendingResult']);
     }
   } catch (error) {
     console.error('检查待查询单词失败:', error);
@@ -0,0 +1,344 @@
+"""
+非单词过滤 - 在调用 DeepSeek 之前拒绝拼写错误、人名和乱码
+
+浏览器插件划词时经常选中不是单词的内容，每次都调用 AI 既慢又花钱，还可能写入垃圾单词。
+新单词在调用 AI 之前依次经过：
+    1. 形状检查：只允许字母（及单词内部的 ' 和 -）、长度、元音、连续重复字母/辅音；
+       带变音符号的外来词先去掉变音符号再检查（café -> cafe，naïve -> naive）
+    2. 词表（可选）：WORD_GATE_BLOOM 指向由词表生成的布隆过滤器时，不在词表中的单词直接拒绝
+       （去掉常见的 -s/-es/-ed/-ing 后缀后再查一次）
+    3. 负缓存：AI 判定不是英文单词（invalid）或获取失败（failed）的输入写入 rejected_words 表，
+       所有 worker 共享；到期前直接拒绝。失败的缓存时间较短，连续失败时翻倍
+已经存在于词库中的单词不经过过滤。
+
+负缓存的命中结果在进程内再缓存 WORD_GATE_LOCAL_TTL 秒，重复的非单词不需要访问数据库。
+
+生成布隆过滤器：
+    python word_gate.py build word_gate.bloom words.txt [--include-db]
+    python word_gate.py check hello helo xqzt
+
+环境变量：
+    WORD_GATE_BLOOM: 布隆过滤器文件（默认不使用词表）
+    WORD_GATE_INVALID_TTL: AI 判定不是单词后的拒绝时间，秒（默认 30 天）
+    WORD_GATE_FAILURE_TTL: AI 获取失败后的拒绝时间，秒（默认 300，连续失败时翻倍）
+    WORD_GATE_MAX_FAILURE_TTL: 获取失败的最长拒绝时间，秒（默认 1 天）
+    WORD_GATE_LOCAL_TTL: 负缓存在进程内的缓存时间，秒（默认 60）
+"""
+import argparse
+import hashlib
+import math
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from auth_cache import TTLCache
+from logging_config import get_logger
+from models import db, RejectedWord, Word
+
+logger = get_logger('word_gate')
+
+# 拒绝原因
+SHAPE = 'shape'
+UNKNOWN = 'unknown'
+INVALID = 'invalid'
+FAILED = 'failed'
+
+MAX_LENGTH = 45
+WORD_PATTERN = re.compile(r"^[a-z]+(?:['-][a-z]+)*$")
+REPEATED = re.compile(r'(.)\1\1')
+CONSONANT_RUN = re.compile(r"[^aeiouy'-]{7,}")
+VOWELS = frozenset('aeiouy')
+# 没有元音或有连续重复字母的真实单词
+SHAPE_EXCEPTIONS = frozenset({
+    'brr', 'crwth', 'cwm', 'grr', 'hm', 'hmm', 'mm', 'nth', 'pfft', 'psst', 'pst',
+    'sh', 'shh', 'tsk', 'zzz',
+})
+SUFFIXES = ('s', 'es', 'ed', 'd', 'ing', "'s")
+PRUNE_INTERVAL = 3600
+# NFKD 不分解的拉丁字母
+LIGATURES = str.maketrans({'æ': 'ae', 'œ': 'oe', 'ø': 'o', 'ß': 'ss', 'ð': 'd', 'þ': 'th'})
+
+Rejection = namedtuple('Rejection', 'reason message retry_after')
+
+
+def fold_diacritics(word):
+    """去掉变音符号：café -> cafe，naïve -> naive，encyclopædia -> encyclopaedia"""
+    if word.isascii():
+        return word
+    decomposed = unicodedata.normalize('NFKD', word.translate(LIGATURES))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def shape_problem(word):
+    """
+    形状检查（带变音符号的单词按去掉变音符号后的形状检查）
+
+    Returns:
+        str: 不像英文单词的原因，通过检查时返回 None
+    """
+    word = fold_diacritics(word)
+    if len(word) > MAX_LENGTH:
+        return '单词过长'
+    if not WORD_PATTERN.match(word):
+        return '只能包含英文字母'
+    # 单个字母（a、x）和没有元音的真实单词
+    if len(word) == 1 or word in SHAPE_EXCEPTIONS:
+        return None
+    if not VOWELS.intersection(word):
+        return '没有元音字母'
+    if REPEATED.search(word):
+        return '连续重复的字母过多'
+    if CONSONANT_RUN.search(word):
+        return '连续辅音过多'
+    return None
+
+
+class BloomFilter:
+    """布隆过滤器（double hashing，blake2b）"""
+
+    MAGIC = b'WSYLBLM1'
+    HEADER = struct.Struct('<QI')
+
+    def __init__(self, size_bits, hashes, bits=None):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.bits = bits if bits is not None else bytearray((size_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate=0.001):
+        capacity = max(1, capacity)
+        size_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hashes = max(1, round(size_bits / capacity * math.log(2)))
+        return cls(size_bits, hashes)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size_bits for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.MAGIC + self.HEADER.pack(self.size_bits, self.hashes))
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        header_end = len(cls.MAGIC) + cls.HEADER.size
+        if data[:len(cls.MAGIC)] != cls.MAGIC:
+            raise ValueError(f'不是布隆过滤器文件: {path}')
+        size_bits, hashes = cls.HEADER.unpack(data[len(cls.MAGIC):header_end])
+        bits = bytearray(data[header_end:])
+        if len(bits) != (size_bits + 7) // 8:
+            raise ValueError(f'布隆过滤器文件不完整: {path}')
+        return cls(size_bits, hashes, bits)
+
+
+def in_wordlist(bloom, word):
+    """单词（或去掉常见后缀后、连字符的各部分）是否在词表中"""
+    if word in bloom:
+        return True
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) > len(suffix) + 1 and word[:-len(suffix)] in bloom:
+            return True
+    # 去掉 -ing/-ed 时可能还需要补回 e（making -> make）
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and word[:-len(suffix)] + 'e' in bloom:
+            return True
+    if '-' in word:
+        return all(in_wordlist(bloom, part) for part in word.split('-'))
+    return False
+
+
+class WordGate:
+    """新单词调用 AI 之前的过滤器"""
+
+    def __init__(self):
+        self.invalid_ttl = float(os.getenv('WORD_GATE_INVALID_TTL', str(30 * 86400)))
+        self.failure_ttl = float(os.getenv('WORD_GATE_FAILURE_TTL', '300'))
+        self.max_failure_ttl = float(os.getenv('WORD_GATE_MAX_FAILURE_TTL', '86400'))
+        self.bloom_path = os.getenv('WORD_GATE_BLOOM') or None
+        self._local = TTLCache(float(os.getenv('WORD_GATE_LOCAL_TTL', '60')), 10000)
+        self._bloom = None
+        self._bloom_loaded = False
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def _get_bloom(self):
+        if not self._bloom_loaded:
+            with self._lock:
+                if not self._bloom_loaded:
+                    if self.bloom_path:
+                        try:
+                            self._bloom = BloomFilter.load(self.bloom_path)
+                            logger.info("已加载词表布隆过滤器", extra={'path': self.bloom_path})
+                        except (OSError, ValueError) as e:
+                            logger.warning("加载词表布隆过滤器失败，不使用词表: %s", e)
+                    self._bloom_loaded = True
+        return self._bloom
+
+    def warm(self):
+        """预先加载词表布隆过滤器（启动时调用）"""
+        return self._get_bloom() is not None
+
+    def check(self, word):
+        """
+        检查新单词是否可以交给 AI
+
+        Args:
+            word: 小写的单词
+
+        Returns:
+            Rejection: 拒绝原因，可以调用 AI 时返回 None
+        """
+        problem = shape_problem(word)
+        if problem:
+            return Rejection(SHAPE, problem, None)
+
+        bloom = self._get_bloom()
+        if bloom is not None and not in_wordlist(bloom, fold_diacritics(word)):
+            return Rejection(UNKNOWN, '不在词表中', None)
+
+        cached = self._local.get(word)
+        if cached is None:
+            row = RejectedWord.query.filter_by(word=word).first()
+            if row is None or row.expires_at <= datetime.utcnow():
+                return None
+            expires_at = time.time() + (row.expires_at - datetime.utcnow()).total_seconds()
+            cached = (row.reason, expires_at)
+            self._local.put(word, cached, expires_at)
+
+        return self._rejection(*cached)
+
+    @staticmethod
+    def _rejection(reason, expires_at):
+        if reason == INVALID:
+            return Rejection(INVALID, '不是有效的英文单词', None)
+        return Rejection(FAILED, 'AI 获取单词信息失败，请稍后重试',
+                         max(1, math.ceil(expires_at - time.time())))
+
+    def record(self, word, reason):
+        """
+        记录 AI 判定不是单词（INVALID）或获取失败（FAILED），并提交事务
+
+        Returns:
+            Rejection: 本次写入的拒绝结果
+        """
+        now = datetime.utcnow()
+        try:
+            row = RejectedWord.query.filter_by(word=word).first()
+            if reason == INVALID:
+                failures, ttl = 1, self.invalid_ttl
+            else:
+                failures = row.failures + 1 if row is not None and row.reason == FAILED else 1
+                ttl = min(self.max_failure_ttl, self.failure_ttl * 2 ** (failures - 1))
+
+            if row is None:
+                row = RejectedWord(word=word)
+                db.session.add(row)
+            row.reason = reason
+            row.failures = failures
+            row.expires_at = now + timedelta(seconds=ttl)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("写入非单词负缓存失败: %s", e, extra={'word': word})
+            return None
+
+        expires_at = time.time() + ttl
+        self._local.put(word, (reason, expires_at), expires_at)
+        self._maybe_prune()
+        logger.info("非单词负缓存", extra={'word': word, 'reason': reason, 'ttl': ttl})
+        return self._rejection(reason, expires_at)
+
+    def _maybe_prune(self):
+        """每个进程每 PRUNE_INTERVAL 秒最多清理一次过期记录"""
+        if time.time() - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = time.time()
+        try:
+            RejectedWord.query.filter(RejectedWord.expires_at <= datetime.utcnow())\
+                .delete(synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("清理非单词负缓存失败: %s", e)
+
+
+word_gate = WordGate()
+
+
+# ==================== 命令行 ====================
+
+def _read_wordlist(path):
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            word = fold_diacritics(line.strip().lower())
+            if word and WORD_PATTERN.match(word):
+                yield word
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='非单词过滤')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='由词表生成布隆过滤器')
+    build.add_argument('output', help='输出文件')
+    build.add_argument('wordlists', nargs='*', help='词表文件（每行一个单词）')
+    build.add_argument('--error-rate', type=float, default=0.001, help='误判率（默认 0.001）')
+    build.add_argument('--include-db', action='store_true', help='同时加入词库中已有的单词')
+    check = subparsers.add_parser('check', help='检查单词（形状和词表）')
+    check.add_argument('words', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.command == 'check':
+        bloom = word_gate._get_bloom()
+        for word in args.words:
+            word = word.strip().lower()
+            problem = shape_problem(word)
+            if problem is None and bloom is not None and not in_wordlist(bloom, fold_diacritics(word)):
+                problem = '不在词表中'
+            print(f"{'✗' if problem else '✓'} {word}{'：' + problem if problem else ''}")
+        return 0
+
+    if not args.wordlists and not args.include_db:
+        parser.error('需要词表文件或 --include-db')
+    words = set()
+    try:
+        for path in args.wordlists:
+            words.update(_read_wordlist(path))
+    except OSError as e:
+        print(f'✗ {e}', file=sys.stderr)
+        return 1
+    if args.include_db:
+        from app import app
+
+        with app.app_context():
+            words.update(fold_diacritics(word) for (word,) in db.session.query(Word.word))
+
+    bloom = BloomFilter.for_capacity(len(words), args.error_rate)
+    for word in words:
+        bloom.add(word)
+    bloom.save(args.output)
+    print(f'✓ {len(words)} 个单词，{bloom.size_bits // 8 / 1024:.0f} KB，'
+          f'{bloom.hashes} 个哈希 -> {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())